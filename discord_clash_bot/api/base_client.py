@@ -2,13 +2,24 @@
 Base class for all API connections
 """
 
-import inspect
+import time
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Dict
+from typing import Dict, Optional
 
+import aiohttp
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from discord_clash_bot.utils.logging import get_logger
+
+from .cache import response_size
+from .metrics import Metrics
+from .priority import current_priority
+from .ratelimit import TokenBucket, parse_retry_after
+
+logger = get_logger(__name__)
 
 
 class Method(Enum):
@@ -37,28 +48,155 @@ class NotOkException(Exception):
         super().__init__(self.message)
 
 
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter which applies a default timeout to every request sent through it
+    """
+
+    def __init__(self, *args, timeout: float = None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
 class BaseClient(ABC):
     """
-    Class to handle basic behavior of API connections
+    Class to handle basic behavior of API connections. The client keeps a
+    long lived session, so connections are kept alive and reused between
+    requests. Use close() or a with statement to release them.
     """
 
     def __init__(
         self,
         token: str = "",
         headers: Dict[str, str] = None,
+        *,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        timeout: float = 10.0,
+        rate_limiter: TokenBucket = None,
+        max_throttle_retries: int = 3,
+        metrics: Metrics = None,
     ):
         """
         Base Api connection
 
         Args:
-            base_url (str): Base url of the API
-            token (str, optional): API token. Defaults to None.
+            token (str, optional): API token. Defaults to "".
             headers (dict, optional): Headers to be used in the requests. Defaults to None.
-            endpoints (dict, optional): Endpoints of the API. Defaults to None.
+            pool_connections (int, optional): Number of hosts to keep connection
+                pools for. Defaults to 10.
+            pool_maxsize (int, optional): Maximum number of kept alive connections
+                per host. Defaults to 10.
+            timeout (float, optional): Timeout of a request in seconds. Defaults to 10.0.
+            rate_limiter (TokenBucket, optional): Rate limiter every request draws
+                a token from. Defaults to None.
+            max_throttle_retries (int, optional): Times a request is retried after a
+                429 response, backing off the rate limiter. Defaults to 3.
+            metrics (Metrics, optional): Metrics of the requests, it may be shared
+                between clients. Defaults to a new Metrics per client.
         """
 
         self.token = token
         self.headers = headers if headers is not None else {}
+        self.last_elapsed = None
+        self.rate_limiter = rate_limiter
+        self.max_throttle_retries = max_throttle_retries
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        adapter = TimeoutHTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            timeout=timeout,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        )
+
+    def close(self):
+        """
+        Close the session and its pooled connections
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def throttled(
+        self, response: requests.Response, attempt: int, limiter: TokenBucket = None
+    ) -> bool:
+        """
+        Check whether a response is a 429 which should be retried, and if so
+        back off the rate limiter for the time asked by the server
+
+        Args:
+            response (requests.Response): Response to check
+            attempt (int): Number of the attempt which got the response
+            limiter (TokenBucket, optional): Rate limiter the request drew its
+                token from. Defaults to None.
+
+        Returns:
+            bool: Whether the request should be retried
+        """
+        if (
+            response.status_code != 429
+            or limiter is None
+            or attempt >= self.max_throttle_retries
+        ):
+            return False
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        logger.warning(f"Rate limited, backing off {retry_after}s")
+        limiter.backoff(retry_after)
+        return True
+
+    def limiter(self, _request: requests.Request) -> Optional[TokenBucket]:
+        """
+        Rate limiter a request draws its token from, the shared rate_limiter of
+        the client unless a subclass picks one per request
+
+        Args:
+            _request (requests.Request): Request with its token already added
+
+        Returns:
+            TokenBucket: Rate limiter of the request, None if it is not limited
+        """
+        return self.rate_limiter
+
+    def on_response(
+        self, request: requests.Request, response: Optional[requests.Response]
+    ):
+        """
+        Called after every attempt of a request, i.e. to give back its token
+
+        Args:
+            request (requests.Request): Request sent
+            response (requests.Response, optional): Response received, None if the
+                request failed without a response
+        """
+
+    def record(
+        self, method_name: str, response: Optional[requests.Response], elapsed: float
+    ):
+        """
+        Record an attempt of a request in the metrics of its endpoint
+        """
+        self.last_elapsed = elapsed
+        if response is None:
+            self.metrics.record_response(method_name, None, 0, elapsed)
+        else:
+            self.metrics.record_response(
+                method_name, response.status_code, response_size(response), elapsed
+            )
 
     @abstractmethod
     def add_token(self, request: requests.Request) -> requests.Request:
@@ -83,30 +221,320 @@ class BaseClient(ABC):
         """
         raise NotImplementedError
 
-    def process_request(self, url: str, method: Method = Method.GET, **kwargs):
+    def process_request(
+        self,
+        url: str,
+        method: Method = Method.GET,
+        method_name: str = "process_request",
+        **kwargs,
+    ):
         """
         Process a generic request
         Args:
             url (str): Url of the request
             method (Method, optional): HTTP method. Defaults to Method.GET.
+            method_name (str, optional): Name of the API method, used to map
+                errors. Defaults to "process_request".
             kwargs: Keyword arguments to be passed to the request
 
         Returns:
             dict: Response json
         """
 
+        return self.send_request(
+            url, method=method, method_name=method_name, **kwargs
+        ).json()
+
+    def send_request(
+        self,
+        url: str,
+        method: Method = Method.GET,
+        method_name: str = "process_request",
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request and handle the error responses
+        Args:
+            url (str): Url of the request
+            method (Method, optional): HTTP method. Defaults to Method.GET.
+            method_name (str, optional): Name of the API method, used to map
+                errors. Defaults to "process_request".
+            kwargs: Keyword arguments to be passed to the request
+
+        Returns:
+            requests.Response: Successful response
+        """
+
         clean_url = urllib3.util.parse_url(url).url
-        request = requests.Request(
-            method.value, clean_url, headers=self.headers, **kwargs
-        )
-        request = self.add_token(request=request)
+        for attempt in range(self.max_throttle_retries + 1):
+            # the token is added on every attempt, as a throttled one may change
+            request = requests.Request(
+                method.value, clean_url, headers=dict(self.headers), **kwargs
+            )
+            request = self.add_token(request=request)
+            limiter = self.limiter(request)
+            try:
+                if limiter is not None:
+                    limiter.acquire(current_priority())
+            except BaseException:
+                # the key of the request is given back when it is not sent
+                self.on_response(request, None)
+                raise
+
+            response = None
+            start = time.perf_counter()
+            try:
+                response = self.session.send(self.session.prepare_request(request))
+            except Exception as error:
+                self.metrics.record_outcome(method_name, type(error).__name__)
+                raise
+            finally:
+                self.on_response(request, response)
+                self.record(method_name, response, time.perf_counter() - start)
+            logger.debug(f"{method.value} {clean_url} took {self.last_elapsed:.4f}s")
+
+            if not self.throttled(response, attempt, limiter):
+                break
+
+        return self.check_response(response, method_name)
+
+    def check_response(
+        self, response: requests.Response, method_name: str
+    ) -> requests.Response:
+        """
+        Handle an error response and record the outcome of the request
+
+        Returns:
+            requests.Response: The response, if it is ok
+        """
+        try:
+            if not response.ok:
+                self.error_handler(response=response, method_name=method_name)
+        except Exception as error:
+            self.metrics.record_outcome(method_name, type(error).__name__)
+            raise
+        self.metrics.record_outcome(method_name, "ok")
+        return response
+
+
+def to_response(raw: aiohttp.ClientResponse, body: bytes) -> requests.Response:
+    """
+    Build a requests.Response out of an aiohttp response, so that error handlers
+    and exceptions work the same for the synchronous and asynchronous clients.
+
+    Args:
+        raw (aiohttp.ClientResponse): Response returned by aiohttp
+        body (bytes): Already read body of the response
+
+    Returns:
+        requests.Response: Equivalent requests response
+    """
+    response = requests.Response()
+    response.status_code = raw.status
+    response.reason = raw.reason
+    response.url = str(raw.url)
+    response.headers = CaseInsensitiveDict(raw.headers)
+    response.encoding = raw.charset or "utf-8"
+    # requests has no public setter for an already downloaded body
+    response._content = body  # pylint: disable=protected-access
+    return response
+
+
+class AsyncBaseClient(ABC):
+    """
+    Class to handle basic behavior of asynchronous API connections. All the
+    requests share a single pooled aiohttp session, which is created lazily
+    inside the running event loop and closed with close().
+    """
 
-        with requests.Session() as session:
-            response = session.send(request.prepare())
+    def __init__(
+        self,
+        token: str = "",
+        headers: Dict[str, str] = None,
+        *,
+        session: aiohttp.ClientSession = None,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        timeout: float = 10.0,
+        rate_limiter: TokenBucket = None,
+        max_throttle_retries: int = 3,
+        metrics: Metrics = None,
+    ):
+        """
+        Asynchronous Api connection
+
+        Args:
+            token (str, optional): API token. Defaults to "".
+            headers (dict, optional): Headers to be used in the requests. Defaults to None.
+            session (aiohttp.ClientSession, optional): Session to share with other
+                clients. When given, the client does not close it. Defaults to None.
+            limit (int, optional): Maximum number of simultaneous connections in the
+                pool. Defaults to 100.
+            limit_per_host (int, optional): Maximum number of simultaneous connections
+                to the same host, 0 means no limit. Defaults to 0.
+            timeout (float, optional): Total timeout of a request in seconds.
+                Defaults to 10.0.
+            rate_limiter (TokenBucket, optional): Rate limiter every request draws
+                a token from. Defaults to None.
+            max_throttle_retries (int, optional): Times a request is retried after a
+                429 response, backing off the rate limiter. Defaults to 3.
+            metrics (Metrics, optional): Metrics of the requests, it may be shared
+                between clients. Defaults to a new Metrics per client.
+        """
+
+        self.token = token
+        self.headers = headers if headers is not None else {}
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.last_elapsed = None
+        self.rate_limiter = rate_limiter
+        self.max_throttle_retries = max_throttle_retries
+        self.metrics = metrics if metrics is not None else Metrics()
+        self._session = session
+        self._owns_session = session is None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Pooled session used by every request of the client
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit_per_host
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout
+            )
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """
+        Close the pooled session, if it is owned by this client
+        """
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    throttled = BaseClient.throttled
+    limiter = BaseClient.limiter
+    on_response = BaseClient.on_response
+    record = BaseClient.record
+    check_response = BaseClient.check_response
+
+    @abstractmethod
+    def add_token(self, request: requests.Request) -> requests.Request:
+        """
+        Add a token to the request.
+
+        Args:
+            request (requests.Request): The request to add the token to.
+
+        Returns:
+            requests.Request: The request with the token added.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def error_handler(self, response: requests.Response, method_name: str):
+        """
+        Handle an error response
+
+        Args:
+            response (requests.Response): Response to handle
+        """
+        raise NotImplementedError
 
-        if not response.ok:
-            # get the name of the method which called this function from the stack
-            method_name = inspect.stack()[1].function
-            self.error_handler(response=response, method_name=method_name)
+    async def process_request(
+        self,
+        url: str,
+        method: Method = Method.GET,
+        method_name: str = "process_request",
+        **kwargs,
+    ):
+        """
+        Process a generic request without blocking the event loop
+        Args:
+            url (str): Url of the request
+            method (Method, optional): HTTP method. Defaults to Method.GET.
+            method_name (str, optional): Name of the API method, used to map
+                errors. Defaults to "process_request".
+            kwargs: Keyword arguments to be passed to the request
+
+        Returns:
+            dict: Response json
+        """
 
+        response = await self.send_request(
+            url, method=method, method_name=method_name, **kwargs
+        )
         return response.json()
+
+    async def send_request(
+        self,
+        url: str,
+        method: Method = Method.GET,
+        method_name: str = "process_request",
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request without blocking the event loop and handle the error responses
+        Args:
+            url (str): Url of the request
+            method (Method, optional): HTTP method. Defaults to Method.GET.
+            method_name (str, optional): Name of the API method, used to map
+                errors. Defaults to "process_request".
+            kwargs: Keyword arguments to be passed to the request
+
+        Returns:
+            requests.Response: Successful response
+        """
+
+        clean_url = urllib3.util.parse_url(url).url
+        for attempt in range(self.max_throttle_retries + 1):
+            request = requests.Request(
+                method.value, clean_url, headers=dict(self.headers), **kwargs
+            )
+            request = self.add_token(request=request)
+            limiter = self.limiter(request)
+            try:
+                if limiter is not None:
+                    await limiter.acquire_async(current_priority())
+            except BaseException:
+                # the key of the request is given back when it is not sent
+                self.on_response(request, None)
+                raise
+
+            response = None
+            start = time.perf_counter()
+            try:
+                async with self.session.request(
+                    request.method,
+                    request.url,
+                    headers=request.headers,
+                    params=request.params or None,
+                    json=request.json,
+                ) as raw:
+                    body = await raw.read()
+                response = to_response(raw, body)
+            except Exception as error:
+                self.metrics.record_outcome(method_name, type(error).__name__)
+                raise
+            finally:
+                self.on_response(request, response)
+                self.record(method_name, response, time.perf_counter() - start)
+            logger.debug(
+                f"{request.method} {request.url} took {self.last_elapsed:.4f}s"
+            )
+
+            if not self.throttled(response, attempt, limiter):
+                break
+
+        return self.check_response(response, method_name)
@@ -0,0 +1,82 @@
+"""
+Bounded concurrency fan out of API lookups. Results keep the order of the input,
+and an error of one item is returned with it instead of aborting the whole batch.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Iterable, List, NamedTuple, Optional
+
+
+class BulkResult(NamedTuple):
+    """
+    Result of a lookup of a bulk fetch
+    """
+
+    tag: str
+    value: Any = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the lookup succeeded
+        """
+        return self.error is None
+
+
+def map_bounded(
+    func: Callable[[str], Any], tags: Iterable[str], concurrency: int
+) -> List[BulkResult]:
+    """
+    Call func for every tag using at most concurrency threads. The lookups run
+    in copies of the context of the caller, so they keep its request priority.
+
+    Args:
+        func (Callable): Lookup of a single tag
+        tags (Iterable[str]): Tags to look up
+        concurrency (int): Maximum number of simultaneous lookups
+
+    Returns:
+        List[BulkResult]: Results in the order of the tags
+    """
+
+    def lookup(tag: str) -> BulkResult:
+        try:
+            return BulkResult(tag, func(tag))
+        except Exception as error:  # pylint: disable=broad-except
+            return BulkResult(tag, error=error)
+
+    tags = list(tags)
+    if not tags:
+        return []
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(tags))) as pool:
+        return list(pool.map(lambda tag: context.copy().run(lookup, tag), tags))
+
+
+async def gather_bounded(
+    func: Callable[[str], Awaitable[Any]], tags: Iterable[str], concurrency: int
+) -> List[BulkResult]:
+    """
+    Await func for every tag with at most concurrency lookups in flight
+
+    Args:
+        func (Callable): Coroutine function looking up a single tag
+        tags (Iterable[str]): Tags to look up
+        concurrency (int): Maximum number of simultaneous lookups
+
+    Returns:
+        List[BulkResult]: Results in the order of the tags
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup(tag: str) -> BulkResult:
+        async with semaphore:
+            try:
+                return BulkResult(tag, await func(tag))
+            except Exception as error:  # pylint: disable=broad-except
+                return BulkResult(tag, error=error)
+
+    return list(await asyncio.gather(*(lookup(tag) for tag in tags)))
@@ -0,0 +1,177 @@
+"""
+Bounded in-memory cache for API responses
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+import requests
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+def parse_max_age(cache_control: Optional[str]) -> Optional[float]:
+    """
+    Get the max-age of a Cache-Control header
+
+    Args:
+        cache_control (str): Value of the Cache-Control header
+
+    Returns:
+        float: Seconds the response may be cached, None if the header does not say
+    """
+    if not isinstance(cache_control, str):
+        return None
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0.0
+    match = MAX_AGE_PATTERN.search(cache_control)
+    return float(match.group(1)) if match else None
+
+
+def response_size(response: requests.Response) -> int:
+    """
+    Size in bytes of the body of a response, 0 if it is unknown
+    """
+    content = response.content
+    return len(content) if isinstance(content, (bytes, str)) else 0
+
+
+class CacheEntry(NamedTuple):
+    """
+    Value stored in the cache
+    """
+
+    value: Any
+    expires_at: float
+    size: int
+
+
+class ResponseCache:
+    """
+    Least recently used cache with per entry time to live. Entries are bounded
+    both in number and in accumulated size of the responses. Expired entries are
+    kept until they are evicted, so they can still be served as stale values.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 32 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_entries (int, optional): Maximum number of entries. Defaults to 1024.
+            max_bytes (int, optional): Maximum accumulated size of the entries.
+                Defaults to 32MB.
+            clock (Callable, optional): Monotonic clock. Defaults to time.monotonic.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Get a value from the cache
+
+        Args:
+            key (Hashable): Key of the value
+            allow_stale (bool, optional): Return the value even if it expired.
+                Stale reads are not counted as hits. Defaults to False.
+
+        Returns:
+            Any: Cached value, None if there is no fresh value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (
+                not allow_stale and entry.expires_at <= self.clock()
+            ):
+                if not allow_stale:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if not allow_stale:
+                self.hits += 1
+            return entry.value
+
+    def ttl(self, key: Hashable) -> Optional[float]:
+        """
+        Seconds until a value expires
+
+        Returns:
+            float: Remaining time to live, None if the key is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return max(entry.expires_at - self.clock(), 0.0)
+
+    def set(self, key: Hashable, value: Any, ttl: float, size: int = 0):
+        """
+        Store a value in the cache, evicting the least recently used entries if
+        the cache is full
+
+        Args:
+            key (Hashable): Key of the value
+            value (Any): Value to store
+            ttl (float): Seconds the value is fresh
+            size (int, optional): Size of the value in bytes. Defaults to 0.
+        """
+        if ttl <= 0 or self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._entries[key] = CacheEntry(value, self.clock() + ttl, size)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """
+        Remove a value from the cache
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry.size
+
+    def clear(self):
+        """
+        Remove every value from the cache
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of the cache
+
+        Returns:
+            dict: hits, misses, evictions, number of entries and size in bytes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
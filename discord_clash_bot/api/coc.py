@@ -2,12 +2,52 @@
 Clash of Clans API wrapper
 """
 
-from typing import Any, Dict, List
-
+import asyncio
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+import aiohttp
 import requests
 from discord_clash_bot.utils.logging import get_logger
 
-from .base_client import BaseClient, Method, NotOkException
+from .base_client import AsyncBaseClient, BaseClient, Method, NotOkException
+from .bulk import BulkResult, gather_bounded, map_bounded
+from .cache import ResponseCache, parse_max_age, response_size
+from .cwl import LeagueRound, league_rounds, war_tags
+from .decoding import JsonLoads, decode
+from .endpoints import (
+    Endpoint,
+    async_endpoint_method,
+    async_page_method,
+    endpoint_method,
+    page_method,
+)
+from .keys import KeyPool
+from .models import (
+    Clan,
+    ClanMember,
+    LeagueGroup,
+    Player,
+    RaidSeason,
+    War,
+    WarLogEntry,
+    parse,
+)
+from .pagination import CURSOR_PARAMS, aiter_items, iter_items, page_query
+from .ratelimit import TokenBucket, get_rate_limiter
+from .resilience import BreakerState, CircuitBreaker, CircuitOpen, RetryPolicy
+from .singleflight import AsyncSingleFlight, SingleFlight
+from .tags import InvalidTag, encode_tag, normalize_tag
 
 logger = get_logger(__name__)
 
@@ -30,6 +70,15 @@ class ClanNotFound(Exception):
         super().__init__("Invalid clan tag")
 
 
+class WarNotFound(Exception):
+    """
+    Raised when the war tag format is invalid or the war does not exist
+    """
+
+    def __init__(self):
+        super().__init__("Invalid war tag")
+
+
 class ServerException(Exception):
     """
     Raised when the server returns an error of the type 5xx
@@ -42,25 +91,175 @@ class ServerException(Exception):
         )
 
 
-class CocClient(BaseClient):
+GET_CLAN = Endpoint(
+    "get_clan",
+    "clans/{clan_tag}",
+    not_found=ClanNotFound,
+    model=Clan,
+    description="Returns clan information",
+)
+GET_WAR = Endpoint(
+    "get_war",
+    "clans/{clan_tag}/currentwar",
+    not_found=ClanNotFound,
+    model=War,
+    description="Returns current war information",
+)
+GET_PLAYER = Endpoint(
+    "get_player",
+    "players/{player_tag}",
+    not_found=PlayerNotFound,
+    model=Player,
+    description="Returns player information",
+)
+GET_CLAN_MEMBERS = Endpoint(
+    "get_clan_members",
+    "clans/{clan_tag}/members",
+    not_found=ClanNotFound,
+    paginated=True,
+    model=ClanMember,
+    description="Returns clan members information",
+)
+GET_WAR_LOG = Endpoint(
+    "get_war_log",
+    "clans/{clan_tag}/warlog",
+    not_found=ClanNotFound,
+    paginated=True,
+    model=WarLogEntry,
+    description="Returns the war log of the clan",
+)
+GET_CAPITAL_RAIDSEASONS = Endpoint(
+    "get_capital_raidseasons",
+    "clans/{clan_tag}/capitalraidseasons",
+    paginated=True,
+    model=RaidSeason,
+    description="Returns capital raid seasons information",
+)
+GET_LEAGUE_GROUP = Endpoint(
+    "get_league_group",
+    "clans/{clan_tag}/currentwar/leaguegroup",
+    not_found=ClanNotFound,
+    model=LeagueGroup,
+    description="Returns the clan war league group of the clan",
+)
+GET_LEAGUE_WAR = Endpoint(
+    "get_league_war",
+    "clanwarleagues/wars/{war_tag}",
+    not_found=WarNotFound,
+    model=War,
+    description="Returns a clan war league war",
+)
+POST_VERIFY_PLAYER = Endpoint(
+    "post_verify_player",
+    "players/{player_tag}/verifytoken",
+    method=Method.POST,
+    description="Verify player token",
+)
+
+ENDPOINTS = {
+    endpoint.name: endpoint
+    for endpoint in (
+        GET_CLAN,
+        GET_WAR,
+        GET_PLAYER,
+        GET_CLAN_MEMBERS,
+        GET_WAR_LOG,
+        GET_CAPITAL_RAIDSEASONS,
+        GET_LEAGUE_GROUP,
+        GET_LEAGUE_WAR,
+        POST_VERIFY_PLAYER,
+    )
+}
+
+
+class CocClientMixin:
     """
-    Clash of Clans API wrapper
+    Behavior shared by the synchronous and the asynchronous Clash of Clans
+    clients: authentication, error mapping, response caching, coalescing
+    of identical concurrent requests, retries and circuit breaking.
     """
 
     base_url = "https://api.clashofclans.com/v1/"
 
-    endpoints_dict = {
-        "get_clan": "clans/{clan_tag}",
-        "get_war": "clans/{clan_tag}/currentwar",
-        "get_player": "players/{player_tag}",
-        "get_clan_members": "clans/{clan_tag}/members",
-        "get_capital_raidseasons": "clans/{clan_tag}/capitalraidseasons",
-        "post_verify_player": "players/{player_tag}/verifytoken",
-    }
+    endpoints = ENDPOINTS
+
+    flight_class = SingleFlight
+    retryable_errors = (ServerException, requests.RequestException)
+
+    def __init__(
+        self,
+        token: str = "",
+        headers: Dict[str, str] = None,
+        *,
+        cache: ResponseCache = None,
+        cache_ttl: Dict[str, float] = None,
+        bulk_concurrency: int = 10,
+        retry_policy: RetryPolicy = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        json_loads: JsonLoads = None,
+        as_models: bool = False,
+        key_pool: KeyPool = None,
+        validate_tags: bool = False,
+        not_found_ttl: float = 0.0,
+        **kwargs,
+    ):
+        """
+        Clash of Clans API connection
+
+        Args:
+            token (str, optional): API token. Defaults to "".
+            headers (dict, optional): Headers to be used in the requests. Defaults to None.
+            cache (ResponseCache, optional): Cache of the GET responses, it may be
+                shared between clients. Defaults to a new cache per client.
+            cache_ttl (dict, optional): Seconds to cache the responses of an endpoint
+                by endpoint name, overriding the server Cache-Control. A ttl of 0
+                disables the cache for the endpoint. Defaults to None.
+            bulk_concurrency (int, optional): Default maximum number of simultaneous
+                lookups of the bulk methods. Defaults to 10.
+            retry_policy (RetryPolicy, optional): Backoff of the retries of GET
+                requests failing with a server or connection error.
+                Defaults to RetryPolicy().
+            failure_threshold (int, optional): Consecutive failures opening the
+                circuit breaker of an endpoint. Defaults to 5.
+            reset_timeout (float, optional): Seconds the circuit of an endpoint stays
+                open before probing the API again. Defaults to 30.0.
+            json_loads (Callable, optional): Decoder of the response bodies, i.e.
+                decoding.loads. Defaults to None, which uses response.json().
+            as_models (bool, optional): Return slotted models (Player, Clan, ...)
+                instead of dictionaries. Defaults to False.
+            key_pool (KeyPool, optional): Pool of API keys the requests are spread
+                over, each key with its own rate limiter. When given, token is not
+                used. Defaults to None.
+            validate_tags (bool, optional): Normalize the tags and reject malformed
+                ones without a request, raising the not found exception of the
+                endpoint or InvalidTag. Defaults to False.
+            not_found_ttl (float, optional): Seconds a tag answered with a 404 is
+                remembered, raising the not found exception without a request.
+                Defaults to 0.0, which disables it.
+            kwargs: Keyword arguments of the underlying client. The rate limiter
+                defaults to the process wide limiter of the token.
+        """
+        kwargs.setdefault("rate_limiter", get_rate_limiter(token))
+        super().__init__(token, headers, **kwargs)
+        self.cache = cache if cache is not None else ResponseCache()
+        self.cache_ttl = cache_ttl if cache_ttl is not None else {}
+        self.flights = self.flight_class()
+        self.bulk_concurrency = bulk_concurrency
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.json_loads = json_loads
+        self.as_models = as_models
+        self.key_pool = key_pool
+        self.validate_tags = validate_tags
+        self.not_found_ttl = not_found_ttl
+        self.not_found = ResponseCache(max_entries=4096)
 
     def add_token(self, request: requests.Request) -> requests.Request:
         """
-        Add a token to the request.
+        Add a token to the request, taken from the key pool if there is one.
 
         Args:
             request (requests.Request): The request to add the token to.
@@ -68,112 +267,685 @@ class CocClient(BaseClient):
         Returns:
             requests.Request: The request with the token added.
         """
-        request.headers["Authorization"] = f"Bearer {self.token}"
+        token = self.key_pool.acquire() if self.key_pool is not None else self.token
+        request.headers["Authorization"] = f"Bearer {token}"
         return request
 
+    @staticmethod
+    def request_token(request: requests.Request) -> str:
+        """
+        Token added to a request by add_token()
+        """
+        return request.headers["Authorization"][len("Bearer ") :]
+
+    def limiter(self, request: requests.Request) -> Optional[TokenBucket]:
+        """
+        Rate limiter of the key of a request
+        """
+        if self.key_pool is None:
+            return self.rate_limiter
+        return self.key_pool.limiter(self.request_token(request))
+
+    def on_response(
+        self, request: requests.Request, response: Optional[requests.Response]
+    ):
+        """
+        Give back the key of a request to the pool, which quarantines it if it
+        was refused or throttled
+        """
+        if self.key_pool is not None:
+            self.key_pool.release(
+                self.request_token(request),
+                response.status_code if response is not None else None,
+            )
+
+    def key_usage(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Usage of the keys of the pool
+
+        Returns:
+            dict: Usage of every key by masked key, empty without a key pool
+        """
+        return self.key_pool.usage() if self.key_pool is not None else {}
+
+    def queue_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Requests waiting for the rate limiters of the client and the time they
+        waited, by priority class, summed over the keys of the pool
+
+        Returns:
+            dict: Counters of every priority class by class name, see
+                TokenBucket.stats()
+        """
+        if self.key_pool is not None:
+            limiters = list(self.key_pool.limiters.values())
+        else:
+            limiters = [self.rate_limiter] if self.rate_limiter is not None else []
+        totals: Dict[str, Dict[str, float]] = {}
+        for limiter in limiters:
+            for name, stats in limiter.stats()["priorities"].items():
+                total = totals.setdefault(name, dict.fromkeys(stats, 0))
+                for counter, value in stats.items():
+                    if counter.startswith("max_"):
+                        total[counter] = max(total[counter], value)
+                    else:
+                        total[counter] += value
+        return totals
+
     def error_handler(self, response: requests.Response, method_name: str):
         """
         Handle an error response
 
         Args:
             response (requests.Response): Response to handle
+            method_name (str): Name of the endpoint which was requested
         """
         if response.status_code == 404:
-            if method_name == "get_player":
-                raise PlayerNotFound()
-            if method_name in ["get_clan", "get_war", "get_clan_members"]:
-                raise ClanNotFound()
+            endpoint = self.endpoints.get(method_name)
+            if endpoint is not None and endpoint.not_found is not None:
+                raise endpoint.not_found()
         elif response.status_code >= 500:
             raise ServerException(response)
-        else:
-            raise NotOkException(response=response, method_name=method_name)
+        raise NotOkException(response=response, method_name=method_name)
+
+    def url(self, endpoint: Endpoint, params: Dict[str, str]) -> str:
+        """
+        Url of a request to an endpoint, with the tags encoded
+        """
+        return self.base_url + endpoint.format(
+            **{name: encode_tag(value) for name, value in params.items()}
+        )
 
-    def get_clan(self, clan_tag) -> List[Dict[str, Any]]:
+    def prepare_params(
+        self, endpoint: Endpoint, params: Dict[str, str]
+    ) -> Dict[str, str]:
         """
-        Returns clan information
+        Normalize the tags of the parameters of a request, if tags are validated
+
+        Returns:
+            dict: Parameters with canonical tags
+
+        Raises:
+            Exception: The not found exception of the endpoint, or InvalidTag, if
+                a tag is malformed
+        """
+        if not self.validate_tags:
+            return params
+        try:
+            return {
+                name: normalize_tag(value) if name.endswith("_tag") else value
+                for name, value in params.items()
+            }
+        except InvalidTag as error:
+            if endpoint.not_found is not None:
+                raise endpoint.not_found() from error
+            raise
+
+    def check_not_found(self, endpoint: Endpoint, key: Optional[Hashable]):
+        """
+        Raise the not found exception of a request recently answered with a 404
+
+        Raises:
+            Exception: The not found exception of the endpoint
+        """
+        if key is not None and endpoint.not_found is not None:
+            if self.not_found.get(key) is not None:
+                raise endpoint.not_found()
+
+    def remember_not_found(
+        self, endpoint: Endpoint, key: Optional[Hashable], error: Exception
+    ):
+        """
+        Remember for not_found_ttl seconds a request answered with a 404
+        """
+        if (
+            key is not None
+            and self.not_found_ttl
+            and endpoint.not_found is not None
+            and isinstance(error, endpoint.not_found)
+        ):
+            self.not_found.set(key, True, self.not_found_ttl)
+
+    def decode(self, endpoint: Endpoint, response: requests.Response) -> Any:
+        """
+        Decode the json of a response, building the models of the endpoint if
+        the client returns models
+        """
+        result = decode(response, self.json_loads)
+        if self.as_models and endpoint.model is not None and "body" in result:
+            body = result["body"]
+            if isinstance(body, dict) and "paging" in body:
+                # keep the cursors of a page, the body becomes its list of items
+                result["paging"] = body["paging"]
+            result["body"] = parse(endpoint.model, body)
+        return result
+
+    def cache_key(
+        self,
+        endpoint: Endpoint,
+        params: Dict[str, str],
+        query: Dict[str, Any] = None,
+    ) -> Optional[Hashable]:
+        """
+        Key of the cached responses of an endpoint
 
         Args:
-            clan_tag (str): Tag of the clan
+            endpoint (Endpoint): Endpoint requested
+            params (dict): Parameters of the path of the endpoint
+            query (dict, optional): Query parameters of the request. Defaults to None.
 
         Returns:
-            dict: Clan information
+            Hashable: Key made of the endpoint name and its parameters, None
+                if the responses of the endpoint can not be cached
+        """
+        if endpoint.method is not Method.GET:
+            return None
+        key = (endpoint.name,) + tuple(params[param] for param in endpoint.params)
+        if query:
+            # pages past the first one are streamed, they would only evict hot entries
+            if any(param in query for param in CURSOR_PARAMS):
+                return None
+            key += tuple(sorted(query.items()))
+        return key
+
+    def cache_response(
+        self,
+        endpoint: Endpoint,
+        key: Optional[Hashable],
+        response: requests.Response,
+        result: Any,
+    ):
+        """
+        Store a result in the cache for the ttl configured for the endpoint, or
+        the max-age sent by the server
         """
+        if key is None:
+            return
+        ttl = self.cache_ttl.get(endpoint.name, endpoint.cache_ttl)
+        if ttl is None:
+            ttl = parse_max_age(response.headers.get("Cache-Control"))
+        if ttl:
+            self.cache.set(key, result, ttl, size=response_size(response))
+
+    def cached_ttl(self, endpoint: Endpoint, params: Dict[str, str]) -> float:
+        """
+        Seconds the cached response of a request stays fresh, requesting it again
+        before then returns the cached response
 
-        url_raw = self.base_url + self.endpoints_dict["get_clan"].format(
-            clan_tag=clan_tag
-        )
+        Returns:
+            float: Remaining time to live, 0.0 if the response is not cached
+        """
+        key = self.cache_key(endpoint, self.prepare_params(endpoint, params))
+        ttl = self.cache.ttl(key) if key is not None else None
+        return ttl or 0.0
 
-        return self.process_request(url_raw, method=Method.GET)["body"]
+    def breaker(self, endpoint: Endpoint) -> CircuitBreaker:
+        """
+        Circuit breaker of an endpoint
+        """
+        breaker = self.breakers.get(endpoint.name)
+        if breaker is None:
+            breaker = self.breakers.setdefault(
+                endpoint.name,
+                CircuitBreaker(self.failure_threshold, self.reset_timeout),
+            )
+        return breaker
+
+    def breaker_states(self) -> Dict[str, Dict[str, object]]:
+        """
+        State of the circuit breakers by endpoint name, for monitoring
+        """
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+
+    def retries(self, endpoint: Endpoint) -> int:
+        """
+        Number of retries of a failed request, only idempotent requests are retried
+        """
+        return self.retry_policy.max_retries if endpoint.method is Method.GET else 0
+
+    def fallback(self, key: Optional[Hashable], error: Exception) -> Any:
+        """
+        Serve a stale cached result of a failed request
 
-    def get_war(self, clan_tag) -> Dict[str, Any]:
+        Raises:
+            Exception: The error, if there is no cached result
         """
-        Returns current war information
+        stale = self.cache.get(key, allow_stale=True) if key is not None else None
+        if stale is None:
+            raise error
+        logger.warning(f"Serving stale {key[0]} after error: {error}")
+        return stale
+
+
+class CocClient(CocClientMixin, BaseClient):
+    """
+    Clash of Clans API wrapper
+    """
+
+    def call(
+        self,
+        endpoint: Endpoint,
+        params: Dict[str, str],
+        query: Dict[str, Any] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Request an endpoint. Results of GET requests are served from the cache
+        while they are fresh, and must not be modified. Concurrent identical GET
+        requests are coalesced into a single one.
 
         Args:
-            clan_tag (str): Tag of the clan
+            endpoint (Endpoint): Endpoint to request
+            params (dict): Parameters of the path of the endpoint
+            query (dict, optional): Query parameters of the request. Defaults to None.
+            kwargs: Keyword arguments to be passed to the request
 
         Returns:
-            dict: War information
+            dict: Response json
         """
 
-        url_raw = self.base_url + self.endpoints_dict["get_war"].format(
-            clan_tag=clan_tag
+        params = self.prepare_params(endpoint, params)
+        key = self.cache_key(endpoint, params, query)
+        if key is None:
+            return self.fetch(endpoint, params, key, query, **kwargs)
+
+        self.check_not_found(endpoint, key)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        return self.flights.do(
+            key, lambda: self.fetch(endpoint, params, key, query, **kwargs)
         )
 
-        return self.process_request(url_raw, method=Method.GET)["body"]
-
-    def get_player(self, player_tag) -> Dict[str, Any]:
+    def fetch(
+        self,
+        endpoint: Endpoint,
+        params: Dict[str, str],
+        key: Optional[Hashable],
+        query: Dict[str, Any] = None,
+        **kwargs,
+    ) -> Any:
         """
-        Returns player information
+        Send the request of an endpoint and cache its result. Server and connection
+        errors are retried with backoff and counted by the circuit breaker of the
+        endpoint; while the circuit is open, or when retries are exhausted, a stale
+        cached result is served if there is one.
 
         Args:
-            player_tag (str): Tag of the player
+            endpoint (Endpoint): Endpoint to request
+            params (dict): Parameters of the path of the endpoint
+            key (Hashable, optional): Cache key of the request
+            query (dict, optional): Query parameters of the request. Defaults to None.
+            kwargs: Keyword arguments to be passed to the request
 
         Returns:
-            dict: Player information
+            dict: Response json
+        """
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            return self.fallback(key, CircuitOpen(endpoint.name, breaker.retry_in))
+
+        attempt = 0
+        while True:
+            try:
+                response = self.send_request(
+                    self.url(endpoint, params),
+                    method=endpoint.method,
+                    method_name=endpoint.name,
+                    params=query,
+                    **kwargs,
+                )
+            except self.retryable_errors as error:
+                breaker.record_failure()
+                if (
+                    attempt >= self.retries(endpoint)
+                    or breaker.state is not BreakerState.CLOSED
+                ):
+                    return self.fallback(key, error)
+                logger.warning(f"{endpoint.name} failed, retrying: {error}")
+                time.sleep(self.retry_policy.delay(attempt))
+                attempt += 1
+            except Exception as error:
+                # the API answered, i.e. with a 404
+                breaker.record_success()
+                self.remember_not_found(endpoint, key, error)
+                raise
+            else:
+                breaker.record_success()
+                result = self.decode(endpoint, response)
+                self.cache_response(endpoint, key, response, result)
+                return result
+
+    get_clan = endpoint_method(GET_CLAN)
+    get_war = endpoint_method(GET_WAR)
+    get_player = endpoint_method(GET_PLAYER)
+    get_clan_members = endpoint_method(GET_CLAN_MEMBERS)
+    get_capital_raidseasons = endpoint_method(GET_CAPITAL_RAIDSEASONS)
+    get_war_log = endpoint_method(GET_WAR_LOG)
+    get_league_group = endpoint_method(GET_LEAGUE_GROUP)
+    get_league_war = endpoint_method(GET_LEAGUE_WAR)
+
+    def paginate(
+        self,
+        endpoint: Endpoint,
+        params: Dict[str, str],
+        page_size: int,
+        limit: int = None,
+    ) -> Iterator[Any]:
         """
+        Iterate the items of a paginated endpoint, requesting a page at a time
+
+        Args:
+            endpoint (Endpoint): Paginated endpoint to request
+            params (dict): Parameters of the path of the endpoint
+            page_size (int): Items requested per page
+            limit (int, optional): Maximum number of items. Defaults to None.
 
-        url_raw = self.base_url + self.endpoints_dict["get_player"].format(
-            player_tag=player_tag
+        Returns:
+            Iterator: Items of every page
+        """
+        return iter_items(
+            lambda after: self.call(endpoint, params, page_query(page_size, after)),
+            limit,
         )
 
-        return self.process_request(url_raw, method=Method.GET)["body"]
+    iter_clan_members = page_method(GET_CLAN_MEMBERS)
+    iter_capital_raidseasons = page_method(GET_CAPITAL_RAIDSEASONS)
+    iter_war_log = page_method(GET_WAR_LOG)
+
+    def bulk(
+        self,
+        method: Callable[[str], Any],
+        tags: Iterable[str],
+        concurrency: int = None,
+    ) -> List[BulkResult]:
+        """
+        Look up many tags concurrently, using a thread per simultaneous lookup
+
+        Args:
+            method (Callable): Method looking up a single tag, i.e. self.get_player
+            tags (Iterable[str]): Tags to look up
+            concurrency (int, optional): Maximum number of simultaneous lookups.
+                Defaults to bulk_concurrency.
+
+        Returns:
+            List[BulkResult]: Results in the order of the tags, with the exception
+                of every failed lookup, i.e. PlayerNotFound
+        """
+        return map_bounded(method, tags, concurrency or self.bulk_concurrency)
+
+    def get_players(self, player_tags, concurrency: int = None) -> List[BulkResult]:
+        """
+        Returns the information of many players, see bulk()
+        """
+        return self.bulk(self.get_player, player_tags, concurrency)
+
+    def get_clans(self, clan_tags, concurrency: int = None) -> List[BulkResult]:
+        """
+        Returns the information of many clans, see bulk()
+        """
+        return self.bulk(self.get_clan, clan_tags, concurrency)
 
-    def get_clan_members(self, clan_tag) -> Dict[str, Any]:
+    def get_wars(self, clan_tags, concurrency: int = None) -> List[BulkResult]:
         """
-        Returns clan members information
+        Returns the current war of many clans, see bulk()
+        """
+        return self.bulk(self.get_war, clan_tags, concurrency)
+
+    def get_league_wars(self, clan_tag, concurrency: int = None) -> List[LeagueRound]:
+        """
+        Returns the wars of a clan in every round of its clan war league group.
+        The wars of every round are requested concurrently, see bulk(), and the
+        rounds which were not drawn yet are not requested.
 
         Args:
             clan_tag (str): Tag of the clan
+            concurrency (int, optional): Maximum number of simultaneous requests.
+                Defaults to bulk_concurrency.
+
+        Returns:
+            List[LeagueRound]: War of the clan in every round, with the clan as
+                the "clan" side of the war
+
+        Raises:
+            ClanNotFound: If the clan is not in a clan war league
+        """
+        group = self.get_league_group(clan_tag)
+        wars = self.bulk(self.get_league_war, war_tags(group), concurrency)
+        return league_rounds(group, wars, clan_tag)
+
+    def post_verify_player(self, player_tag, token) -> bool:
+        """
+        Verify player token
+
+        Args:
+            player_tag (str): Tag of the player
+            token (str): Token to verify
 
         Returns:
-            dict: Clan members information
+            bool: Whether the token is valid
         """
 
-        url_raw = self.base_url + self.endpoints_dict["get_clan_members"].format(
-            clan_tag=clan_tag
+        result = self.call(
+            POST_VERIFY_PLAYER, {"player_tag": player_tag}, json={"token": token}
         )
 
-        return self.process_request(url_raw, method=Method.GET)["body"]
+        return result["body"]["status"] == "ok"
+
+
+class AsyncCocClient(CocClientMixin, AsyncBaseClient):
+    """
+    Asynchronous Clash of Clans API wrapper. Exposes the same endpoints and
+    exceptions as CocClient, but every call is awaited on a pooled aiohttp session,
+    so it can be used from discord commands without blocking the event loop.
+    """
 
-    def get_capital_raidseasons(self, clan_tag) -> Dict[str, Any]:
+    flight_class = AsyncSingleFlight
+    retryable_errors = (ServerException, aiohttp.ClientError, asyncio.TimeoutError)
+
+    async def call(
+        self,
+        endpoint: Endpoint,
+        params: Dict[str, str],
+        query: Dict[str, Any] = None,
+        **kwargs,
+    ) -> Any:
         """
-        Returns capital raid seasons information
+        Request an endpoint. Results of GET requests are served from the cache
+        while they are fresh, and must not be modified. Concurrent identical GET
+        requests are coalesced into a single one.
 
         Args:
-            clan_tag (str): Tag of the clan
+            endpoint (Endpoint): Endpoint to request
+            params (dict): Parameters of the path of the endpoint
+            query (dict, optional): Query parameters of the request. Defaults to None.
+            kwargs: Keyword arguments to be passed to the request
 
         Returns:
-            dict: Capital raid seasons information
+            dict: Response json
         """
 
-        url_raw = self.base_url + self.endpoints_dict["get_capital_raidseasons"].format(
-            clan_tag=clan_tag
+        params = self.prepare_params(endpoint, params)
+        key = self.cache_key(endpoint, params, query)
+        if key is None:
+            return await self.fetch(endpoint, params, key, query, **kwargs)
+
+        self.check_not_found(endpoint, key)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        return await self.flights.do(
+            key, lambda: self.fetch(endpoint, params, key, query, **kwargs)
         )
 
-        return self.process_request(url_raw, method=Method.GET)["body"]
+    async def fetch(
+        self,
+        endpoint: Endpoint,
+        params: Dict[str, str],
+        key: Optional[Hashable],
+        query: Dict[str, Any] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Send the request of an endpoint and cache its result. Server and connection
+        errors are retried with backoff and counted by the circuit breaker of the
+        endpoint; while the circuit is open, or when retries are exhausted, a stale
+        cached result is served if there is one.
 
-    def post_verify_player(self, player_tag, token) -> bool:
+        Args:
+            endpoint (Endpoint): Endpoint to request
+            params (dict): Parameters of the path of the endpoint
+            key (Hashable, optional): Cache key of the request
+            query (dict, optional): Query parameters of the request. Defaults to None.
+            kwargs: Keyword arguments to be passed to the request
+
+        Returns:
+            dict: Response json
+        """
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            return self.fallback(key, CircuitOpen(endpoint.name, breaker.retry_in))
+
+        attempt = 0
+        while True:
+            try:
+                response = await self.send_request(
+                    self.url(endpoint, params),
+                    method=endpoint.method,
+                    method_name=endpoint.name,
+                    params=query,
+                    **kwargs,
+                )
+            except self.retryable_errors as error:
+                breaker.record_failure()
+                if (
+                    attempt >= self.retries(endpoint)
+                    or breaker.state is not BreakerState.CLOSED
+                ):
+                    return self.fallback(key, error)
+                logger.warning(f"{endpoint.name} failed, retrying: {error}")
+                await asyncio.sleep(self.retry_policy.delay(attempt))
+                attempt += 1
+            except Exception as error:
+                # the API answered, i.e. with a 404
+                breaker.record_success()
+                self.remember_not_found(endpoint, key, error)
+                raise
+            else:
+                breaker.record_success()
+                result = self.decode(endpoint, response)
+                self.cache_response(endpoint, key, response, result)
+                return result
+
+    get_clan = async_endpoint_method(GET_CLAN)
+    get_war = async_endpoint_method(GET_WAR)
+    get_player = async_endpoint_method(GET_PLAYER)
+    get_clan_members = async_endpoint_method(GET_CLAN_MEMBERS)
+    get_capital_raidseasons = async_endpoint_method(GET_CAPITAL_RAIDSEASONS)
+    get_war_log = async_endpoint_method(GET_WAR_LOG)
+    get_league_group = async_endpoint_method(GET_LEAGUE_GROUP)
+    get_league_war = async_endpoint_method(GET_LEAGUE_WAR)
+
+    def paginate(
+        self,
+        endpoint: Endpoint,
+        params: Dict[str, str],
+        page_size: int,
+        limit: int = None,
+        prefetch: bool = True,
+    ) -> AsyncIterator[Any]:
+        """
+        Asynchronously iterate the items of a paginated endpoint, requesting a
+        page at a time
+
+        Args:
+            endpoint (Endpoint): Paginated endpoint to request
+            params (dict): Parameters of the path of the endpoint
+            page_size (int): Items requested per page
+            limit (int, optional): Maximum number of items. Defaults to None.
+            prefetch (bool, optional): Request the next page while the current one
+                is consumed. Defaults to True.
+
+        Returns:
+            AsyncIterator: Items of every page
+        """
+        return aiter_items(
+            lambda after: self.call(endpoint, params, page_query(page_size, after)),
+            limit,
+            prefetch,
+        )
+
+    iter_clan_members = async_page_method(GET_CLAN_MEMBERS)
+    iter_capital_raidseasons = async_page_method(GET_CAPITAL_RAIDSEASONS)
+    iter_war_log = async_page_method(GET_WAR_LOG)
+
+    async def bulk(
+        self,
+        method: Callable[[str], Any],
+        tags: Iterable[str],
+        concurrency: int = None,
+    ) -> List[BulkResult]:
+        """
+        Look up many tags concurrently
+
+        Args:
+            method (Callable): Coroutine method looking up a single tag,
+                i.e. self.get_player
+            tags (Iterable[str]): Tags to look up
+            concurrency (int, optional): Maximum number of simultaneous lookups.
+                Defaults to bulk_concurrency.
+
+        Returns:
+            List[BulkResult]: Results in the order of the tags, with the exception
+                of every failed lookup, i.e. PlayerNotFound
+        """
+        return await gather_bounded(method, tags, concurrency or self.bulk_concurrency)
+
+    async def get_players(
+        self, player_tags, concurrency: int = None
+    ) -> List[BulkResult]:
+        """
+        Returns the information of many players, see bulk()
+        """
+        return await self.bulk(self.get_player, player_tags, concurrency)
+
+    async def get_clans(self, clan_tags, concurrency: int = None) -> List[BulkResult]:
+        """
+        Returns the information of many clans, see bulk()
+        """
+        return await self.bulk(self.get_clan, clan_tags, concurrency)
+
+    async def get_wars(self, clan_tags, concurrency: int = None) -> List[BulkResult]:
+        """
+        Returns the current war of many clans, see bulk()
+        """
+        return await self.bulk(self.get_war, clan_tags, concurrency)
+
+    async def get_league_wars(
+        self, clan_tag, concurrency: int = None
+    ) -> List[LeagueRound]:
+        """
+        Returns the wars of a clan in every round of its clan war league group.
+        The wars of every round are requested concurrently, see bulk(), and the
+        rounds which were not drawn yet are not requested.
+
+        Args:
+            clan_tag (str): Tag of the clan
+            concurrency (int, optional): Maximum number of simultaneous requests.
+                Defaults to bulk_concurrency.
+
+        Returns:
+            List[LeagueRound]: War of the clan in every round, with the clan as
+                the "clan" side of the war
+
+        Raises:
+            ClanNotFound: If the clan is not in a clan war league
+        """
+        group = await self.get_league_group(clan_tag)
+        wars = await self.bulk(self.get_league_war, war_tags(group), concurrency)
+        return league_rounds(group, wars, clan_tag)
+
+    async def post_verify_player(self, player_tag, token) -> bool:
         """
         Verify player token
 
@@ -182,15 +954,11 @@ class CocClient(BaseClient):
             token (str): Token to verify
 
         Returns:
-            dict: Verify token response
+            bool: Whether the token is valid
         """
 
-        url_raw = self.base_url + self.endpoints_dict["post_verify_player"].format(
-            player_tag=player_tag
-        )
-
-        result = self.process_request(
-            url_raw, method=Method.POST, json={"token": token}
+        result = await self.call(
+            POST_VERIFY_PLAYER, {"player_tag": player_tag}, json={"token": token}
         )
 
         return result["body"]["status"] == "ok"
@@ -0,0 +1,154 @@
+"""
+Clan War League. A league group has up to 7 rounds of 4 wars each, identified by
+war tags, and the rounds which were not drawn yet only have "#0" placeholders.
+Nothing tells which war of a round is the one of a clan, so every war of the
+group is requested (concurrently, by the clients) and the wars of the clan are
+picked out round by round.
+"""
+
+import copy
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .bulk import BulkResult
+from .models import LeagueGroup, War
+from .tags import InvalidTag, normalize_tag
+
+PLACEHOLDER_TAG = "#0"
+
+
+class LeagueRound(NamedTuple):
+    """
+    War of a clan in a round of its league group
+
+    Attributes:
+        number (int): Number of the round, starting at 1
+        war_tag (str, optional): Tag of the war of the clan, None if it is unknown
+        war (Any): War with the clan as its "clan" side, None if it is unknown
+        error (Exception, optional): Error of a war of the round which could be
+            the one of the clan, when the war of the clan was not found
+    """
+
+    number: int
+    war_tag: Optional[str] = None
+    war: Any = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the war of the clan was found
+        """
+        return self.war is not None
+
+
+def round_war_tags(group: Any) -> List[List[str]]:
+    """
+    War tags of every round of a league group, without the placeholders
+
+    Args:
+        group (Any): League group, a dictionary or a LeagueGroup
+
+    Returns:
+        List[List[str]]: War tags by round, empty for the rounds not drawn yet
+    """
+    if isinstance(group, LeagueGroup):
+        rounds = group.rounds
+    else:
+        rounds = [round_.get("warTags", ()) for round_ in group.get("rounds", ())]
+    return [[tag for tag in tags if tag != PLACEHOLDER_TAG] for tags in rounds]
+
+
+def war_tags(group: Any) -> List[str]:
+    """
+    War tags of every round of a league group, without placeholders nor repeats
+    """
+    return list(dict.fromkeys(tag for tags in round_war_tags(group) for tag in tags))
+
+
+def canonical_tag(tag: Optional[str]) -> Optional[str]:
+    """
+    Tag to compare tags of the API with tags typed by users
+    """
+    if tag is None:
+        return None
+    try:
+        return normalize_tag(tag)
+    except InvalidTag:
+        return str(tag).upper()
+
+
+def side_tags(war: Any) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Tags of the clan and the opponent of a war, a dictionary or a War
+    """
+    if isinstance(war, War):
+        return (
+            war.clan.tag if war.clan is not None else None,
+            war.opponent.tag if war.opponent is not None else None,
+        )
+    return (war.get("clan") or {}).get("tag"), (war.get("opponent") or {}).get("tag")
+
+
+def swap_sides(war: Any) -> Any:
+    """
+    Copy of a war with the clan and the opponent swapped
+    """
+    if isinstance(war, War):
+        swapped = copy.copy(war)
+        swapped.clan, swapped.opponent = war.opponent, war.clan
+        return swapped
+    return dict(war, clan=war.get("opponent"), opponent=war.get("clan"))
+
+
+def clan_war(war: Any, clan_tag: str) -> Any:
+    """
+    War seen from a clan. League wars list the two clans in any order.
+
+    Args:
+        war (Any): War of a round
+        clan_tag (str): Tag of the clan
+
+    Returns:
+        Any: The war with the clan as its "clan" side, None if the clan does not
+            take part in it
+    """
+    clan, opponent = (canonical_tag(tag) for tag in side_tags(war))
+    clan_tag = canonical_tag(clan_tag)
+    if clan == clan_tag:
+        return war
+    if opponent == clan_tag:
+        return swap_sides(war)
+    return None
+
+
+def league_rounds(
+    group: Any, wars: Iterable[BulkResult], clan_tag: str
+) -> List[LeagueRound]:
+    """
+    Wars of a clan in every round of its league group
+
+    Args:
+        group (Any): League group of the clan
+        wars (Iterable[BulkResult]): Lookups of the wars of the group by war tag
+        clan_tag (str): Tag of the clan
+
+    Returns:
+        List[LeagueRound]: A LeagueRound per round of the group, in order
+    """
+    results: Dict[str, BulkResult] = {result.tag: result for result in wars}
+    rounds = []
+    for number, tags in enumerate(round_war_tags(group), start=1):
+        league_round = LeagueRound(number)
+        for tag in tags:
+            result = results.get(tag)
+            if result is None:
+                continue
+            if not result.ok:
+                league_round = league_round._replace(error=result.error)
+                continue
+            war = clan_war(result.value, clan_tag)
+            if war is not None:
+                league_round = LeagueRound(number, tag, war)
+                break
+        rounds.append(league_round)
+    return rounds
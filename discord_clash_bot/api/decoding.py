@@ -0,0 +1,35 @@
+"""
+JSON decoding of API responses. ujson is used when it is installed, as it is
+several times faster than the standard library for the large player payloads.
+"""
+
+import json
+from typing import Any, Callable, Union
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+import requests
+
+JsonLoads = Callable[[Union[bytes, str]], Any]
+
+loads: JsonLoads = ujson.loads if ujson is not None else json.loads
+
+
+def decode(response: requests.Response, json_loads: JsonLoads = None) -> Any:
+    """
+    Decode the json body of a response
+
+    Args:
+        response (requests.Response): Response to decode
+        json_loads (Callable, optional): Decoder of the raw body, i.e. loads.
+            Defaults to None, which uses response.json().
+
+    Returns:
+        Any: Decoded body
+    """
+    if json_loads is None:
+        return response.json()
+    return json_loads(response.content)
@@ -0,0 +1,218 @@
+"""
+Declarative description of API endpoints. Client methods are generated from
+the endpoint descriptors, so that every endpoint carries its own error mapping,
+cache policy and pagination settings in a single place.
+"""
+
+from dataclasses import dataclass
+from string import Formatter
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from .base_client import Method
+from .pagination import DEFAULT_PAGE_SIZE
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """
+    Description of an API endpoint
+
+    Attributes:
+        name (str): Name of the client method generated for the endpoint
+        path (str): Path template relative to the base url, i.e. "clans/{clan_tag}"
+        method (Method): HTTP method of the endpoint
+        not_found (Type[Exception], optional): Exception raised when the API
+            answers with a 404
+        cache_ttl (float, optional): Seconds a response may be cached. None defers
+            to the Cache-Control header sent by the server
+        paginated (bool): Whether the endpoint supports limit/after/before cursors
+        model (type, optional): Model of the items of the response body
+        description (str): First line of the docstring of the generated method
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    name: str
+    path: str
+    method: Method = Method.GET
+    not_found: Optional[Type[Exception]] = None
+    cache_ttl: Optional[float] = None
+    paginated: bool = False
+    model: Optional[type] = None
+    description: str = ""
+
+    @property
+    def params(self) -> Tuple[str, ...]:
+        """
+        Names of the parameters of the path template, in order of appearance
+        """
+        return tuple(
+            field for _, field, _, _ in Formatter().parse(self.path) if field
+        )
+
+    def bind(self, *args, **kwargs) -> Dict[str, Any]:
+        """
+        Bind positional and keyword arguments to the path parameters
+
+        Returns:
+            dict: Path parameters by name
+
+        Raises:
+            TypeError: If the arguments do not match the path parameters
+        """
+        if len(args) > len(self.params):
+            raise TypeError(
+                f"{self.name}() takes {len(self.params)} arguments, {len(args)} given"
+            )
+        bound = dict(zip(self.params, args))
+        for key, value in kwargs.items():
+            if key not in self.params or key in bound:
+                raise TypeError(f"{self.name}() got an unexpected argument {key!r}")
+            bound[key] = value
+        missing = [param for param in self.params if param not in bound]
+        if missing:
+            raise TypeError(f"{self.name}() missing arguments: {', '.join(missing)}")
+        return bound
+
+    def format(self, **params) -> str:
+        """
+        Fill the path template with the given parameters
+
+        Returns:
+            str: Path of the request
+        """
+        return self.path.format(**params)
+
+    @property
+    def iterator_name(self) -> str:
+        """
+        Name of the iterator method generated for a paginated endpoint,
+        i.e. iter_clan_members for get_clan_members
+        """
+        return "iter_" + self.name.split("_", 1)[-1]
+
+    @property
+    def docstring(self) -> str:
+        """
+        Docstring of the methods generated for the endpoint
+        """
+        args = "\n".join(
+            f"    {param} (str): Tag of the {param[:-len('_tag')]}"
+            if param.endswith("_tag")
+            else f"    {param} (str): {param}"
+            for param in self.params
+        )
+        returns = self.model.__name__ if self.model is not None else "dict"
+        return (
+            f"{self.description}\n\nArgs:\n{args}\n\n"
+            f"Returns:\n    dict or {returns}: Response body"
+        )
+
+
+def endpoint_method(endpoint: Endpoint) -> Callable:
+    """
+    Generate a client method for an endpoint. The client has to implement
+    call(endpoint, params)
+
+    Args:
+        endpoint (Endpoint): Endpoint to generate the method for
+
+    Returns:
+        Callable: Method returning the body of the response
+    """
+
+    def method(self, *args, **kwargs):
+        return self.call(endpoint, endpoint.bind(*args, **kwargs))["body"]
+
+    method.__name__ = endpoint.name
+    method.__doc__ = endpoint.docstring
+    return method
+
+
+def async_endpoint_method(endpoint: Endpoint) -> Callable:
+    """
+    Generate an asynchronous client method for an endpoint. The client has
+    to implement the coroutine call(endpoint, params)
+
+    Args:
+        endpoint (Endpoint): Endpoint to generate the method for
+
+    Returns:
+        Callable: Coroutine function returning the body of the response
+    """
+
+    async def method(self, *args, **kwargs):
+        result = await self.call(endpoint, endpoint.bind(*args, **kwargs))
+        return result["body"]
+
+    method.__name__ = endpoint.name
+    method.__doc__ = endpoint.docstring
+    return method
+
+
+def page_method(endpoint: Endpoint) -> Callable:
+    """
+    Generate a client method iterating the items of a paginated endpoint. The
+    client has to implement paginate(endpoint, params, page_size, limit)
+
+    Args:
+        endpoint (Endpoint): Paginated endpoint to generate the method for
+
+    Returns:
+        Callable: Method returning an iterator of the items
+    """
+
+    def method(
+        self, *args, page_size: int = DEFAULT_PAGE_SIZE, limit: int = None, **kwargs
+    ):
+        return self.paginate(
+            endpoint, endpoint.bind(*args, **kwargs), page_size=page_size, limit=limit
+        )
+
+    method.__name__ = endpoint.iterator_name
+    method.__doc__ = (
+        f"Iterate the items of {endpoint.name}() page by page\n\n"
+        "Keyword Args:\n    page_size (int): Items requested per page\n"
+        "    limit (int): Maximum number of items"
+    )
+    return method
+
+
+def async_page_method(endpoint: Endpoint) -> Callable:
+    """
+    Generate an asynchronous client method iterating the items of a paginated
+    endpoint. The client has to implement paginate(endpoint, params, page_size,
+    limit, prefetch) returning an asynchronous iterator
+
+    Args:
+        endpoint (Endpoint): Paginated endpoint to generate the method for
+
+    Returns:
+        Callable: Method returning an asynchronous iterator of the items
+    """
+
+    def method(
+        self,
+        *args,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        limit: int = None,
+        prefetch: bool = True,
+        **kwargs,
+    ):
+        return self.paginate(
+            endpoint,
+            endpoint.bind(*args, **kwargs),
+            page_size=page_size,
+            limit=limit,
+            prefetch=prefetch,
+        )
+
+    method.__name__ = endpoint.iterator_name
+    method.__doc__ = (
+        f"Asynchronously iterate the items of {endpoint.name}() page by page, "
+        "requesting the next page ahead\n\n"
+        "Keyword Args:\n    page_size (int): Items requested per page\n"
+        "    limit (int): Maximum number of items\n"
+        "    prefetch (bool): Request the next page while the current one is consumed"
+    )
+    return method
@@ -0,0 +1,152 @@
+"""
+Pool of API keys. Clash of Clans keys are bound to an IP and rate limited one by
+one, so spreading the requests over several keys multiplies the throughput of a
+single process.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from .ratelimit import TokenBucket, get_rate_limiter
+
+ROUND_ROBIN = "round_robin"
+LEAST_LOADED = "least_loaded"
+
+QUARANTINE_STATUS = (403, 429)
+
+
+class KeyUsage:
+    """
+    Usage counters of a key of the pool
+    """
+
+    __slots__ = ("requests", "in_flight", "errors", "quarantines", "quarantined_until")
+
+    def __init__(self):
+        self.requests = 0
+        self.in_flight = 0
+        self.errors = 0
+        self.quarantines = 0
+        self.quarantined_until = 0.0
+
+
+class KeyPool:
+    """
+    Distributes requests over a set of API keys, round robin or to the key with
+    fewer requests in flight. A key answering with 403 or 429 is quarantined for
+    some time; if every key is quarantined the one released first is used.
+    """
+
+    def __init__(
+        self,
+        tokens: Iterable[str],
+        strategy: str = ROUND_ROBIN,
+        quarantine_time: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            tokens (Iterable[str]): API keys of the pool
+            strategy (str, optional): ROUND_ROBIN or LEAST_LOADED. Defaults to
+                ROUND_ROBIN.
+            quarantine_time (float, optional): Seconds a failing key is not used.
+                Defaults to 60.0.
+            clock (Callable, optional): Monotonic clock. Defaults to time.monotonic.
+
+        Raises:
+            ValueError: If there are no keys or the strategy is unknown
+        """
+        self.tokens = list(dict.fromkeys(tokens))
+        if not self.tokens:
+            raise ValueError("A key pool needs at least one key")
+        if strategy not in (ROUND_ROBIN, LEAST_LOADED):
+            raise ValueError(f"Unknown key strategy {strategy}")
+        self.strategy = strategy
+        self.quarantine_time = quarantine_time
+        self.clock = clock
+        self.limiters: Dict[str, TokenBucket] = {
+            token: get_rate_limiter(token) for token in self.tokens
+        }
+        self._usage = {token: KeyUsage() for token in self.tokens}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def acquire(self) -> str:
+        """
+        Choose the key of a request, it must be given back with release()
+
+        Returns:
+            str: API key
+        """
+        with self._lock:
+            now = self.clock()
+            available = [
+                token
+                for token in self.tokens
+                if self._usage[token].quarantined_until <= now
+            ]
+            if not available:
+                token = min(
+                    self.tokens, key=lambda token: self._usage[token].quarantined_until
+                )
+            elif self.strategy == LEAST_LOADED:
+                token = min(available, key=lambda token: self._usage[token].in_flight)
+            else:
+                order = self.tokens[self._next :] + self.tokens[: self._next]
+                token = next(token for token in order if token in available)
+                self._next = (self.tokens.index(token) + 1) % len(self.tokens)
+
+            usage = self._usage[token]
+            usage.requests += 1
+            usage.in_flight += 1
+            return token
+
+    def release(self, token: str, status_code: Optional[int] = None):
+        """
+        Give back a key once its request finished
+
+        Args:
+            token (str): Key returned by acquire()
+            status_code (int, optional): Status of the response, None if the
+                request failed without a response. Defaults to None.
+        """
+        with self._lock:
+            usage = self._usage.get(token)
+            if usage is None:
+                return
+            usage.in_flight = max(usage.in_flight - 1, 0)
+            if status_code is None or status_code >= 400:
+                usage.errors += 1
+            if status_code in QUARANTINE_STATUS:
+                usage.quarantines += 1
+                usage.quarantined_until = self.clock() + self.quarantine_time
+
+    def limiter(self, token: str) -> TokenBucket:
+        """
+        Process wide rate limiter of a key of the pool
+        """
+        return self.limiters[token]
+
+    def usage(self) -> Dict[str, Dict[str, object]]:
+        """
+        Usage of every key, the keys are masked to their last 4 characters
+
+        Returns:
+            dict: requests, requests in flight, errors, quarantines and whether the
+                key is available, by masked key
+        """
+        now = self.clock()
+        return {
+            f"...{token[-4:]}": {
+                "requests": usage.requests,
+                "in_flight": usage.in_flight,
+                "errors": usage.errors,
+                "quarantines": usage.quarantines,
+                "available": usage.quarantined_until <= now,
+            }
+            for token, usage in self._usage.items()
+        }
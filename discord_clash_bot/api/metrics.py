@@ -0,0 +1,185 @@
+"""
+Per endpoint metrics of the HTTP requests of the clients: counts, status code
+classes, bytes received, a fixed bucket latency histogram and the outcome of
+every call, i.e. ok, PlayerNotFound or ServerException. Recording is a couple of
+dictionary updates under a lock, so the metrics can be left on in production.
+"""
+
+import bisect
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    math.inf,
+)
+
+
+def status_class(status_code: Optional[int]) -> str:
+    """
+    Class of a status code, i.e. "2xx"
+
+    Args:
+        status_code (int, optional): Status code, None if there was no response
+
+    Returns:
+        str: Class of the status code, "error" if there was no response
+    """
+    if not isinstance(status_code, int):
+        return "error"
+    return f"{status_code // 100}xx"
+
+
+class EndpointMetrics:
+    """
+    Metrics of a single endpoint
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests = 0
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.latency_counts: List[int] = [0] * len(buckets)
+        self.statuses: Dict[str, int] = {}
+        self.outcomes: Dict[str, int] = {}
+
+    def record_response(self, status_code: Optional[int], size: int, latency: float):
+        """
+        Record an HTTP request
+        """
+        self.requests += 1
+        self.bytes += size
+        self.latency_sum += latency
+        self.latency_counts[bisect.bisect_left(self.buckets, latency)] += 1
+        key = status_class(status_code)
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def record_outcome(self, outcome: str):
+        """
+        Record the outcome of a call
+        """
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def latency_percentile(self, rank: float) -> float:
+        """
+        Upper bound of the bucket of a latency percentile
+
+        Args:
+            rank (float): Percentile, between 0 and 100
+
+        Returns:
+            float: Seconds, 0.0 if nothing was recorded
+        """
+        if not self.requests:
+            return 0.0
+        target = math.ceil(rank / 100 * self.requests)
+        seen = 0
+        for bound, count in zip(self.buckets, self.latency_counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Copy of the metrics
+
+        Returns:
+            dict: requests, bytes, statuses, outcomes and latency with its
+                histogram by bucket upper bound, sum, mean and p50/p95/p99
+        """
+        histogram = {
+            ("+Inf" if math.isinf(bound) else str(bound)): count
+            for bound, count in zip(self.buckets, self.latency_counts)
+        }
+        return {
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "statuses": dict(self.statuses),
+            "outcomes": dict(self.outcomes),
+            "latency": {
+                "histogram": histogram,
+                "sum": self.latency_sum,
+                "mean": self.latency_sum / self.requests if self.requests else 0.0,
+                "p50": self.latency_percentile(50),
+                "p95": self.latency_percentile(95),
+                "p99": self.latency_percentile(99),
+            },
+        }
+
+
+class Metrics:
+    """
+    Metrics of the requests of a client, by endpoint. A Metrics object may be
+    shared between clients to aggregate them.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """
+        Args:
+            buckets (Tuple[float, ...], optional): Sorted upper bounds of the latency
+                buckets in seconds, the last one should be math.inf.
+                Defaults to LATENCY_BUCKETS.
+        """
+        self.buckets = buckets
+        self._endpoints: Dict[str, EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, name: str) -> EndpointMetrics:
+        metrics = self._endpoints.get(name)
+        if metrics is None:
+            metrics = self._endpoints[name] = EndpointMetrics(self.buckets)
+        return metrics
+
+    def record_response(
+        self, name: str, status_code: Optional[int], size: int, latency: float
+    ):
+        """
+        Record an HTTP request of an endpoint
+
+        Args:
+            name (str): Name of the endpoint
+            status_code (int, optional): Status code, None if there was no response
+            size (int): Bytes of the body received
+            latency (float): Seconds the request took
+        """
+        with self._lock:
+            self._endpoint(name).record_response(status_code, size, latency)
+
+    def record_outcome(self, name: str, outcome: str):
+        """
+        Record the outcome of a call to an endpoint
+
+        Args:
+            name (str): Name of the endpoint
+            outcome (str): "ok" or the name of the exception raised
+        """
+        with self._lock:
+            self._endpoint(name).record_outcome(outcome)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Copy of the metrics of every endpoint, see EndpointMetrics.snapshot()
+        """
+        with self._lock:
+            return {name: metrics.snapshot() for name, metrics in self._endpoints.items()}
+
+    def reset(self):
+        """
+        Forget every recorded metric
+        """
+        with self._lock:
+            self._endpoints.clear()
@@ -0,0 +1,558 @@
+"""
+Compact typed models of the Clash of Clans API responses. Every model uses
+__slots__, so thousands of them can be kept in caches with a fraction of the
+memory of the decoded dictionaries, and attributes are accessed directly instead
+of by string keys. Rarely used sub-trees (achievements, war members, raid logs)
+are kept raw and only decoded the first time they are accessed.
+"""
+
+# models mirror the payloads of the API, which have many fields
+# pylint: disable=too-many-instance-attributes,too-many-arguments
+# pylint: disable=too-many-positional-arguments,too-many-locals
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+TIME_FORMAT = "%Y%m%dT%H%M%S.%fZ"
+
+
+def parse_time(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a timestamp of the API, i.e. "20230528T080000.000Z"
+
+    Args:
+        value (str): Timestamp of the API
+
+    Returns:
+        datetime: Timezone aware datetime, None if there is no timestamp
+    """
+    if not value:
+        return None
+    return datetime.strptime(value, TIME_FORMAT).replace(tzinfo=timezone.utc)
+
+
+class Model:
+    """
+    Base of the API models
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Model":
+        """
+        Build the model from a decoded API payload
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{slot}={getattr(self, slot)!r}"
+            for slot in self.__slots__
+            if not slot.startswith("_")
+        )
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot)
+            for slot in self.__slots__
+            if not slot.startswith("_")
+        )
+
+    __hash__ = None
+
+
+class Unit(Model):
+    """
+    Troop, spell or hero of a player
+    """
+
+    __slots__ = ("name", "level", "max_level", "village")
+
+    def __init__(self, name: str, level: int, max_level: int, village: str):
+        self.name = name
+        self.level = level
+        self.max_level = max_level
+        self.village = village
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Unit":
+        return cls(
+            data["name"], data["level"], data.get("maxLevel", 0), data.get("village", "home")
+        )
+
+    @property
+    def is_max(self) -> bool:
+        """
+        Whether the unit is at its maximum level
+        """
+        return self.level >= self.max_level
+
+
+class Achievement(Model):
+    """
+    Achievement of a player
+    """
+
+    __slots__ = ("name", "stars", "value", "target", "village")
+
+    def __init__(self, name: str, stars: int, value: int, target: int, village: str):
+        self.name = name
+        self.stars = stars
+        self.value = value
+        self.target = target
+        self.village = village
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Achievement":
+        return cls(
+            data["name"],
+            data.get("stars", 0),
+            data.get("value", 0),
+            data.get("target", 0),
+            data.get("village", "home"),
+        )
+
+
+class ClanMember(Model):
+    """
+    Member of a clan, as listed by the clan endpoints
+    """
+
+    __slots__ = (
+        "tag",
+        "name",
+        "role",
+        "exp_level",
+        "trophies",
+        "clan_rank",
+        "donations",
+        "donations_received",
+    )
+
+    def __init__(
+        self,
+        tag: str,
+        name: str,
+        role: str,
+        exp_level: int = 0,
+        trophies: int = 0,
+        clan_rank: int = 0,
+        donations: int = 0,
+        donations_received: int = 0,
+    ):
+        self.tag = tag
+        self.name = name
+        self.role = role
+        self.exp_level = exp_level
+        self.trophies = trophies
+        self.clan_rank = clan_rank
+        self.donations = donations
+        self.donations_received = donations_received
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ClanMember":
+        return cls(
+            data["tag"],
+            data["name"],
+            data.get("role", "member"),
+            data.get("expLevel", 0),
+            data.get("trophies", 0),
+            data.get("clanRank", 0),
+            data.get("donations", 0),
+            data.get("donationsReceived", 0),
+        )
+
+
+class Player(Model):
+    """
+    Player profile
+    """
+
+    __slots__ = (
+        "tag",
+        "name",
+        "town_hall_level",
+        "exp_level",
+        "trophies",
+        "war_stars",
+        "role",
+        "war_preference",
+        "clan_tag",
+        "troops",
+        "spells",
+        "heroes",
+        "_achievements",
+    )
+
+    def __init__(
+        self,
+        tag: str,
+        name: str,
+        town_hall_level: int = 0,
+        exp_level: int = 0,
+        trophies: int = 0,
+        war_stars: int = 0,
+        role: Optional[str] = None,
+        war_preference: Optional[str] = None,
+        clan_tag: Optional[str] = None,
+        troops: Tuple[Unit, ...] = (),
+        spells: Tuple[Unit, ...] = (),
+        heroes: Tuple[Unit, ...] = (),
+        achievements: Union[List[Dict[str, Any]], Tuple[Achievement, ...]] = (),
+    ):
+        self.tag = tag
+        self.name = name
+        self.town_hall_level = town_hall_level
+        self.exp_level = exp_level
+        self.trophies = trophies
+        self.war_stars = war_stars
+        self.role = role
+        self.war_preference = war_preference
+        self.clan_tag = clan_tag
+        self.troops = troops
+        self.spells = spells
+        self.heroes = heroes
+        self._achievements = achievements
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Player":
+        return cls(
+            data["tag"],
+            data["name"],
+            data.get("townHallLevel", 0),
+            data.get("expLevel", 0),
+            data.get("trophies", 0),
+            data.get("warStars", 0),
+            data.get("role"),
+            data.get("warPreference"),
+            data.get("clan", {}).get("tag"),
+            tuple(Unit.from_dict(unit) for unit in data.get("troops", ())),
+            tuple(Unit.from_dict(unit) for unit in data.get("spells", ())),
+            tuple(Unit.from_dict(unit) for unit in data.get("heroes", ())),
+            data.get("achievements", ()),
+        )
+
+    @property
+    def achievements(self) -> Tuple[Achievement, ...]:
+        """
+        Achievements of the player, decoded on first access
+        """
+        if not isinstance(self._achievements, tuple):
+            self._achievements = tuple(
+                Achievement.from_dict(achievement) for achievement in self._achievements
+            )
+        return self._achievements
+
+    @property
+    def units(self) -> Tuple[Unit, ...]:
+        """
+        Troops, spells and heroes of the player
+        """
+        return self.troops + self.spells + self.heroes
+
+
+class Clan(Model):
+    """
+    Clan profile
+    """
+
+    __slots__ = (
+        "tag",
+        "name",
+        "level",
+        "points",
+        "members_count",
+        "war_wins",
+        "war_league",
+        "_member_list",
+    )
+
+    def __init__(
+        self,
+        tag: str,
+        name: str,
+        level: int = 0,
+        points: int = 0,
+        members_count: int = 0,
+        war_wins: int = 0,
+        war_league: Optional[str] = None,
+        member_list: Union[List[Dict[str, Any]], Tuple[ClanMember, ...]] = (),
+    ):
+        self.tag = tag
+        self.name = name
+        self.level = level
+        self.points = points
+        self.members_count = members_count
+        self.war_wins = war_wins
+        self.war_league = war_league
+        self._member_list = member_list
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Clan":
+        return cls(
+            data["tag"],
+            data["name"],
+            data.get("clanLevel", 0),
+            data.get("clanPoints", 0),
+            data.get("members", 0),
+            data.get("warWins", 0),
+            data.get("warLeague", {}).get("name"),
+            data.get("memberList", ()),
+        )
+
+    @property
+    def member_list(self) -> Tuple[ClanMember, ...]:
+        """
+        Members of the clan, decoded on first access
+        """
+        if not isinstance(self._member_list, tuple):
+            self._member_list = tuple(
+                ClanMember.from_dict(member) for member in self._member_list
+            )
+        return self._member_list
+
+
+class WarClan(Model):
+    """
+    One of the two sides of a war
+    """
+
+    __slots__ = ("tag", "name", "stars", "destruction", "attacks", "_members")
+
+    def __init__(
+        self,
+        tag: str,
+        name: str,
+        stars: int = 0,
+        destruction: float = 0.0,
+        attacks: int = 0,
+        members: List[Dict[str, Any]] = (),
+    ):
+        self.tag = tag
+        self.name = name
+        self.stars = stars
+        self.destruction = destruction
+        self.attacks = attacks
+        self._members = members
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WarClan":
+        return cls(
+            data.get("tag"),
+            data.get("name"),
+            data.get("stars", 0),
+            data.get("destructionPercentage", 0.0),
+            data.get("attacks", 0),
+            data.get("members", ()),
+        )
+
+    @property
+    def members(self) -> List[Dict[str, Any]]:
+        """
+        Raw members of the side, with their attacks
+        """
+        return self._members
+
+
+class War(Model):
+    """
+    Current war of a clan
+    """
+
+    __slots__ = (
+        "state",
+        "team_size",
+        "preparation_start_time",
+        "start_time",
+        "end_time",
+        "clan",
+        "opponent",
+    )
+
+    def __init__(
+        self,
+        state: str,
+        team_size: int = 0,
+        preparation_start_time: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        clan: Optional[WarClan] = None,
+        opponent: Optional[WarClan] = None,
+    ):
+        self.state = state
+        self.team_size = team_size
+        self.preparation_start_time = preparation_start_time
+        self.start_time = start_time
+        self.end_time = end_time
+        self.clan = clan
+        self.opponent = opponent
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "War":
+        return cls(
+            data.get("state", "notInWar"),
+            data.get("teamSize", 0),
+            data.get("preparationStartTime"),
+            data.get("startTime"),
+            data.get("endTime"),
+            WarClan.from_dict(data["clan"]) if "clan" in data else None,
+            WarClan.from_dict(data["opponent"]) if "opponent" in data else None,
+        )
+
+    @property
+    def ends_at(self) -> Optional[datetime]:
+        """
+        End of the war as a datetime
+        """
+        return parse_time(self.end_time)
+
+
+class WarLogEntry(Model):
+    """
+    Finished war of the war log of a clan
+    """
+
+    __slots__ = ("result", "end_time", "team_size", "attacks_per_member", "clan", "opponent")
+
+    def __init__(
+        self,
+        result: Optional[str],
+        end_time: Optional[str] = None,
+        team_size: int = 0,
+        attacks_per_member: int = 0,
+        clan: Optional[WarClan] = None,
+        opponent: Optional[WarClan] = None,
+    ):
+        self.result = result
+        self.end_time = end_time
+        self.team_size = team_size
+        self.attacks_per_member = attacks_per_member
+        self.clan = clan
+        self.opponent = opponent
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WarLogEntry":
+        return cls(
+            data.get("result"),
+            data.get("endTime"),
+            data.get("teamSize", 0),
+            data.get("attacksPerMember", 0),
+            WarClan.from_dict(data["clan"]) if "clan" in data else None,
+            WarClan.from_dict(data["opponent"]) if "opponent" in data else None,
+        )
+
+    @property
+    def ended_at(self) -> Optional[datetime]:
+        """
+        End of the war as a datetime
+        """
+        return parse_time(self.end_time)
+
+
+class LeagueGroup(Model):
+    """
+    Clan War League group of a clan, with the war tags of every round
+    """
+
+    __slots__ = ("state", "season", "clans", "rounds")
+
+    def __init__(
+        self,
+        state: str,
+        season: Optional[str] = None,
+        clans: List[Dict[str, Any]] = (),
+        rounds: List[List[str]] = (),
+    ):
+        self.state = state
+        self.season = season
+        self.clans = clans
+        self.rounds = rounds
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LeagueGroup":
+        return cls(
+            data.get("state", "notInWar"),
+            data.get("season"),
+            data.get("clans", ()),
+            [list(round_.get("warTags", ())) for round_ in data.get("rounds", ())],
+        )
+
+
+class RaidSeason(Model):
+    """
+    Capital raid season of a clan
+    """
+
+    __slots__ = (
+        "state",
+        "start_time",
+        "end_time",
+        "capital_total_loot",
+        "raids_completed",
+        "total_attacks",
+        "enemy_districts_destroyed",
+        "_members",
+    )
+
+    def __init__(
+        self,
+        state: str,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        capital_total_loot: int = 0,
+        raids_completed: int = 0,
+        total_attacks: int = 0,
+        enemy_districts_destroyed: int = 0,
+        members: List[Dict[str, Any]] = (),
+    ):
+        self.state = state
+        self.start_time = start_time
+        self.end_time = end_time
+        self.capital_total_loot = capital_total_loot
+        self.raids_completed = raids_completed
+        self.total_attacks = total_attacks
+        self.enemy_districts_destroyed = enemy_districts_destroyed
+        self._members = members
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RaidSeason":
+        return cls(
+            data.get("state", "ended"),
+            data.get("startTime"),
+            data.get("endTime"),
+            data.get("capitalTotalLoot", 0),
+            data.get("raidsCompleted", 0),
+            data.get("totalAttacks", 0),
+            data.get("enemyDistrictsDestroyed", 0),
+            data.get("members", ()),
+        )
+
+    @property
+    def members(self) -> List[Dict[str, Any]]:
+        """
+        Raw members of the season, with their attacks and loot
+        """
+        return self._members
+
+
+def parse(model: type, body: Any) -> Any:
+    """
+    Build models out of the body of a response
+
+    Args:
+        model (type): Model of the items of the body
+        body (Any): Decoded body, a single item, a list of items or a page
+            with an "items" list
+
+    Returns:
+        Any: A model or a list of models
+    """
+    if isinstance(body, list):
+        return [model.from_dict(item) for item in body]
+    if isinstance(body, dict) and "items" in body:
+        return [model.from_dict(item) for item in body["items"]]
+    return model.from_dict(body)
@@ -0,0 +1,128 @@
+"""
+Cursor pagination of the list endpoints. Pages are requested with the limit and
+after parameters of the API and their items are streamed one page at a time, so
+long histories (members, raid seasons, war log) are processed with the memory
+of a single page. The asynchronous iterator requests the next page while the
+current one is being consumed.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+DEFAULT_PAGE_SIZE = 50
+
+CURSOR_PARAMS = ("after", "before")
+
+
+def page_query(page_size: int, after: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Query parameters of a page
+
+    Args:
+        page_size (int): Maximum number of items of the page
+        after (str, optional): Cursor of the previous page. Defaults to None.
+
+    Returns:
+        dict: Query parameters of the request
+    """
+    query = {"limit": page_size}
+    if after is not None:
+        query["after"] = after
+    return query
+
+
+def page_items(result: Dict[str, Any]) -> List[Any]:
+    """
+    Items of a page, the body is either a list or a page with an "items" list
+    """
+    body = result["body"]
+    if isinstance(body, dict):
+        return body.get("items", [])
+    return body
+
+
+def next_cursor(result: Dict[str, Any]) -> Optional[str]:
+    """
+    Cursor of the page after the given one
+
+    Returns:
+        str: Cursor, None if it is the last page
+    """
+    paging = result.get("paging")
+    if paging is None and isinstance(result["body"], dict):
+        paging = result["body"].get("paging")
+    return ((paging or {}).get("cursors") or {}).get("after")
+
+
+def iter_items(
+    fetch_page: Callable[[Optional[str]], Dict[str, Any]], limit: int = None
+) -> Iterator[Any]:
+    """
+    Iterate the items of every page
+
+    Args:
+        fetch_page (Callable): Request a page given the cursor of the previous one
+        limit (int, optional): Maximum number of items. Defaults to None.
+
+    Yields:
+        Any: Items, in the order of the pages
+    """
+    count = 0
+    cursor = None
+    while limit is None or count < limit:
+        result = fetch_page(cursor)
+        for item in page_items(result):
+            if limit is not None and count >= limit:
+                return
+            count += 1
+            yield item
+        cursor = next_cursor(result)
+        if cursor is None:
+            return
+
+
+async def aiter_items(
+    fetch_page: Callable[[Optional[str]], Awaitable[Dict[str, Any]]],
+    limit: int = None,
+    prefetch: bool = True,
+) -> AsyncIterator[Any]:
+    """
+    Asynchronously iterate the items of every page, requesting the next page
+    while the items of the current one are consumed
+
+    Args:
+        fetch_page (Callable): Coroutine requesting a page given the cursor of the
+            previous one
+        limit (int, optional): Maximum number of items. Defaults to None.
+        prefetch (bool, optional): Request the next page before the current one is
+            consumed. Defaults to True.
+
+    Yields:
+        Any: Items, in the order of the pages
+    """
+    count = 0
+    pending = asyncio.ensure_future(fetch_page(None))
+    try:
+        while pending is not None:
+            result = await pending
+            pending = None
+            cursor = next_cursor(result)
+            items = page_items(result)
+            last = cursor is None or (limit is not None and count + len(items) >= limit)
+            if not last and prefetch:
+                pending = asyncio.ensure_future(fetch_page(cursor))
+
+            for item in items:
+                if limit is not None and count >= limit:
+                    return
+                count += 1
+                yield item
+
+            if not last and pending is None:
+                pending = asyncio.ensure_future(fetch_page(cursor))
+    finally:
+        # the consumer stopped early, drop the prefetched page
+        if pending is not None:
+            if pending.done() and not pending.cancelled():
+                pending.exception()
+            pending.cancel()
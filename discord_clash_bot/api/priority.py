@@ -0,0 +1,57 @@
+"""
+Priority classes of the API requests. Interactive commands, background polls
+and bulk backfills draw from the same rate limit budget, so every request
+carries the class of the work it is part of and the rate limiter serves the
+classes in order. The class is set for a block of code, not per call, so it
+reaches every request made on its behalf, i.e. by the poller or bulk().
+"""
+
+import contextvars
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Iterator
+
+
+class Priority(IntEnum):
+    """
+    Priority classes of the requests, lower values are served first
+    """
+
+    INTERACTIVE = 0
+    POLLING = 1
+    BULK = 2
+
+
+_priority: contextvars.ContextVar = contextvars.ContextVar(
+    "request_priority", default=Priority.INTERACTIVE
+)
+
+
+def current_priority() -> Priority:
+    """
+    Priority class of the requests of the running code, INTERACTIVE by default
+    """
+    return _priority.get()
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[Priority]:
+    """
+    Make the requests of a block of code, and of the tasks it creates, use a
+    priority class
+
+    Example:
+        with request_priority(Priority.BULK):
+            client.get_players(roster)
+
+    Args:
+        priority (Priority): Priority class of the requests
+
+    Yields:
+        Priority: The priority class
+    """
+    token = _priority.set(Priority(priority))
+    try:
+        yield priority
+    finally:
+        _priority.reset(token)
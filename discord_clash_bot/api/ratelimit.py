@@ -0,0 +1,297 @@
+"""
+Process wide rate limiting of API requests. Every client using the same API key
+draws from the same token bucket, so the request rate of the whole process is
+bounded regardless of how many clients exist. Background requests (polls, bulk
+backfills) yield to interactive ones, see priority.py.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .priority import Priority
+
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 20
+DEFAULT_RETRY_AFTER = 1.0
+DEFAULT_RESERVED = 0.25
+
+
+def parse_retry_after(retry_after: Optional[str]) -> float:
+    """
+    Seconds to wait according to a Retry-After header
+
+    Args:
+        retry_after (str): Value of the Retry-After header
+
+    Returns:
+        float: Seconds to wait, DEFAULT_RETRY_AFTER if the header is missing
+    """
+    try:
+        return max(float(retry_after), 0.0)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter, safe to share between threads and coroutines.
+    An interactive caller reserves a token and then waits until the token is
+    available, so waiting callers are served in order and the lock is never held
+    while sleeping. Background callers only take a token when it can be used
+    right away, leaving a reserved share of the burst to interactive callers, and
+    wait while a caller of a higher priority class is waiting.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        clock: Callable[[], float] = time.monotonic,
+        reserved: float = DEFAULT_RESERVED,
+    ):
+        """
+        Args:
+            rate (float, optional): Tokens added per second. Defaults to DEFAULT_RATE.
+            burst (int, optional): Maximum number of tokens. Defaults to DEFAULT_BURST.
+            clock (Callable, optional): Monotonic clock. Defaults to time.monotonic.
+            reserved (float, optional): Fraction of the burst background requests
+                leave to interactive ones. Defaults to DEFAULT_RESERVED.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.reserved = reserved
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self.acquired = 0
+        self.delayed = 0
+        self.throttled = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.waiting = {priority: 0 for priority in Priority}
+        self.classes = {
+            priority: {
+                "acquired": 0,
+                "delayed": 0,
+                "wait_time": 0.0,
+                "max_wait": 0.0,
+                "max_waiting": 0,
+            }
+            for priority in Priority
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def floor(self) -> float:
+        """
+        Tokens background requests leave in the bucket for interactive ones
+        """
+        return max(min(self.reserved * self.burst, self.burst - 1.0), 0.0)
+
+    def _refill(self, now: float):
+        self.tokens = min(
+            self.tokens + (now - self.updated) * self.rate, float(self.burst)
+        )
+        self.updated = now
+
+    def _count(self, wait: float):
+        self.acquired += 1
+        if wait > 0:
+            self.delayed += 1
+            self.wait_time += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def reserve(self) -> float:
+        """
+        Take a token from the bucket, for an interactive request
+
+        Returns:
+            float: Seconds to wait before the token can be used
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= 1
+            wait = max(-self.tokens / self.rate, self.blocked_until - now, 0.0)
+            self._count(wait)
+            return wait
+
+    def try_reserve(self, priority: Priority) -> float:
+        """
+        Take a token from the bucket for a background request, only if it can be
+        used right away without eating into the reserved share nor passing a
+        waiting request of a higher priority class
+
+        Args:
+            priority (Priority): Priority class of the request
+
+        Returns:
+            float: 0.0 if the token was taken, otherwise seconds to wait before
+                trying again
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            if self.blocked_until > now:
+                return self.blocked_until - now
+            # interactive requests already hold their tokens, even while waiting
+            ahead = sum(
+                count
+                for other, count in self.waiting.items()
+                if Priority.INTERACTIVE < other < priority
+            )
+            missing = self.floor + 1 + ahead - self.tokens
+            if missing > 0:
+                return missing / self.rate
+            self.tokens -= 1
+            return 0.0
+
+    def _enter(self, priority: Priority):
+        with self._lock:
+            self.waiting[priority] += 1
+            stats = self.classes[priority]
+            stats["max_waiting"] = max(stats["max_waiting"], self.waiting[priority])
+
+    def _leave(self, priority: Priority, waited: float, acquired: bool):
+        with self._lock:
+            self.waiting[priority] -= 1
+            if not acquired:
+                return
+            if priority is not Priority.INTERACTIVE:
+                # interactive tokens are counted by reserve()
+                self._count(waited)
+            stats = self.classes[priority]
+            stats["acquired"] += 1
+            if waited > 0:
+                stats["delayed"] += 1
+                stats["wait_time"] += waited
+                stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def acquire(self, priority: Priority = Priority.INTERACTIVE):
+        """
+        Block until a token is available
+
+        Args:
+            priority (Priority, optional): Priority class of the request.
+                Defaults to Priority.INTERACTIVE.
+        """
+        priority = Priority(priority)
+        waited, acquired = 0.0, priority is Priority.INTERACTIVE
+        self._enter(priority)
+        try:
+            if acquired:
+                waited = self.reserve()
+                if waited > 0:
+                    time.sleep(waited)
+            else:
+                wait = self.try_reserve(priority)
+                while wait:
+                    waited += wait
+                    time.sleep(wait)
+                    wait = self.try_reserve(priority)
+                acquired = True
+        finally:
+            self._leave(priority, waited, acquired)
+
+    async def acquire_async(self, priority: Priority = Priority.INTERACTIVE):
+        """
+        Wait until a token is available without blocking the event loop
+
+        Args:
+            priority (Priority, optional): Priority class of the request.
+                Defaults to Priority.INTERACTIVE.
+        """
+        priority = Priority(priority)
+        waited, acquired = 0.0, priority is Priority.INTERACTIVE
+        self._enter(priority)
+        try:
+            if acquired:
+                waited = self.reserve()
+                if waited > 0:
+                    await asyncio.sleep(waited)
+            else:
+                wait = self.try_reserve(priority)
+                while wait:
+                    waited += wait
+                    await asyncio.sleep(wait)
+                    wait = self.try_reserve(priority)
+                acquired = True
+        finally:
+            self._leave(priority, waited, acquired)
+
+    def backoff(self, retry_after: float):
+        """
+        Stop handing out tokens for some time, i.e. after a 429 response
+
+        Args:
+            retry_after (float): Seconds to wait before the next request
+        """
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, self.clock() + retry_after)
+            self.tokens = min(self.tokens, 0.0)
+            self.throttled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counters of the rate limiter
+
+        Returns:
+            dict: tokens acquired, acquisitions which had to wait, total and
+                maximum wait time in seconds, number of 429 backoffs, and the
+                same counters with the current and maximum number of waiting
+                requests by priority class under "priorities"
+        """
+        with self._lock:
+            priorities = {
+                priority.name.lower(): dict(stats, waiting=self.waiting[priority])
+                for priority, stats in self.classes.items()
+            }
+        return {
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "wait_time": self.wait_time,
+            "max_wait": self.max_wait,
+            "throttled": self.throttled,
+            "priorities": priorities,
+        }
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    key: str, rate: float = None, burst: int = None
+) -> TokenBucket:
+    """
+    Get the process wide rate limiter of an API key, creating it if needed
+
+    Args:
+        key (str): API key
+        rate (float, optional): Tokens added per second, updates the limiter if
+            given. Defaults to DEFAULT_RATE for new limiters.
+        burst (int, optional): Maximum number of tokens, updates the limiter if
+            given. Defaults to DEFAULT_BURST for new limiters.
+
+    Returns:
+        TokenBucket: Rate limiter shared by every client using the key
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = TokenBucket(
+                rate if rate is not None else DEFAULT_RATE,
+                burst if burst is not None else DEFAULT_BURST,
+            )
+            _limiters[key] = limiter
+        else:
+            if rate is not None:
+                limiter.rate = rate
+            if burst is not None:
+                limiter.burst = burst
+        return limiter
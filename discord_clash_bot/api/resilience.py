@@ -0,0 +1,179 @@
+"""
+Retries with exponential backoff and circuit breakers, to survive server errors
+and maintenance breaks of the API without hammering it.
+"""
+
+import random
+import threading
+import time
+from enum import Enum
+from typing import Callable, Dict
+
+
+class CircuitOpen(Exception):
+    """
+    Raised when a request is short-circuited because the API is failing
+    """
+
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"Circuit of {name} is open, retry in {retry_in:.1f}s")
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: the n-th retry waits a random time
+    between 0 and min(max_delay, base_delay * 2 ** n) seconds.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        base_delay: float = 0.25,
+        max_delay: float = 10.0,
+        rand: Callable[[], float] = random.random,
+    ):
+        """
+        Args:
+            max_retries (int, optional): Retries after the first attempt. Defaults to 2.
+            base_delay (float, optional): Delay of the first retry. Defaults to 0.25.
+            max_delay (float, optional): Maximum delay of a retry. Defaults to 10.0.
+            rand (Callable, optional): Source of the jitter. Defaults to random.random.
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rand = rand
+
+    def delay(self, attempt: int) -> float:
+        """
+        Seconds to wait before retrying a failed attempt
+
+        Args:
+            attempt (int): Number of the failed attempt, starting at 0
+
+        Returns:
+            float: Seconds to wait
+        """
+        return self.rand() * min(self.max_delay, self.base_delay * 2**attempt)
+
+
+class BreakerState(Enum):
+    """
+    States of a circuit breaker
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of an endpoint. After failure_threshold consecutive failures
+    the circuit opens and calls are short-circuited. Once reset_timeout elapses
+    the circuit is half open: a single probe is let through, closing the circuit
+    if it succeeds or opening it again if it fails.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            failure_threshold (int, optional): Consecutive failures opening the
+                circuit. Defaults to 5.
+            reset_timeout (float, optional): Seconds the circuit stays open before a
+                probe is allowed. Defaults to 30.0.
+            clock (Callable, optional): Monotonic clock. Defaults to time.monotonic.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None
+        self.short_circuited = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> BreakerState:
+        """
+        Current state of the circuit
+        """
+        if self.opened_at is None:
+            return BreakerState.CLOSED
+        if self.clock() - self.opened_at < self.reset_timeout:
+            return BreakerState.OPEN
+        return BreakerState.HALF_OPEN
+
+    @property
+    def retry_in(self) -> float:
+        """
+        Seconds until a probe is allowed, 0 if the circuit is not open
+        """
+        if self.opened_at is None:
+            return 0.0
+        return max(self.opened_at + self.reset_timeout - self.clock(), 0.0)
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may be done, registering it as the probe if the
+        circuit is half open. A probe which never reports back is replaced after
+        reset_timeout.
+
+        Returns:
+            bool: Whether the call may be done
+        """
+        with self._lock:
+            state = self.state
+            if state is BreakerState.CLOSED:
+                return True
+            now = self.clock()
+            if state is BreakerState.HALF_OPEN and (
+                self.probe_started is None
+                or now - self.probe_started >= self.reset_timeout
+            ):
+                self.probe_started = now
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        """
+        Register a successful call, closing the circuit
+        """
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started = None
+
+    def record_failure(self):
+        """
+        Register a failed call, opening the circuit if the threshold is reached
+        or the probe failed
+        """
+        with self._lock:
+            self.failures += 1
+            if self.probe_started is not None or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+                self.probe_started = None
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        State of the circuit for monitoring
+
+        Returns:
+            dict: state, consecutive failures, seconds until a probe is allowed
+                and number of short-circuited calls
+        """
+        return {
+            "state": self.state.value,
+            "failures": self.failures,
+            "retry_in": self.retry_in,
+            "short_circuited": self.short_circuited,
+        }
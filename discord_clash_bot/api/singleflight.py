@@ -0,0 +1,125 @@
+"""
+Coalescing of concurrent identical requests. While a request for a key is in
+flight, every other caller for the same key waits for it and receives its
+result or its exception, instead of sending its own request.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Single flight for threads, used by the synchronous client
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.collapsed = 0
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Call func, unless a call with the same key is in flight, then wait for it
+
+        Args:
+            key (Hashable): Key identifying identical calls
+            func (Callable): Function doing the call
+
+        Returns:
+            Any: Result of the call
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._flights[key] = future
+                self.calls += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+        future.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of the single flight
+
+        Returns:
+            dict: calls sent, calls collapsed into another one and calls in flight
+        """
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._flights),
+        }
+
+
+class AsyncSingleFlight:
+    """
+    Single flight for coroutines, used by the asynchronous client. The call runs
+    in its own task, so cancelling one of the callers does not cancel the call
+    for the others.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.collapsed = 0
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await func, unless a call with the same key is in flight, then wait for it
+
+        Args:
+            key (Hashable): Key identifying identical calls
+            func (Callable): Coroutine function doing the call
+
+        Returns:
+            Any: Result of the call
+        """
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._land(key, done))
+            self.calls += 1
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def _land(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # the exception is retrieved by the callers, if all of them were cancelled
+        # retrieve it here to avoid warnings about unretrieved exceptions
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of the single flight
+
+        Returns:
+            dict: calls sent, calls collapsed into another one and calls in flight
+        """
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._flights),
+        }
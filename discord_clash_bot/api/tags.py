@@ -0,0 +1,70 @@
+"""
+Player, clan and war tags. Tags only use a small alphabet, so mistyped tags can
+be fixed (lower case, O instead of 0) or rejected locally instead of spending a
+request of the API quota to get a 404.
+"""
+
+from urllib.parse import quote
+
+TAG_ALPHABET = frozenset("0289PYLQGRJCUV")
+MIN_TAG_LENGTH = 3
+MAX_TAG_LENGTH = 12
+
+
+class InvalidTag(ValueError):
+    """
+    Raised when a tag can not be a valid tag
+    """
+
+    def __init__(self, tag: str):
+        self.tag = tag
+        super().__init__(f"Invalid tag {tag!r}")
+
+
+def normalize_tag(tag: str) -> str:
+    """
+    Canonical form of a tag: upper case, with 0 instead of O and a leading #
+
+    Args:
+        tag (str): Tag as typed by a user, i.e. "#1dsaSqwr" or "%232PP"
+
+    Returns:
+        str: Canonical tag, i.e. "#2PP"
+
+    Raises:
+        InvalidTag: If the tag has characters out of the alphabet of the tags
+            or an invalid length
+    """
+    body = str(tag).strip().upper().replace("O", "0")
+    if body.startswith("%23"):
+        body = body[len("%23") :]
+    body = body.lstrip("#")
+    if not MIN_TAG_LENGTH <= len(body) <= MAX_TAG_LENGTH or not TAG_ALPHABET.issuperset(
+        body
+    ):
+        raise InvalidTag(tag)
+    return "#" + body
+
+
+def is_valid_tag(tag: str) -> bool:
+    """
+    Whether a tag is valid once normalized
+    """
+    try:
+        normalize_tag(tag)
+    except InvalidTag:
+        return False
+    return True
+
+
+def encode_tag(tag: str) -> str:
+    """
+    Encode a tag to be a segment of a url path, the # would start a fragment
+
+    Args:
+        tag (str): Tag, i.e. "#2PP"
+
+    Returns:
+        str: Encoded tag, i.e. "%232PP"
+    """
+    return quote(str(tag), safe="")
@@ -0,0 +1,155 @@
+"""
+Benchmark of the read latency of an SQLite database while it is ingesting.
+Writer threads keep upserting synthetic players, as the pollers do, while
+reader threads run the lookups of the commands. The default connection and the
+high throughput one, WAL mode and a single writer, are compared.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+
+from discord_clash_bot.db import queries
+from discord_clash_bot.db.db import DBConnection
+from discord_clash_bot.db.schema import Player
+
+from .mock_server import MockApi, MockConfig
+from .runner import BenchResult
+
+# name of the connections by whether they use the high throughput mode
+MODES = {"default": False, "wal": True}
+
+
+def player_payloads(players: int) -> List[Dict[str, Any]]:
+    """
+    Payloads of synthetic players, 50 per clan
+    """
+    api = MockApi(MockConfig(players=players, clans=max(players // 50, 1)))
+    return [api.player(tag) for tag in api.player_tags]
+
+
+def ingest(db: DBConnection, payloads, batch: int, stop: threading.Event, latencies):
+    """
+    Upsert batches of players until stop is set, appending the seconds taken by
+    every batch to latencies
+    """
+    while not stop.is_set():
+        for start in range(0, len(payloads), batch):
+            if stop.is_set():
+                return
+            begin = time.perf_counter()
+            db.upsert_players(payloads[start : start + batch])
+            latencies.append(time.perf_counter() - begin)
+
+
+def read(db: DBConnection, clan_tags: List[str], reads: int, latencies, errors: List[int]):
+    """
+    Look up the members of clans, and their levels of a spell, appending the
+    seconds taken by every lookup to latencies
+    """
+    for index in range(reads):
+        clan_tag = clan_tags[index % len(clan_tags)]
+        begin = time.perf_counter()
+        try:
+            with db.session_scope() as session:
+                session.scalars(queries.clan_members(clan_tag)).all()
+                session.execute(queries.unit_levels("spells", "Rage Spell", clan_tag)).all()
+        except Exception:  # pylint: disable=broad-except
+            errors.append(index)
+        latencies.append(time.perf_counter() - begin)
+
+
+def run_mode(
+    path: str,
+    mode: str,
+    payloads: List[Dict[str, Any]],
+    readers: int,
+    writers: int,
+    reads: int,
+    batch: int,
+) -> List[BenchResult]:
+    """
+    Read and ingest at once on a new database file
+
+    Args:
+        path (str): Path of the database file
+        mode (str): Name of the connection in MODES
+        payloads (List[dict]): Player payloads ingested
+        readers (int): Reader threads
+        writers (int): Writer threads
+        reads (int): Lookups per reader
+        batch (int): Players per upsert
+
+    Returns:
+        List[BenchResult]: Results of the reads and of the writes
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    db = DBConnection(f"sqlite:///{path}", high_throughput=MODES[mode])
+    db.create_all()
+    db.upsert_players(payloads)
+    with db.session_scope() as session:
+        clan_tags = sorted(set(session.scalars(select(Player.clan_tag))))
+
+    stop = threading.Event()
+    read_latencies: List[float] = []
+    write_latencies: List[float] = []
+    errors: List[int] = []
+    ingesters = [
+        threading.Thread(target=ingest, args=(db, payloads, batch, stop, write_latencies))
+        for _ in range(writers)
+    ]
+    lookups = [
+        threading.Thread(target=read, args=(db, clan_tags, reads, read_latencies, errors))
+        for _ in range(readers)
+    ]
+    for thread in ingesters:
+        thread.start()
+    start = time.perf_counter()
+    for thread in lookups:
+        thread.start()
+    for thread in lookups:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in ingesters:
+        thread.join()
+    db.close()
+
+    return [
+        BenchResult(f"reads {mode}", elapsed, read_latencies, len(errors)),
+        BenchResult(f"writes {mode}", elapsed, write_latencies),
+    ]
+
+
+def run_db_benchmark(
+    players: int = 500,
+    readers: int = 4,
+    writers: int = 2,
+    reads: int = 200,
+    batch: int = 50,
+) -> List[BenchResult]:
+    """
+    Benchmark the reads of the default and the high throughput connections
+    under concurrent ingest
+
+    Args:
+        players (int, optional): Synthetic players ingested. Defaults to 500.
+        readers (int, optional): Reader threads. Defaults to 4.
+        writers (int, optional): Writer threads. Defaults to 2.
+        reads (int, optional): Lookups per reader. Defaults to 200.
+        batch (int, optional): Players per upsert. Defaults to 50.
+
+    Returns:
+        List[BenchResult]: Results of the reads and of the writes of every mode
+    """
+    payloads = player_payloads(players)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in MODES:
+            path = os.path.join(directory, f"{mode}.db")
+            results += run_mode(path, mode, payloads, readers, writers, reads, batch)
+    return results
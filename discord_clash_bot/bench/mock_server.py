@@ -0,0 +1,543 @@
+"""
+Offline stand-in of the Clash of Clans API. It serves realistic player, clan,
+war, clan war league, war log and capital raid payloads for thousands of
+synthetic tags, with configurable latency, server errors, 429s and
+Cache-Control headers, so the clients can be measured and tested without the
+real API and its quota.
+"""
+
+import asyncio
+import random
+import socket
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+TAG_CHARACTERS = "0289PYLQGRJCUV"
+
+TROOPS = ("Barbarian", "Archer", "Giant", "Goblin", "Wizard", "Dragon", "P.E.K.K.A")
+SPELLS = ("Lightning Spell", "Healing Spell", "Rage Spell", "Freeze Spell")
+HEROES = ("Barbarian King", "Archer Queen", "Grand Warden", "Royal Champion")
+ROLES = ("member", "admin", "coLeader", "leader")
+LEAGUE_GROUP_SIZE = 8
+
+
+@dataclass
+class MockConfig:
+    """
+    Behavior of the mock API
+
+    Attributes:
+        players (int): Number of synthetic players
+        clans (int): Number of synthetic clans, players are spread over them,
+            0 for players without a clan
+        latency (float): Mean seconds to answer a request
+        jitter (float): Fraction of the latency added or removed at random
+        error_rate (float): Fraction of requests answered with a 503
+        throttle_rate (float): Fraction of requests answered with a 429
+        retry_after (int): Retry-After of the 429 responses, in seconds
+        max_age (int): Max-age of the Cache-Control header, 0 to omit it
+        seed (int): Seed of the random payloads, latencies and errors
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    players: int = 5000
+    clans: int = 100
+    latency: float = 0.0
+    jitter: float = 0.5
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    max_age: int = 60
+    seed: int = 0
+
+
+def synthetic_tag(index: int) -> str:
+    """
+    Valid tag of the synthetic entity with the given index
+
+    Args:
+        index (int): Index of the entity
+
+    Returns:
+        str: Tag, at least 4 characters long
+    """
+    number = index + len(TAG_CHARACTERS) ** 3
+    characters = []
+    while number:
+        number, digit = divmod(number, len(TAG_CHARACTERS))
+        characters.append(TAG_CHARACTERS[digit])
+    return "#" + "".join(reversed(characters))
+
+
+class MockApi:
+    """
+    Payloads of the synthetic players and clans. Payloads are deterministic for
+    a given seed, so repeated requests of a tag get the same answer.
+    """
+
+    def __init__(self, config: MockConfig = None):
+        self.config = config if config is not None else MockConfig()
+        self.player_tags = [synthetic_tag(index) for index in range(self.config.players)]
+        self.clan_tags = [
+            synthetic_tag(self.config.players + index) for index in range(self.config.clans)
+        ]
+        self._players = {tag: index for index, tag in enumerate(self.player_tags)}
+        self._clans = {tag: index for index, tag in enumerate(self.clan_tags)}
+        self._league_wars: Dict[str, tuple] = {}
+        self._league_rounds: Dict[str, List[List[str]]] = {}
+        self._draw_leagues()
+
+    def _draw_leagues(self):
+        """
+        Split the clans into league groups and draw a round robin of wars in
+        every group
+        """
+        first_tag = self.config.players + self.config.clans
+        for start in range(0, len(self.clan_tags), LEAGUE_GROUP_SIZE):
+            clans = self.clan_tags[start : start + LEAGUE_GROUP_SIZE]
+            if len(clans) % 2:
+                clans = clans + [None]
+            rounds = []
+            for _ in range(len(clans) - 1):
+                tags = []
+                for index in range(len(clans) // 2):
+                    pair = (clans[index], clans[-1 - index])
+                    if None in pair:
+                        continue
+                    tag = synthetic_tag(first_tag + len(self._league_wars))
+                    self._league_wars[tag] = pair
+                    tags.append(tag)
+                rounds.append(tags)
+                # rotate every clan but the first one
+                clans = [clans[0], clans[-1]] + clans[1:-1]
+            for clan in clans:
+                if clan is not None:
+                    self._league_rounds[clan] = rounds
+
+    def _random(self, tag: str) -> random.Random:
+        return random.Random(f"{self.config.seed}{tag}")
+
+    def clan_of(self, player_tag: str) -> Optional[str]:
+        """
+        Tag of the clan of a player
+        """
+        if not self.clan_tags:
+            return None
+        return self.clan_tags[self._players[player_tag] % len(self.clan_tags)]
+
+    def members_of(self, clan_tag: str) -> List[str]:
+        """
+        Tags of the members of a clan, at most 50
+        """
+        return self.player_tags[self._clans[clan_tag] :: len(self.clan_tags)][:50]
+
+    def player(self, tag: str) -> Optional[Dict[str, Any]]:
+        """
+        Player payload, None if the tag does not exist
+        """
+        if tag not in self._players:
+            return None
+        rng = self._random(tag)
+        town_hall = rng.randint(7, 15)
+
+        def units(names, village="home"):
+            return [
+                {
+                    "name": name,
+                    "level": rng.randint(1, town_hall),
+                    "maxLevel": town_hall,
+                    "village": village,
+                }
+                for name in names
+            ]
+
+        clan_tag = self.clan_of(tag)
+        payload = {
+            "tag": tag,
+            "name": f"player{self._players[tag]}",
+            "townHallLevel": town_hall,
+            "expLevel": rng.randint(50, 250),
+            "trophies": rng.randint(1000, 5500),
+            "warStars": rng.randint(0, 2000),
+            "role": rng.choice(ROLES),
+            "warPreference": rng.choice(("in", "out")),
+            "achievements": [
+                {"name": f"Achievement {index}", "stars": rng.randint(0, 3), "value": 0}
+                for index in range(40)
+            ],
+            "troops": units(TROOPS),
+            "spells": units(SPELLS),
+            "heroes": units(HEROES),
+        }
+        # players without a clan have no clan field, like in the API
+        if clan_tag is not None:
+            payload["clan"] = {"tag": clan_tag, "name": f"clan{self._clans[clan_tag]}"}
+        return payload
+
+    def member(self, tag: str, rank: int) -> Dict[str, Any]:
+        """
+        Clan member payload of a player
+        """
+        player = self.player(tag)
+        return {
+            "tag": tag,
+            "name": player["name"],
+            "role": player["role"],
+            "expLevel": player["expLevel"],
+            "trophies": player["trophies"],
+            "clanRank": rank,
+            "donations": self._random(tag).randint(0, 3000),
+            "donationsReceived": self._random(tag).randint(0, 3000),
+        }
+
+    def members(self, clan_tag: str) -> List[Dict[str, Any]]:
+        """
+        Members payloads of a clan
+        """
+        return [
+            self.member(tag, rank)
+            for rank, tag in enumerate(self.members_of(clan_tag), start=1)
+        ]
+
+    def clan(self, tag: str) -> Optional[Dict[str, Any]]:
+        """
+        Clan payload, None if the tag does not exist
+        """
+        if tag not in self._clans:
+            return None
+        rng = self._random(tag)
+        members = self.members(tag)
+        return {
+            "tag": tag,
+            "name": f"clan{self._clans[tag]}",
+            "clanLevel": rng.randint(1, 30),
+            "clanPoints": rng.randint(10000, 60000),
+            "members": len(members),
+            "warWins": rng.randint(0, 1000),
+            "warLeague": {"name": "Master League I"},
+            "memberList": members,
+        }
+
+    def war_clan(self, tag: str, rng: random.Random) -> Dict[str, Any]:
+        """
+        One side of a war
+        """
+        members = []
+        for position, member in enumerate(self.members_of(tag)[:15], start=1):
+            attacks = [
+                {
+                    "attackerTag": member,
+                    "defenderTag": synthetic_tag(rng.randint(0, 10**6)),
+                    "stars": rng.randint(0, 3),
+                    "destructionPercentage": rng.randint(0, 100),
+                    "order": rng.randint(1, 30),
+                }
+                for _ in range(rng.randint(0, 2))
+            ]
+            members.append(
+                {"tag": member, "name": member, "mapPosition": position, "attacks": attacks}
+            )
+        return {
+            "tag": tag,
+            "name": f"clan{self._clans[tag]}",
+            "stars": sum(attack["stars"] for member in members for attack in member["attacks"]),
+            "destructionPercentage": rng.uniform(0, 100),
+            "attacks": sum(len(member["attacks"]) for member in members),
+            "members": members,
+        }
+
+    def war(self, tag: str) -> Optional[Dict[str, Any]]:
+        """
+        Current war payload of a clan, None if the tag does not exist
+        """
+        if tag not in self._clans:
+            return None
+        rng = self._random(tag)
+        opponent = self.clan_tags[(self._clans[tag] + 1) % len(self.clan_tags)]
+        return {
+            "state": rng.choice(("preparation", "inWar", "warEnded")),
+            "teamSize": 15,
+            "preparationStartTime": "20230527T080000.000Z",
+            "startTime": "20230528T080000.000Z",
+            "endTime": "20230529T080000.000Z",
+            "clan": self.war_clan(tag, rng),
+            "opponent": self.war_clan(opponent, rng),
+        }
+
+    def league_group(self, tag: str) -> Optional[Dict[str, Any]]:
+        """
+        Clan war league group of a clan, None if the tag does not exist
+        """
+        rounds = self._league_rounds.get(tag)
+        if rounds is None:
+            return None
+        clans = sorted({clan for tags in rounds for war in tags for clan in self._league_wars[war]})
+        return {
+            "state": "inWar",
+            "season": "2023-05",
+            "clans": [
+                {"tag": clan, "name": f"clan{self._clans[clan]}", "clanLevel": 10}
+                for clan in clans
+            ],
+            "rounds": [{"warTags": tags} for tags in rounds],
+        }
+
+    def league_war(self, war_tag: str) -> Optional[Dict[str, Any]]:
+        """
+        Clan war league war, None if the war tag does not exist
+        """
+        pair = self._league_wars.get(war_tag)
+        if pair is None:
+            return None
+        rng = self._random(war_tag)
+        return {
+            "state": rng.choice(("preparation", "inWar", "warEnded")),
+            "teamSize": 15,
+            "preparationStartTime": "20230527T080000.000Z",
+            "startTime": "20230528T080000.000Z",
+            "endTime": "20230529T080000.000Z",
+            "warStartTime": "20230528T080000.000Z",
+            "clan": self.war_clan(pair[0], rng),
+            "opponent": self.war_clan(pair[1], rng),
+        }
+
+    def war_log(self, tag: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        War log entries of a clan, None if the tag does not exist
+        """
+        if tag not in self._clans:
+            return None
+        rng = self._random(tag)
+        return [
+            {
+                "result": rng.choice(("win", "lose", "tie")),
+                "endTime": f"2023{month:02d}{day:02d}T080000.000Z",
+                "teamSize": 15,
+                "attacksPerMember": 2,
+                "clan": {"tag": tag, "stars": rng.randint(0, 45)},
+                "opponent": {"tag": synthetic_tag(rng.randint(0, 10**6))},
+            }
+            for month in range(12, 0, -1)
+            for day in (25, 18, 11, 4)
+        ]
+
+    def raid_seasons(self, tag: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Capital raid seasons of a clan, None if the tag does not exist
+        """
+        if tag not in self._clans:
+            return None
+        rng = self._random(tag)
+        return [
+            {
+                "state": "ended",
+                "startTime": f"2023{month:02d}{day:02d}T070000.000Z",
+                "endTime": f"2023{month:02d}{day + 3:02d}T070000.000Z",
+                "capitalTotalLoot": rng.randint(100000, 400000),
+                "raidsCompleted": rng.randint(1, 6),
+                "totalAttacks": rng.randint(50, 150),
+                "enemyDistrictsDestroyed": rng.randint(10, 40),
+                "members": [
+                    {
+                        "tag": member,
+                        "attacks": rng.randint(1, 6),
+                        "capitalResourcesLooted": rng.randint(1000, 30000),
+                    }
+                    for member in self.members_of(tag)
+                ],
+            }
+            for month in range(12, 0, -1)
+            for day in (22, 15, 8, 1)
+        ]
+
+
+def paginate(request: web.Request, items: List[Any]) -> Dict[str, Any]:
+    """
+    Page of items selected by the limit and after parameters of a request
+    """
+    start = int(request.query.get("after", 0))
+    limit = int(request.query.get("limit", len(items) or 1))
+    end = start + limit
+    cursors = {"after": str(end)} if end < len(items) else {}
+    if start:
+        cursors["before"] = str(start)
+    return {"items": items[start:end], "paging": {"cursors": cursors}}
+
+
+def make_app(api: MockApi = None) -> web.Application:
+    """
+    Build the aiohttp application of the mock API, served under /v1/
+
+    Args:
+        api (MockApi, optional): Payloads to serve. Defaults to MockApi().
+
+    Returns:
+        web.Application: Application, its "stats" item counts the requests
+            by status code
+    """
+    api = api if api is not None else MockApi()
+    config = api.config
+    rng = random.Random(config.seed)
+    stats: Dict[int, int] = {}
+
+    @web.middleware
+    async def chaos(request: web.Request, handler) -> web.Response:
+        if config.latency:
+            await asyncio.sleep(
+                config.latency * rng.uniform(1 - config.jitter, 1 + config.jitter)
+            )
+        draw = rng.random()
+        if draw < config.throttle_rate:
+            response = web.json_response(
+                {"reason": "requestThrottled"},
+                status=429,
+                headers={"Retry-After": str(config.retry_after)},
+            )
+        elif draw < config.throttle_rate + config.error_rate:
+            response = web.json_response({"reason": "inMaintenance"}, status=503)
+        else:
+            response = await handler(request)
+            if config.max_age and response.status == 200:
+                response.headers["Cache-Control"] = f"max-age={config.max_age}"
+        stats[response.status] = stats.get(response.status, 0) + 1
+        return response
+
+    def serve(payload: Any) -> web.Response:
+        if payload is None:
+            return web.json_response({"reason": "notFound"}, status=404)
+        return web.json_response({"body": payload})
+
+    async def player(request: web.Request) -> web.Response:
+        return serve(api.player(request.match_info["tag"]))
+
+    async def verify_token(request: web.Request) -> web.Response:
+        if api.player(request.match_info["tag"]) is None:
+            return serve(None)
+        payload = await request.json()
+        status = "ok" if payload.get("token") == "valid-token" else "invalid"
+        return serve({"tag": request.match_info["tag"], "status": status})
+
+    async def clan(request: web.Request) -> web.Response:
+        return serve(api.clan(request.match_info["tag"]))
+
+    async def members(request: web.Request) -> web.Response:
+        tag = request.match_info["tag"]
+        if tag not in api.clan_tags:
+            return serve(None)
+        return serve(paginate(request, api.members(tag)))
+
+    async def war(request: web.Request) -> web.Response:
+        return serve(api.war(request.match_info["tag"]))
+
+    async def league_group(request: web.Request) -> web.Response:
+        return serve(api.league_group(request.match_info["tag"]))
+
+    async def league_war(request: web.Request) -> web.Response:
+        return serve(api.league_war(request.match_info["tag"]))
+
+    async def war_log(request: web.Request) -> web.Response:
+        entries = api.war_log(request.match_info["tag"])
+        return serve(paginate(request, entries) if entries is not None else None)
+
+    async def raid_seasons(request: web.Request) -> web.Response:
+        seasons = api.raid_seasons(request.match_info["tag"])
+        return serve(paginate(request, seasons) if seasons is not None else None)
+
+    app = web.Application(middlewares=[chaos])
+    app["api"] = api
+    app["stats"] = stats
+    app.router.add_get("/v1/players/{tag}", player)
+    app.router.add_post("/v1/players/{tag}/verifytoken", verify_token)
+    app.router.add_get("/v1/clans/{tag}", clan)
+    app.router.add_get("/v1/clans/{tag}/members", members)
+    app.router.add_get("/v1/clans/{tag}/currentwar", war)
+    app.router.add_get("/v1/clans/{tag}/currentwar/leaguegroup", league_group)
+    app.router.add_get("/v1/clanwarleagues/wars/{tag}", league_war)
+    app.router.add_get("/v1/clans/{tag}/warlog", war_log)
+    app.router.add_get("/v1/clans/{tag}/capitalraidseasons", raid_seasons)
+    return app
+
+
+class MockServer:
+    """
+    Mock API served from a background thread with its own event loop, so it
+    can be used by the synchronous and the asynchronous clients alike.
+
+    Example:
+        with MockServer(MockConfig(latency=0.01)) as server:
+            client = CocClient(token="test")
+            client.base_url = server.url
+    """
+
+    def __init__(self, config: MockConfig = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            config (MockConfig, optional): Behavior of the API. Defaults to MockConfig().
+            host (str, optional): Host to listen on. Defaults to "127.0.0.1".
+            port (int, optional): Port to listen on, 0 picks a free one. Defaults to 0.
+        """
+        self.api = MockApi(config)
+        self.app = make_app(self.api)
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base url of the API, to be used as the base_url of a client
+        """
+        return f"http://{self.host}:{self.port}/v1/"
+
+    @property
+    def stats(self) -> Dict[int, int]:
+        """
+        Number of responses by status code
+        """
+        return dict(self.app["stats"])
+
+    def start(self) -> str:
+        """
+        Start serving in a background thread
+
+        Returns:
+            str: Base url of the API
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+
+        self._loop = asyncio.new_event_loop()
+        self._runner = web.AppRunner(self.app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        self._loop.run_until_complete(web.SockSite(self._runner, sock).start())
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="mock-coc-api", daemon=True
+        )
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """
+        Stop serving and release the port
+        """
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
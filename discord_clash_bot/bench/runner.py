@@ -0,0 +1,254 @@
+"""
+Load benchmark of the Clash of Clans clients against the mock API. Every client
+looks up the same players with the same concurrency, and the throughput and the
+latency percentiles of the lookups are reported.
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+from discord_clash_bot.api.coc import AsyncCocClient, CocClient
+from discord_clash_bot.api.ratelimit import TokenBucket
+from discord_clash_bot.api.resilience import RetryPolicy
+
+from .mock_server import MockConfig, MockServer
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """
+    Nearest rank percentile
+
+    Args:
+        values (List[float]): Sorted values
+        rank (float): Percentile, between 0 and 100
+
+    Returns:
+        float: Percentile of the values, 0.0 if there are none
+    """
+    if not values:
+        return 0.0
+    index = max(math.ceil(rank / 100 * len(values)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+@dataclass
+class BenchResult:
+    """
+    Result of benchmarking a client
+
+    Attributes:
+        name (str): Name of the client
+        elapsed (float): Wall time of the whole run, in seconds
+        latencies (List[float]): Seconds taken by every lookup
+        errors (int): Number of failed lookups
+    """
+
+    name: str
+    elapsed: float
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def requests(self) -> int:
+        """
+        Number of lookups
+        """
+        return len(self.latencies)
+
+    @property
+    def rps(self) -> float:
+        """
+        Lookups per second
+        """
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Throughput and latency percentiles, in milliseconds
+
+        Returns:
+            dict: name, requests, errors, rps, p50, p95 and p99
+        """
+        latencies = sorted(self.latencies)
+        summary = {
+            "name": self.name,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rps": round(self.rps, 1),
+        }
+        for rank in PERCENTILES:
+            summary[f"p{rank}"] = round(percentile(latencies, rank) * 1000, 2)
+        return summary
+
+
+def client_options(cached: bool, rate: float = None) -> Dict[str, Any]:
+    """
+    Options of the benchmarked clients
+
+    Args:
+        cached (bool): Whether the response cache is used
+        rate (float, optional): Requests per second of the rate limiter, None
+            for no limiter. Defaults to None.
+
+    Returns:
+        dict: Keyword arguments of the clients
+    """
+    return {
+        "token": "bench-token",
+        "rate_limiter": TokenBucket(rate, burst=rate) if rate else None,
+        "retry_policy": RetryPolicy(max_retries=0),
+        "cache_ttl": None if cached else {"get_player": 0},
+    }
+
+
+def timed(func: Callable, latencies: List[float]) -> Callable:
+    """
+    Wrap a lookup so the seconds it takes are appended to latencies
+    """
+
+    def lookup(tag):
+        start = time.perf_counter()
+        try:
+            return func(tag)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    return lookup
+
+
+def atimed(func: Callable, latencies: List[float]) -> Callable:
+    """
+    Wrap an asynchronous lookup so the seconds it takes are appended to latencies
+    """
+
+    async def lookup(tag):
+        start = time.perf_counter()
+        try:
+            return await func(tag)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    return lookup
+
+
+def run_sync(
+    base_url: str,
+    tags: List[str],
+    concurrency: int = 10,
+    cached: bool = False,
+    rate: float = None,
+) -> BenchResult:
+    """
+    Look up players with the synchronous client
+
+    Args:
+        base_url (str): Base url of the API
+        tags (List[str]): Tags of the players to look up
+        concurrency (int, optional): Simultaneous lookups. Defaults to 10.
+        cached (bool, optional): Use the response cache. Defaults to False.
+        rate (float, optional): Requests per second of the rate limiter, None for
+            no limiter. Defaults to None.
+
+    Returns:
+        BenchResult: Result of the run
+    """
+    latencies: List[float] = []
+    with CocClient(pool_maxsize=concurrency, **client_options(cached, rate)) as client:
+        client.base_url = base_url
+        start = time.perf_counter()
+        results = client.bulk(timed(client.get_player, latencies), tags, concurrency)
+        elapsed = time.perf_counter() - start
+    errors = sum(not result.ok for result in results)
+    return BenchResult("CocClient", elapsed, latencies, errors)
+
+
+async def run_async(
+    base_url: str,
+    tags: List[str],
+    concurrency: int = 10,
+    cached: bool = False,
+    rate: float = None,
+) -> BenchResult:
+    """
+    Look up players with the asynchronous client, see run_sync()
+    """
+    latencies: List[float] = []
+    async with AsyncCocClient(limit=concurrency, **client_options(cached, rate)) as client:
+        client.base_url = base_url
+        start = time.perf_counter()
+        results = await client.bulk(atimed(client.get_player, latencies), tags, concurrency)
+        elapsed = time.perf_counter() - start
+    errors = sum(not result.ok for result in results)
+    return BenchResult("AsyncCocClient", elapsed, latencies, errors)
+
+
+def lookup_tags(player_tags: List[str], requests: int, hot: int) -> List[str]:
+    """
+    Tags looked up by a benchmark, cycling over a hot set of players so the
+    lookups repeat tags like the polls of the bot do
+
+    Args:
+        player_tags (List[str]): Tags of the players of the API
+        requests (int): Number of lookups
+        hot (int): Number of distinct players looked up
+
+    Returns:
+        List[str]: Tag of every lookup
+    """
+    hot_tags = player_tags[: max(hot, 1)]
+    return [hot_tags[index % len(hot_tags)] for index in range(requests)]
+
+
+def run_benchmark(
+    requests: int = 1000,
+    concurrency: int = 10,
+    config: MockConfig = None,
+    cached: bool = False,
+    rate: float = None,
+    hot: int = 100,
+) -> List[BenchResult]:
+    """
+    Benchmark the synchronous and asynchronous clients against a mock API
+
+    Args:
+        requests (int, optional): Lookups per client. Defaults to 1000.
+        concurrency (int, optional): Simultaneous lookups. Defaults to 10.
+        config (MockConfig, optional): Behavior of the mock API. Defaults to
+            MockConfig().
+        cached (bool, optional): Use the response cache. Defaults to False.
+        rate (float, optional): Requests per second of the rate limiter, None for
+            no limiter. Defaults to None.
+        hot (int, optional): Distinct players looked up, so cached runs hit the
+            cache. Defaults to 100.
+
+    Returns:
+        List[BenchResult]: Result of every client
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    with MockServer(config) as server:
+        tags = lookup_tags(server.api.player_tags, requests, hot)
+        return [
+            run_sync(server.url, tags, concurrency, cached, rate),
+            asyncio.run(run_async(server.url, tags, concurrency, cached, rate)),
+        ]
+
+
+def format_report(results: List[BenchResult]) -> str:
+    """
+    Table of the results of a benchmark
+
+    Returns:
+        str: One line per client with the throughput and latency percentiles
+    """
+    columns = ("name", "requests", "errors", "rps")
+    columns += tuple(f"p{rank}" for rank in PERCENTILES)
+    lines = ["  ".join(f"{column:>14}" for column in columns)]
+    for result in results:
+        summary = result.summary()
+        lines.append("  ".join(f"{summary[column]!s:>14}" for column in columns))
+    return "\n".join(lines)
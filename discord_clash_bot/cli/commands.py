@@ -69,3 +69,46 @@ def restart():
     """
     stop()
     run()
+
+@cli.command()
+@click.option("--requests", default=1000, help="Lookups per client")
+@click.option("--concurrency", default=10, help="Simultaneous lookups")
+@click.option("--latency", default=0.01, help="Mean latency of the mock API, in seconds")
+@click.option("--error-rate", default=0.0, help="Fraction of 503 responses")
+@click.option("--throttle-rate", default=0.0, help="Fraction of 429 responses")
+@click.option("--max-age", default=60, help="Cache-Control max-age of the responses")
+@click.option("--cached", is_flag=True, help="Use the response cache")
+@click.option("--rate", default=None, type=float, help="Rate limit, requests per second")
+@click.option("--hot", default=100, help="Distinct players looked up")
+def bench(requests, concurrency, latency, error_rate, throttle_rate, max_age, cached, rate, hot):
+    """
+    Benchmark the API clients against an offline mock of the API
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    from discord_clash_bot.bench.mock_server import MockConfig
+    from discord_clash_bot.bench.runner import format_report, run_benchmark
+
+    config = MockConfig(
+        latency=latency,
+        error_rate=error_rate,
+        throttle_rate=throttle_rate,
+        max_age=max_age,
+    )
+    results = run_benchmark(requests, concurrency, config, cached=cached, rate=rate, hot=hot)
+    click.echo(format_report(results))
+
+@cli.command("bench-db")
+@click.option("--players", default=500, help="Synthetic players ingested")
+@click.option("--readers", default=4, help="Reader threads")
+@click.option("--writers", default=2, help="Writer threads")
+@click.option("--reads", default=200, help="Lookups per reader")
+@click.option("--batch", default=50, help="Players per upsert")
+def bench_db(players, readers, writers, reads, batch):
+    """
+    Benchmark the read latency of SQLite under concurrent ingest, with the
+    default and the high throughput connections
+    """
+    from discord_clash_bot.bench.database import run_db_benchmark
+    from discord_clash_bot.bench.runner import format_report
+
+    click.echo(format_report(run_db_benchmark(players, readers, writers, reads, batch)))
@@ -5,7 +5,6 @@ Cogs for admin commands and events
 
 from discord.ext import commands
 from discord.member import Member
-from discord_clash_bot.api.coc import CocClient
 from discord_clash_bot.utils.logging import get_logger
 
 # false positive from pylint
@@ -26,7 +25,7 @@ class AdminCog(BaseCog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.coc_client = CocClient()
+        self.coc_client = bot.coc_client
 
     def cog_check(self, ctx: commands.Context) -> bool:
         """
@@ -4,8 +4,6 @@ Cog for leader and coleader commands and events
 
 from discord.ext import commands
 
-from discord_clash_bot.api.coc import CocClient
-
 # false positive from pylint
 # pylint: disable=relative-beyond-top-level
 from .base_cog import BaseCog
@@ -22,7 +20,7 @@ class ColeaderCog(BaseCog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.coc_client = CocClient()
+        self.coc_client = bot.coc_client
 
     def cog_before_invoke(self, ctx: commands.Context):
         """
@@ -7,7 +7,6 @@ membership using the !setup command.
 
 import discord
 from discord.ext import commands
-from discord_clash_bot.api.coc import CocClient
 from discord_clash_bot.utils.config import PROJECT_DIR, SECRETS
 from discord_clash_bot.utils.logging import get_logger
 
@@ -18,8 +17,6 @@ from .base_cog import BaseCog
 
 logger = get_logger(__name__)
 
-coc = CocClient(SECRETS["coc"]["token"])
-
 
 class DMCog(BaseCog):
     """
@@ -27,6 +24,10 @@ class DMCog(BaseCog):
     a person gets when joins the server.
     """
 
+    def __init__(self, bot):
+        self.bot = bot
+        self.coc_client = bot.coc_client
+
     # when a new person joins the server, give them the default role
     @commands.Cog.listener()
     async def on_member_join(self, member):
@@ -87,12 +88,11 @@ class DMCog(BaseCog):
         Makes sure that the user exist in the clan and that the token is valid
         """
 
-        members = coc.get_clan_members(SECRETS["coc"]["clan_tag"])
+        members = await self.coc_client.get_clan_members(SECRETS["coc"]["clan_tag"])
 
         for member in members:
             if member["name"] == nickname:
-                response = coc.post_verify_player(member["tag"], token)
-                if response["status"] == "valid":
+                if await self.coc_client.post_verify_player(member["tag"], token):
                     # add the member to the clan
                     role = member["role"]
                     if role == "admin":
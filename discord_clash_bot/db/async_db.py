@@ -0,0 +1,311 @@
+"""
+Asynchronous database connection, so the cogs can use the database without
+blocking the event loop. Every operation runs in its own session, which is
+closed when the operation ends.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from . import queries
+from .db import database_options
+from .history import SECONDS_PER_DAY, timestamp, write_history
+from .ingest import UNIT_COLUMNS, write_clans, write_players, write_units
+from .levels import LevelMatrix, write_levels
+from .migrate import migrate
+from .schema import Base, Clan, Player
+from .sqlite import apply_pragmas
+from .writer import WriteQueue
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(db_url: str) -> str:
+    """
+    Url of a database with an asynchronous driver, i.e. sqlite+aiosqlite for
+    sqlite, so the same url can configure both connections
+    """
+    url = make_url(db_url)
+    driver = ASYNC_DRIVERS.get(url.drivername)
+    if driver is None:
+        return db_url
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def sync_url(db_url: str) -> str:
+    """
+    Url of a database with its synchronous driver, the inverse of async_url()
+    """
+    url = make_url(db_url)
+    drivers = {driver: name for name, driver in ASYNC_DRIVERS.items()}
+    driver = drivers.get(url.drivername)
+    if driver is None:
+        return db_url
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+class AsyncDBConnection():
+    """
+    Asynchronous database connection class
+    """
+
+    # pylint: disable=too-many-public-methods
+
+    def __init__(
+        self,
+        db_url="sqlite+aiosqlite:///clash.db",
+        *,
+        expire_on_commit=False,
+        high_throughput=False,
+        **engine_options,
+    ):
+        """
+        Args:
+            db_url (str, optional): Url of the database, a synchronous driver is
+                replaced by its asynchronous one.
+                Defaults to "sqlite+aiosqlite:///clash.db".
+            expire_on_commit (bool, optional): Whether the objects of a session are
+                expired after a commit. Defaults to False, as objects are returned
+                after their session is closed and can not be reloaded.
+            high_throughput (bool, optional): Run an SQLite database file in WAL
+                mode, see DBConnection; the upserts are run by a synchronous
+                writer thread and awaited. Defaults to False.
+            engine_options: Options of the engine, i.e. pool_size, max_overflow,
+                pool_timeout, pool_recycle or pool_pre_ping
+        """
+        if "pool_size" in engine_options or "max_overflow" in engine_options:
+            # aiosqlite opens a connection per checkout by default
+            engine_options.setdefault("poolclass", AsyncAdaptedQueuePool)
+        self.engine = create_async_engine(async_url(db_url), **engine_options)
+        self.writer = None
+        if high_throughput:
+            apply_pragmas(self.engine.sync_engine)
+            self.writer = WriteQueue(apply_pragmas(create_engine(sync_url(db_url))))
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=expire_on_commit)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Connection configured by the [database] section of secrets.toml
+        """
+        return cls(**database_options(config))
+
+    @asynccontextmanager
+    async def session_scope(self, expire_on_commit=None) -> AsyncIterator[AsyncSession]:
+        """
+        Session of a unit of work spanning several operations: it is committed
+        when the block ends, rolled back if the block raises, and closed in any case
+
+        Args:
+            expire_on_commit (bool, optional): Overrides the expire_on_commit of
+                the connection. Defaults to None.
+
+        Yields:
+            AsyncSession: New session
+        """
+        options = {} if expire_on_commit is None else {"expire_on_commit": expire_on_commit}
+        async with self.sessionmaker(**options) as session:
+            async with session.begin():
+                yield session
+
+    async def close(self):
+        """
+        Close the writer, once its queued writes are committed, and the
+        connections of the engine
+        """
+        if self.writer is not None:
+            await asyncio.to_thread(self.writer.close)
+            self.writer.engine.dispose()
+        await self.engine.dispose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def migrate(self) -> List[str]:
+        """
+        Migrate the tables of a database created by an older schema, see migrate.py
+
+        Returns:
+            List[str]: Names of the rebuilt tables
+        """
+        async with self.engine.begin() as connection:
+            return await connection.run_sync(migrate)
+
+    async def create_all(self):
+        """
+        Migrate the existing tables and create the missing ones
+        """
+        async with self.engine.begin() as connection:
+            await connection.run_sync(migrate)
+            await connection.run_sync(Base.metadata.create_all)
+
+    async def drop_all(self):
+        """
+        Drop all tables
+        """
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+
+    async def add(self, obj):
+        """
+        Add an object, or a list of objects, in a unit of work
+        """
+        async with self.session_scope() as session:
+            if isinstance(obj, list):
+                session.add_all(obj)
+            else:
+                session.add(obj)
+
+    async def _write(self, write, *args) -> int:
+        """
+        Run a write of ingest.py in a single transaction, or in a group commit
+        of the writer
+        """
+        if self.writer is not None:
+            return await asyncio.wrap_future(self.writer.submit(write, *args))
+        async with self.engine.begin() as connection:
+            return await connection.run_sync(write, *args)
+
+    async def upsert_clans(self, payloads) -> int:
+        """
+        Insert or update clans from clan payloads, see DBConnection.upsert_clans
+        """
+        return await self._write(write_clans, payloads)
+
+    async def upsert_players(self, payloads, units=True, clan_tag=None) -> int:
+        """
+        Insert or update players from player payloads, or from clan member
+        payloads of the clan with clan_tag, see DBConnection.upsert_players
+        """
+        return await self._write(write_players, payloads, units, clan_tag)
+
+    async def upsert_troops(self, payloads) -> int:
+        """
+        Insert or update the troops of players from their player payloads
+        """
+        return await self._write(write_units, "troops", payloads)
+
+    async def upsert_spells(self, payloads) -> int:
+        """
+        Insert or update the spells of players from their player payloads
+        """
+        return await self._write(write_units, "spells", payloads)
+
+    async def upsert_heroes(self, payloads) -> int:
+        """
+        Insert or update the heroes of players from their player payloads
+        """
+        return await self._write(write_units, "heroes", payloads)
+
+    async def record_history(self, payloads, taken_at=None) -> int:
+        """
+        Add a snapshot of the units of players to their progress history, see
+        history.write_history
+        """
+        return await self._write(write_history, payloads, taken_at)
+
+    async def upsert_levels(self, payloads) -> int:
+        """
+        Insert or update the packed levels of players from their player payloads,
+        see levels.py
+        """
+        return await self._write(write_levels, payloads)
+
+    async def get_clan(self, tag: str) -> Optional[Clan]:
+        """
+        Clan with a tag, None if it is not stored
+        """
+        async with self.sessionmaker() as session:
+            return await session.scalar(queries.clan(tag))
+
+    async def get_player(self, tag: str) -> Optional[Player]:
+        """
+        Player with a tag, None if it is not stored
+        """
+        async with self.sessionmaker() as session:
+            return await session.scalar(queries.player(tag))
+
+    async def get_clan_members(self, clan_tag: str) -> List[Player]:
+        """
+        Players of a clan, by name
+        """
+        async with self.sessionmaker() as session:
+            return list(await session.scalars(queries.clan_members(clan_tag)))
+
+    async def get_units(self, member_tag: str) -> Dict[str, List[Any]]:
+        """
+        Troops, spells and heroes of a player
+
+        Returns:
+            dict: Units of the player by kind, "troops", "spells" and "heroes"
+        """
+        async with self.sessionmaker() as session:
+            return {
+                kind: list(await session.scalars(queries.units(kind, member_tag)))
+                for kind in UNIT_COLUMNS
+            }
+
+    async def get_unit_levels(
+        self, kind: str, name: str, clan_tag: Optional[str] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Levels of a unit of every player, or of the players of a clan
+
+        Args:
+            kind (str): "troops", "spells" or "heroes"
+            name (str): Name of the unit, i.e. "Lightning Spell"
+            clan_tag (str, optional): Tag of the clan of the players. Defaults to None.
+
+        Returns:
+            List[Tuple[str, int]]: (member_tag, level), highest level first
+        """
+        async with self.sessionmaker() as session:
+            result = await session.execute(queries.unit_levels(kind, name, clan_tag))
+            return [tuple(row) for row in result]
+
+    async def get_levels_at(
+        self, kind: str, name: str, when, clan_tag: Optional[str] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Levels of a unit of every player, or of the players of a clan, at a
+        moment (seconds since the epoch or a datetime) of the history
+
+        Returns:
+            List[Tuple[str, int]]: (member_tag, level), highest level first
+        """
+        statement = queries.levels_at(kind, name, timestamp(when), clan_tag)
+        async with self.sessionmaker() as session:
+            return [tuple(row) for row in await session.execute(statement)]
+
+    async def get_upgrades(self, clan_tag: str, days: float = 7, now=None) -> List[tuple]:
+        """
+        Upgrades of the units of the players of a clan in the last days
+
+        Returns:
+            List[tuple]: (member_tag, kind, name, previous, level, taken_at),
+                latest first
+        """
+        since = timestamp(now) - days * SECONDS_PER_DAY
+        async with self.sessionmaker() as session:
+            return [tuple(row) for row in await session.execute(queries.upgrades(clan_tag, since))]
+
+    async def get_levels(self, clan_tag: Optional[str] = None) -> LevelMatrix:
+        """
+        Packed levels of every player, or of the players of a clan, as a matrix
+
+        Returns:
+            LevelMatrix: A row per player and a column per unit of the catalogue
+        """
+        async with self.sessionmaker() as session:
+            units = [tuple(row) for row in await session.execute(queries.catalogue())]
+            rows = await session.execute(queries.member_levels(clan_tag))
+            return LevelMatrix.from_rows(units, rows)
@@ -2,23 +2,141 @@
 Database connection, creation, and management.
 """
 
+from contextlib import contextmanager
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+from . import queries
+from .history import SECONDS_PER_DAY, timestamp, write_history
+from .ingest import UNIT_COLUMNS, write_clans, write_players, write_units
+from .levels import LevelMatrix, write_levels
+from .migrate import migrate
 from .schema import Base
+from .sqlite import apply_pragmas
+from .writer import WriteQueue
+
+# options of the [database] section of secrets.toml passed to the engine
+ENGINE_OPTIONS = (
+    "pool_size",
+    "max_overflow",
+    "pool_timeout",
+    "pool_recycle",
+    "pool_pre_ping",
+    "echo",
+)
+
+
+def database_options(config):
+    """
+    Arguments of DBConnection and AsyncDBConnection from the [database] section
+    of secrets.toml: url, expire_on_commit, high_throughput and the pool settings
+    of the engine
+    """
+    options = {key: config[key] for key in ENGINE_OPTIONS if key in config}
+    if "url" in config:
+        options["db_url"] = config["url"]
+    for key in ("expire_on_commit", "high_throughput"):
+        if key in config:
+            options[key] = config[key]
+    return options
+
 
 class DBConnection():
     """
-    Database connection class
+    Database connection class. Work is done in short lived sessions taken from
+    session_scope(), one per unit of work. The session attribute is a session
+    per thread, by default, for code which needs one longer.
     """
 
-    def __init__(self, db_url="sqlite:///clash.db"):
-        self.engine = create_engine(db_url)
-        self.session = sessionmaker(bind=self.engine)()
+    # pylint: disable=too-many-public-methods
+
+    def __init__(
+        self,
+        db_url="sqlite:///clash.db",
+        *,
+        expire_on_commit=True,
+        scopefunc=None,
+        high_throughput=False,
+        **engine_options,
+    ):
+        """
+        Args:
+            db_url (str, optional): Url of the database. Defaults to "sqlite:///clash.db".
+            expire_on_commit (bool, optional): Whether the objects of a session are
+                expired, and reloaded when accessed, after a commit. Defaults to True.
+            scopefunc (Callable, optional): Key of the scope of the session
+                attribute, i.e. the current asyncio task; call session.remove() at
+                the end of every scope. Defaults to None, a session per thread.
+            high_throughput (bool, optional): Run an SQLite database file in WAL
+                mode with the pragmas of sqlite.py, and run the upserts in group
+                commits of a single background writer. Defaults to False.
+            engine_options: Options of the engine, i.e. pool_size, max_overflow,
+                pool_timeout, pool_recycle or pool_pre_ping
+        """
+        self.engine = create_engine(db_url, **engine_options)
+        self.writer = None
+        if high_throughput:
+            apply_pragmas(self.engine)
+            self.writer = WriteQueue(self.engine)
+        self.sessionmaker = sessionmaker(bind=self.engine, expire_on_commit=expire_on_commit)
+        self.session = scoped_session(self.sessionmaker, scopefunc=scopefunc)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Connection configured by the [database] section of secrets.toml
+        """
+        return cls(**database_options(config))
+
+    @contextmanager
+    def session_scope(self, expire_on_commit=None):
+        """
+        Session of a unit of work: it is committed when the block ends, rolled
+        back if the block raises, and closed in any case
+
+        Args:
+            expire_on_commit (bool, optional): Overrides the expire_on_commit of
+                the connection. Defaults to None.
+
+        Yields:
+            Session: New session
+        """
+        options = {} if expire_on_commit is None else {"expire_on_commit": expire_on_commit}
+        session = self.sessionmaker(**options)
+        try:
+            yield session
+            session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def close(self):
+        """
+        Close the session of the current scope, the writer, once its queued writes
+        are committed, and the connections of the pool
+        """
+        if self.writer is not None:
+            self.writer.close()
+        self.session.remove()
+        self.engine.dispose()
+
+    def migrate(self):
+        """
+        Migrate the tables of a database created by an older schema, see migrate.py
+
+        Returns:
+            List[str]: Names of the rebuilt tables
+        """
+        with self.engine.begin() as connection:
+            return migrate(connection)
 
     def create_all(self):
         """
-        Create all tables
+        Migrate the existing tables and create the missing ones
         """
+        self.migrate()
         Base.metadata.create_all(self.engine)
 
     def drop_all(self):
@@ -29,10 +147,181 @@ class DBConnection():
 
     def add(self, obj):
         """
-        Add an object to the session
+        Add an object, or a list of objects, in a unit of work. The objects keep
+        their attributes once it is closed.
+        """
+        with self.session_scope(expire_on_commit=False) as session:
+            if isinstance(obj, list):
+                session.add_all(obj)
+            else:
+                session.add(obj)
+
+    def _write(self, write):
+        """
+        Run a function with a connection in a single transaction, or in a group
+        commit of the writer, then expire the session of the current scope, if it
+        has one, so it does not serve stale objects
         """
-        if isinstance(obj, list):
-            self.session.add_all(obj)
+        if self.writer is not None:
+            count = self.writer.submit(write).result()
         else:
-            self.session.add(obj)
-        self.session.commit()
+            with self.engine.begin() as connection:
+                count = write(connection)
+        # a session is not created in scopes which do not use one
+        if self.session.registry.has():
+            self.session.expire_all()
+        return count
+
+    def upsert_clans(self, payloads):
+        """
+        Insert or update clans from clan payloads (a dict or a list of them)
+
+        Returns:
+            int: Number of clans written
+        """
+        return self._write(lambda connection: write_clans(connection, payloads))
+
+    def upsert_players(self, payloads, units=True, clan_tag=None):
+        """
+        Insert or update players from player payloads, with their clans and, if
+        units is True, their troops, spells and heroes, in a single transaction.
+        Clan member payloads are upserted with the clan_tag of their clan, see
+        ingest.write_players.
+
+        Returns:
+            int: Number of players written
+        """
+        return self._write(
+            lambda connection: write_players(connection, payloads, units, clan_tag)
+        )
+
+    def upsert_troops(self, payloads):
+        """
+        Insert or update the troops of players from their player payloads
+
+        Returns:
+            int: Number of troops written
+        """
+        return self._write(lambda connection: write_units(connection, "troops", payloads))
+
+    def upsert_spells(self, payloads):
+        """
+        Insert or update the spells of players from their player payloads
+
+        Returns:
+            int: Number of spells written
+        """
+        return self._write(lambda connection: write_units(connection, "spells", payloads))
+
+    def upsert_heroes(self, payloads):
+        """
+        Insert or update the heroes of players from their player payloads
+
+        Returns:
+            int: Number of heroes written
+        """
+        return self._write(lambda connection: write_units(connection, "heroes", payloads))
+
+    def record_history(self, payloads, taken_at=None):
+        """
+        Add a snapshot of the units of players to their progress history, see
+        history.write_history
+
+        Returns:
+            int: Number of levels which changed
+        """
+        return self._write(lambda connection: write_history(connection, payloads, taken_at))
+
+    def get_clan(self, tag):
+        """
+        Clan with a tag, None if it is not stored
+        """
+        with self.session_scope(expire_on_commit=False) as session:
+            return session.scalar(queries.clan(tag))
+
+    def get_player(self, tag):
+        """
+        Player with a tag, None if it is not stored
+        """
+        with self.session_scope(expire_on_commit=False) as session:
+            return session.scalar(queries.player(tag))
+
+    def get_clan_members(self, clan_tag):
+        """
+        Players of a clan, by name
+        """
+        with self.session_scope(expire_on_commit=False) as session:
+            return list(session.scalars(queries.clan_members(clan_tag)))
+
+    def get_units(self, member_tag):
+        """
+        Troops, spells and heroes of a player
+
+        Returns:
+            dict: Units of the player by kind, "troops", "spells" and "heroes"
+        """
+        with self.session_scope(expire_on_commit=False) as session:
+            return {
+                kind: list(session.scalars(queries.units(kind, member_tag)))
+                for kind in UNIT_COLUMNS
+            }
+
+    def get_unit_levels(self, kind, name, clan_tag=None):
+        """
+        Levels of a unit of every player, or of the players of a clan
+
+        Args:
+            kind (str): "troops", "spells" or "heroes"
+            name (str): Name of the unit, i.e. "Lightning Spell"
+            clan_tag (str, optional): Tag of the clan of the players. Defaults to None.
+
+        Returns:
+            List[Tuple[str, int]]: (member_tag, level), highest level first
+        """
+        with self.session_scope() as session:
+            return [tuple(row) for row in session.execute(queries.unit_levels(kind, name, clan_tag))]
+
+    def get_levels_at(self, kind, name, when, clan_tag=None):
+        """
+        Levels of a unit of every player, or of the players of a clan, at a
+        moment (seconds since the epoch or a datetime) of the history
+
+        Returns:
+            List[Tuple[str, int]]: (member_tag, level), highest level first
+        """
+        statement = queries.levels_at(kind, name, timestamp(when), clan_tag)
+        with self.session_scope() as session:
+            return [tuple(row) for row in session.execute(statement)]
+
+    def get_upgrades(self, clan_tag, days=7, now=None):
+        """
+        Upgrades of the units of the players of a clan in the last days
+
+        Returns:
+            List[tuple]: (member_tag, kind, name, previous, level, taken_at),
+                latest first
+        """
+        since = timestamp(now) - days * SECONDS_PER_DAY
+        with self.session_scope() as session:
+            return [tuple(row) for row in session.execute(queries.upgrades(clan_tag, since))]
+
+    def upsert_levels(self, payloads):
+        """
+        Insert or update the packed levels of players from their player payloads,
+        see levels.py
+
+        Returns:
+            int: Number of players written
+        """
+        return self._write(lambda connection: write_levels(connection, payloads))
+
+    def get_levels(self, clan_tag=None):
+        """
+        Packed levels of every player, or of the players of a clan, as a matrix
+
+        Returns:
+            LevelMatrix: A row per player and a column per unit of the catalogue
+        """
+        with self.session_scope() as session:
+            units = [tuple(row) for row in session.execute(queries.catalogue())]
+            return LevelMatrix.from_rows(units, session.execute(queries.member_levels(clan_tag)))
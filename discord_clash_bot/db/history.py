@@ -0,0 +1,161 @@
+"""
+Progress history of the members. Every sync of a player adds a snapshot, but
+only the unit levels which changed since the previous snapshot are stored, so
+a year of syncs several times a day costs about one row per upgrade.
+"""
+
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.engine import Connection
+
+from .ingest import DEFAULT_VILLAGE, UNIT_COLUMNS, as_list, insert, upsert
+from .schema import Snapshot, Unit, UnitChange
+
+# tags per IN clause, below the variable limit of old SQLite versions
+CHUNK_SIZE = 500
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+UnitKey = Tuple[str, str, str]
+
+
+def timestamp(moment: Union[None, int, float, datetime] = None) -> int:
+    """
+    Seconds since the epoch of a moment, the current one if it is None
+    """
+    if moment is None:
+        return int(time.time())
+    if isinstance(moment, datetime):
+        return int(moment.timestamp())
+    return int(moment)
+
+
+def unit_key(kind: str, unit: Dict[str, Any]) -> UnitKey:
+    """
+    Key of a unit of a player payload in the catalogue: kind, name and village
+    """
+    return kind, unit["name"], unit.get("village") or DEFAULT_VILLAGE
+
+
+def unit_ids(connection: Connection, keys: Iterable[UnitKey]) -> Dict[UnitKey, int]:
+    """
+    Ids of units in the catalogue, adding the units it does not have yet
+
+    Returns:
+        dict: Id by key of every unit of the catalogue
+    """
+    rows = [{"kind": kind, "name": name, "village": village} for kind, name, village in keys]
+    if rows:
+        statement = insert(connection, Unit.__table__)
+        connection.execute(
+            statement.on_conflict_do_nothing(index_elements=["kind", "name", "village"]), rows
+        )
+    result = connection.execute(select(Unit.kind, Unit.name, Unit.village, Unit.id))
+    return {(kind, name, village): unit_id for kind, name, village, unit_id in result}
+
+
+def latest_levels(
+    connection: Connection, member_tags: List[str], before: int
+) -> Dict[Tuple[str, int], int]:
+    """
+    Last level of every unit of some members before a moment
+
+    Returns:
+        dict: Level by member_tag and unit id
+    """
+    levels = {}
+    for start in range(0, len(member_tags), CHUNK_SIZE):
+        chunk = member_tags[start : start + CHUNK_SIZE]
+        latest = (
+            select(
+                UnitChange.member_tag,
+                UnitChange.unit_id,
+                func.max(UnitChange.taken_at).label("taken_at"),
+            )
+            .where(UnitChange.member_tag.in_(chunk), UnitChange.taken_at < before)
+            .group_by(UnitChange.member_tag, UnitChange.unit_id)
+            .subquery()
+        )
+        statement = select(UnitChange.member_tag, UnitChange.unit_id, UnitChange.level).join(
+            latest,
+            and_(
+                UnitChange.member_tag == latest.c.member_tag,
+                UnitChange.unit_id == latest.c.unit_id,
+                UnitChange.taken_at == latest.c.taken_at,
+            ),
+        )
+        for member_tag, unit_id, level in connection.execute(statement):
+            levels[member_tag, unit_id] = level
+    return levels
+
+
+def write_history(
+    connection: Connection,
+    payloads: Any,
+    taken_at: Union[None, int, float, datetime] = None,
+) -> int:
+    """
+    Add a snapshot of the units of players, storing the levels which changed
+    since their previous snapshot. Snapshots are expected in time order; writing
+    a snapshot again, with the same taken_at, is a no-op.
+
+    Args:
+        connection (Connection): Connection, in a transaction
+        payloads (Any): Player payloads, a dict or a list of them
+        taken_at (int | float | datetime, optional): Moment of the sync, in
+            seconds since the epoch. Defaults to None, now.
+
+    Returns:
+        int: Number of levels which changed
+    """
+    payloads = [
+        payload
+        for payload in as_list(payloads)
+        if any(kind in payload for kind in UNIT_COLUMNS)
+    ]
+    if not payloads:
+        return 0
+    taken_at = timestamp(taken_at)
+    ids = unit_ids(
+        connection,
+        {
+            unit_key(kind, unit)
+            for payload in payloads
+            for kind in UNIT_COLUMNS
+            for unit in payload.get(kind, ())
+        },
+    )
+    member_tags = list(dict.fromkeys(payload["tag"] for payload in payloads))
+    previous = latest_levels(connection, member_tags, taken_at)
+
+    # changed levels by unit id of every member
+    changes: Dict[str, Dict[int, Dict[str, Any]]] = {tag: {} for tag in member_tags}
+    for payload in payloads:
+        for kind in UNIT_COLUMNS:
+            for unit in payload.get(kind, ()):
+                key = (payload["tag"], ids[unit_key(kind, unit)])
+                level = unit.get("level")
+                if key in previous and previous[key] == level:
+                    continue
+                changes[payload["tag"]][key[1]] = {
+                    "member_tag": key[0],
+                    "unit_id": key[1],
+                    "taken_at": taken_at,
+                    "level": level,
+                    "previous": previous.get(key),
+                }
+    rows = [row for member_changes in changes.values() for row in member_changes.values()]
+    upsert(
+        connection,
+        Snapshot.__table__,
+        [
+            {"member_tag": tag, "taken_at": taken_at, "changes": len(member_changes)}
+            for tag, member_changes in changes.items()
+        ],
+        ["member_tag", "taken_at"],
+    )
+    upsert(connection, UnitChange.__table__, rows, ["member_tag", "unit_id", "taken_at"])
+    return len(rows)
@@ -0,0 +1,214 @@
+"""
+Set based ingestion of API payloads. Payloads are turned into plain rows and
+written with a few INSERT ... ON CONFLICT statements per batch, instead of an
+ORM object and a flush per row.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import Table, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from .schema import Clan, Heroe, Player, Spell, Troop
+
+# column holding the name of the unit by list of the player payload
+UNIT_COLUMNS = {"troops": "troop", "spells": "spell", "heroes": "hero"}
+UNIT_TABLES = {"troops": Troop, "spells": Spell, "heroes": Heroe}
+# village of the units of payloads without one, a NULL would never match the
+# unique key of the unit tables
+DEFAULT_VILLAGE = "home"
+
+
+def as_list(payloads: Any) -> List[Dict[str, Any]]:
+    """
+    A single payload or a list of payloads as a list
+    """
+    if payloads is None:
+        return []
+    if isinstance(payloads, dict):
+        return [payloads]
+    return list(payloads)
+
+
+def clan_row(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Row of the clan table of a clan payload
+    """
+    return {"tag": payload["tag"], "name": payload.get("name")}
+
+
+def player_row(payload: Dict[str, Any], clan_tag: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Row of the member table of a player payload, or of a clan member payload
+    of the clan with clan_tag
+    """
+    role = payload.get("role")
+    return {
+        "tag": payload["tag"],
+        "name": payload.get("name"),
+        "clan_tag": clan_tag or (payload.get("clan") or {}).get("tag"),
+        "role": role.replace("admin", "elder") if role else role,
+        "war_preference": payload.get("warPreference"),
+    }
+
+
+def unit_rows(payload: Dict[str, Any], kind: str) -> List[Dict[str, Any]]:
+    """
+    Rows of a unit table of a player payload
+
+    Args:
+        payload (dict): Player payload
+        kind (str): List of the payload, "troops", "spells" or "heroes"
+
+    Returns:
+        List[dict]: A row per unit
+    """
+    column = UNIT_COLUMNS[kind]
+    return [
+        {
+            "member_tag": payload["tag"],
+            column: unit["name"],
+            "level": unit.get("level"),
+            "village": unit.get("village") or DEFAULT_VILLAGE,
+        }
+        for unit in payload.get(kind, ())
+    ]
+
+
+def unique_rows(rows: Iterable[Dict[str, Any]], keys: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Rows without repeated keys, the last row of a key wins. A statement can not
+    upsert the same row twice.
+    """
+    return list({tuple(row[key] for key in keys): row for row in rows}.values())
+
+
+def insert(connection: Connection, table: Table):
+    """
+    INSERT statement of the dialect of a connection, which supports ON CONFLICT
+
+    Raises:
+        ValueError: If the dialect has no ON CONFLICT clause
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    raise ValueError(f"Upserts are not supported on {dialect}")
+
+
+def upsert(
+    connection: Connection,
+    table: Table,
+    rows: Iterable[Dict[str, Any]],
+    keys: Sequence[str],
+    keep: Sequence[str] = (),
+) -> int:
+    """
+    Insert rows, updating the existing rows with the same keys, in a single
+    executemany statement
+
+    Args:
+        connection (Connection): Connection, in a transaction
+        table (Table): Table to write
+        rows (Iterable[dict]): Rows, all with the same columns
+        keys (Sequence[str]): Columns of the primary key or a unique constraint
+        keep (Sequence[str], optional): Columns whose stored value is kept when
+            the new one is NULL, i.e. missing from a partial payload. Defaults to ().
+
+    Returns:
+        int: Number of rows written
+    """
+    rows = unique_rows(rows, keys)
+    if not rows:
+        return 0
+    statement = insert(connection, table)
+    updated = {
+        column: (
+            func.coalesce(statement.excluded[column], table.c[column])
+            if column in keep
+            else statement.excluded[column]
+        )
+        for column in rows[0]
+        if column not in keys
+    }
+    connection.execute(
+        statement.on_conflict_do_update(index_elements=list(keys), set_=updated),
+        rows,
+    )
+    return len(rows)
+
+
+def write_clans(connection: Connection, payloads: Any) -> int:
+    """
+    Upsert clans from clan payloads (a dict or a list of them)
+
+    Returns:
+        int: Number of clans written
+    """
+    rows = [clan_row(payload) for payload in as_list(payloads)]
+    return upsert(connection, Clan.__table__, rows, ["tag"])
+
+
+def write_units(connection: Connection, kind: str, payloads: Any) -> int:
+    """
+    Upsert the units of a kind of players, keyed by player, unit and village
+
+    Args:
+        connection (Connection): Connection, in a transaction
+        kind (str): List of the payloads, "troops", "spells" or "heroes"
+        payloads (Any): Player payloads, a dict or a list of them
+
+    Returns:
+        int: Number of units written
+    """
+    rows = [row for payload in as_list(payloads) for row in unit_rows(payload, kind)]
+    return upsert(
+        connection,
+        UNIT_TABLES[kind].__table__,
+        rows,
+        ["member_tag", UNIT_COLUMNS[kind], "village"],
+    )
+
+
+def write_players(
+    connection: Connection,
+    payloads: Any,
+    units: bool = True,
+    clan_tag: Optional[str] = None,
+) -> int:
+    """
+    Upsert players from player payloads, with their clans and, if units is
+    True, their troops, spells and heroes. A player payload without a clan is
+    of a player without a clan.
+
+    Args:
+        connection (Connection): Connection, in a transaction
+        payloads (Any): Player payloads, a dict or a list of them
+        units (bool, optional): Upsert the units too. Defaults to True.
+        clan_tag (str, optional): Tag of the clan of clan member payloads, which
+            have no clan nor war preference; the stored war preference is kept.
+            Defaults to None, for player payloads.
+
+    Returns:
+        int: Number of players written
+    """
+    payloads = as_list(payloads)
+    if clan_tag is None:
+        write_clans(connection, [payload["clan"] for payload in payloads if payload.get("clan")])
+    elif payloads:
+        # the clan of the members may not be stored yet, its name is kept if it is
+        upsert(connection, Clan.__table__, [{"tag": clan_tag, "name": None}], ["tag"], keep=["name"])
+    count = upsert(
+        connection,
+        Player.__table__,
+        [player_row(payload, clan_tag) for payload in payloads],
+        ["tag"],
+        keep=["war_preference"] if clan_tag is not None else (),
+    )
+    if units:
+        for kind in UNIT_COLUMNS:
+            write_units(connection, kind, payloads)
+    return count
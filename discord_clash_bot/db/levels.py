@@ -0,0 +1,174 @@
+"""
+Packed unit levels of the members. The levels of all the units of a member are
+a single row of bytes, one per unit in the order of the unit catalogue, so the
+levels of a clan are loaded as one row per member and decoded into a matrix,
+instead of hydrating an object per unit. Units added to the catalogue later are
+appended, so older rows are shorter and padded with zeros when decoded.
+"""
+
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.engine import Connection
+
+from .history import UnitKey, unit_ids, unit_key
+from .ingest import UNIT_COLUMNS, as_list, upsert
+from .schema import PlayerLevels
+
+
+def positions(ids: Dict[UnitKey, int]) -> Dict[UnitKey, int]:
+    """
+    Position of the units of the catalogue in the packed levels, the rank of
+    their ids
+    """
+    return {key: position for position, key in enumerate(sorted(ids, key=ids.get))}
+
+
+def pack(payload: Dict[str, Any], order: Dict[UnitKey, int]) -> bytes:
+    """
+    Packed levels of a player payload
+
+    Args:
+        payload (dict): Player payload
+        order (Dict[UnitKey, int]): Position of every unit, see positions()
+
+    Raises:
+        OverflowError: If a level does not fit in a byte
+
+    Returns:
+        bytes: A byte per unit of the catalogue, 0 for the missing ones
+    """
+    levels = array("B", bytes(len(order)))
+    for kind in UNIT_COLUMNS:
+        for unit in payload.get(kind, ()):
+            levels[order[unit_key(kind, unit)]] = unit.get("level") or 0
+    return levels.tobytes()
+
+
+def write_levels(connection: Connection, payloads: Any) -> int:
+    """
+    Upsert the packed levels of players, adding their new units to the catalogue
+
+    Args:
+        connection (Connection): Connection, in a transaction
+        payloads (Any): Player payloads, a dict or a list of them
+
+    Returns:
+        int: Number of players written
+    """
+    payloads = [
+        payload
+        for payload in as_list(payloads)
+        if any(kind in payload for kind in UNIT_COLUMNS)
+    ]
+    if not payloads:
+        return 0
+    order = positions(
+        unit_ids(
+            connection,
+            {
+                unit_key(kind, unit)
+                for payload in payloads
+                for kind in UNIT_COLUMNS
+                for unit in payload.get(kind, ())
+            },
+        )
+    )
+    rows = [{"member_tag": payload["tag"], "levels": pack(payload, order)} for payload in payloads]
+    return upsert(connection, PlayerLevels.__table__, rows, ["member_tag"])
+
+
+def decode(levels: bytes, size: Optional[int] = None) -> np.ndarray:
+    """
+    Levels of a packed row, without copying it when it has the right size
+
+    Args:
+        levels (bytes): Packed levels
+        size (int, optional): Units of the catalogue, shorter rows are padded
+            with zeros. Defaults to None, the length of the row.
+
+    Returns:
+        np.ndarray: Read only uint8 vector
+    """
+    vector = np.frombuffer(levels, dtype=np.uint8)
+    if size is not None and len(vector) < size:
+        vector = np.pad(vector, (0, size - len(vector)))
+    return vector
+
+
+def stack(rows: Sequence[bytes], size: int) -> np.ndarray:
+    """
+    Matrix of packed rows, a row per member and a column per unit
+
+    Args:
+        rows (Sequence[bytes]): Packed levels
+        size (int): Units of the catalogue
+
+    Returns:
+        np.ndarray: uint8 matrix of shape (len(rows), size)
+    """
+    if all(len(levels) == size for levels in rows):
+        return np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(len(rows), size).copy()
+    matrix = np.zeros((len(rows), size), dtype=np.uint8)
+    for index, levels in enumerate(rows):
+        vector = decode(levels)[:size]
+        matrix[index, : len(vector)] = vector
+    return matrix
+
+
+@dataclass
+class LevelMatrix:
+    """
+    Unit levels of some members
+
+    Attributes:
+        member_tags (List[str]): Tag of the member of every row
+        units (List[UnitKey]): (kind, name, village) of the unit of every column
+        levels (np.ndarray): uint8 matrix of the levels, 0 for missing units
+    """
+
+    member_tags: List[str]
+    units: List[UnitKey]
+    levels: np.ndarray
+
+    @classmethod
+    def from_rows(cls, units: List[UnitKey], rows: Iterable[Tuple[str, bytes]]) -> "LevelMatrix":
+        """
+        Matrix of (member_tag, packed levels) rows
+
+        Args:
+            units (List[UnitKey]): Units of the catalogue, in the order of their ids
+            rows (Iterable[Tuple[str, bytes]]): Tag and packed levels of every member
+        """
+        rows = list(rows)
+        return cls(
+            [member_tag for member_tag, _ in rows],
+            list(units),
+            stack([levels for _, levels in rows], len(units)),
+        )
+
+    def column(self, kind: str, name: str, village: str = "home") -> np.ndarray:
+        """
+        Levels of a unit of every member
+
+        Raises:
+            KeyError: If the unit is not in the catalogue
+        """
+        try:
+            index = self.units.index((kind, name, village))
+        except ValueError as error:
+            raise KeyError((kind, name, village)) from error
+        return self.levels[:, index]
+
+    def behind(self) -> np.ndarray:
+        """
+        Levels every member is behind the highest level of the members, by unit
+
+        Returns:
+            np.ndarray: uint8 matrix of the shape of levels
+        """
+        if not self.member_tags:
+            return self.levels
+        return self.levels.max(axis=0) - self.levels
@@ -0,0 +1,88 @@
+"""
+Migrations of databases created by older versions of the schema. Tables are
+created by create_all, which does not change the tables a database already
+has, so these run before it.
+"""
+
+from typing import List
+
+from sqlalchemy import MetaData, Table, func, inspect, select
+from sqlalchemy.engine import Connection
+
+from .ingest import DEFAULT_VILLAGE, UNIT_COLUMNS, UNIT_TABLES
+from .schema import Base
+
+
+def unit_key_missing(connection: Connection, table: Table) -> bool:
+    """
+    Whether a stored unit table predates its unique (member_tag, unit, village) key
+    """
+    inspector = inspect(connection)
+    if not inspector.has_table(table.name):
+        return False
+    names = {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+    names.update(index["name"] for index in inspector.get_indexes(table.name) if index["unique"])
+    keys = {constraint.name for constraint in table.constraints if constraint.name}
+    return not keys & names
+
+
+def rebuild_units(connection: Connection, kind: str):
+    """
+    Rebuild a unit table with a text member_tag and its unique key. Repeated
+    units of a player, which the old table allowed, keep their latest row, and
+    units without a village are of the home one.
+
+    Args:
+        connection (Connection): Connection, in a transaction
+        kind (str): "troops", "spells" or "heroes"
+    """
+    table = UNIT_TABLES[kind].__table__
+    column = UNIT_COLUMNS[kind]
+    connection.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{table.name}_old"')
+    old = Table(f"{table.name}_old", MetaData(), autoload_with=connection)
+    table.create(connection)
+    village = func.coalesce(old.c.village, DEFAULT_VILLAGE)
+    latest = (
+        select(func.max(old.c.id))
+        .group_by(old.c.member_tag, old.c[column], village)
+        .scalar_subquery()
+    )
+    connection.execute(
+        table.insert().from_select(
+            ["id", "member_tag", column, "level", "village"],
+            select(
+                old.c.id,
+                old.c.member_tag.cast(table.c.member_tag.type),
+                old.c[column],
+                old.c.level,
+                village,
+            ).where(old.c.member_tag.is_not(None), old.c.id.in_(latest)),
+        )
+    )
+    old.drop(connection)
+
+
+def migrate(connection: Connection) -> List[str]:
+    """
+    Bring the tables of a database to the current schema: unit tables get a
+    text member_tag and their unique keys, and missing indexes are created.
+    Tables which do not exist are left to create_all.
+
+    Args:
+        connection (Connection): Connection, in a transaction
+
+    Returns:
+        List[str]: Names of the rebuilt tables
+    """
+    rebuilt = []
+    for kind, unit in UNIT_TABLES.items():
+        if unit_key_missing(connection, unit.__table__):
+            rebuild_units(connection, kind)
+            rebuilt.append(unit.__tablename__)
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    return rebuilt
@@ -0,0 +1,176 @@
+"""
+Statements of the lookups the cogs make, shared by the synchronous and the
+asynchronous connections.
+"""
+
+from typing import Optional
+
+from sqlalchemy import Select, and_, func, select
+
+from .ingest import UNIT_COLUMNS, UNIT_TABLES
+from .schema import Clan, Player, PlayerLevels, Unit, UnitChange
+
+
+def clan(tag: str) -> Select:
+    """
+    Clan with a tag
+    """
+    return select(Clan).where(Clan.tag == tag)
+
+
+def player(tag: str) -> Select:
+    """
+    Player with a tag
+    """
+    return select(Player).where(Player.tag == tag)
+
+
+def clan_members(clan_tag: str) -> Select:
+    """
+    Players of a clan, by name
+    """
+    return select(Player).where(Player.clan_tag == clan_tag).order_by(Player.name)
+
+
+def units(kind: str, member_tag: str) -> Select:
+    """
+    Units of a kind of a player
+
+    Args:
+        kind (str): "troops", "spells" or "heroes"
+        member_tag (str): Tag of the player
+    """
+    table = UNIT_TABLES[kind]
+    return select(table).where(table.member_tag == member_tag).order_by(table.id)
+
+
+def unit_levels(kind: str, name: str, clan_tag: Optional[str] = None) -> Select:
+    """
+    Levels of a unit of every player, or of the players of a clan, highest first
+
+    Args:
+        kind (str): "troops", "spells" or "heroes"
+        name (str): Name of the unit, i.e. "Lightning Spell"
+        clan_tag (str, optional): Tag of the clan of the players. Defaults to None.
+
+    Returns:
+        Select: Rows of (member_tag, level)
+    """
+    table = UNIT_TABLES[kind]
+    statement = (
+        select(table.member_tag, table.level)
+        .where(getattr(table, UNIT_COLUMNS[kind]) == name)
+        .order_by(table.level.desc(), table.member_tag)
+    )
+    if clan_tag is not None:
+        statement = statement.join(Player, Player.tag == table.member_tag).where(
+            Player.clan_tag == clan_tag
+        )
+    return statement
+
+
+def levels_at(
+    kind: str, name: str, when: int, clan_tag: Optional[str] = None, village: str = "home"
+) -> Select:
+    """
+    Levels of a unit of every player, or of the players of a clan, at a moment
+    of the history, highest first
+
+    Args:
+        kind (str): "troops", "spells" or "heroes"
+        name (str): Name of the unit, i.e. "Lightning Spell"
+        when (int): Moment, in seconds since the epoch
+        clan_tag (str, optional): Tag of the current clan of the players.
+            Defaults to None.
+        village (str, optional): Village of the unit. Defaults to "home".
+
+    Returns:
+        Select: Rows of (member_tag, level)
+    """
+    unit_id = (
+        select(Unit.id)
+        .where(Unit.kind == kind, Unit.name == name, Unit.village == village)
+        .scalar_subquery()
+    )
+    latest = (
+        select(UnitChange.member_tag, func.max(UnitChange.taken_at).label("taken_at"))
+        .where(UnitChange.unit_id == unit_id, UnitChange.taken_at <= when)
+        .group_by(UnitChange.member_tag)
+        .subquery()
+    )
+    statement = (
+        select(UnitChange.member_tag, UnitChange.level)
+        .join(
+            latest,
+            and_(
+                UnitChange.member_tag == latest.c.member_tag,
+                UnitChange.taken_at == latest.c.taken_at,
+            ),
+        )
+        .where(UnitChange.unit_id == unit_id)
+        .order_by(UnitChange.level.desc(), UnitChange.member_tag)
+    )
+    if clan_tag is not None:
+        statement = statement.join(Player, Player.tag == UnitChange.member_tag).where(
+            Player.clan_tag == clan_tag
+        )
+    return statement
+
+
+def upgrades(clan_tag: str, since: int) -> Select:
+    """
+    Upgrades of the units of the players of a clan since a moment, latest first.
+    The first levels seen of a player are not upgrades.
+
+    Args:
+        clan_tag (str): Tag of the current clan of the players
+        since (int): Moment, in seconds since the epoch
+
+    Returns:
+        Select: Rows of (member_tag, kind, name, previous, level, taken_at)
+    """
+    return (
+        select(
+            UnitChange.member_tag,
+            Unit.kind,
+            Unit.name,
+            UnitChange.previous,
+            UnitChange.level,
+            UnitChange.taken_at,
+        )
+        .join(Unit, Unit.id == UnitChange.unit_id)
+        .join(Player, Player.tag == UnitChange.member_tag)
+        .where(
+            Player.clan_tag == clan_tag,
+            UnitChange.taken_at >= since,
+            UnitChange.level > UnitChange.previous,
+        )
+        .order_by(UnitChange.taken_at.desc(), UnitChange.member_tag, Unit.id)
+    )
+
+
+def catalogue() -> Select:
+    """
+    Units of the catalogue, in the order of the packed levels
+
+    Returns:
+        Select: Rows of (kind, name, village)
+    """
+    return select(Unit.kind, Unit.name, Unit.village).order_by(Unit.id)
+
+
+def member_levels(clan_tag: Optional[str] = None) -> Select:
+    """
+    Packed levels of every player, or of the players of a clan, by tag
+
+    Returns:
+        Select: Rows of (member_tag, levels)
+    """
+    statement = select(PlayerLevels.member_tag, PlayerLevels.levels).order_by(
+        PlayerLevels.member_tag
+    )
+    if clan_tag is not None:
+        statement = statement.join(Player, Player.tag == PlayerLevels.member_tag).where(
+            Player.clan_tag == clan_tag
+        )
+    return statement
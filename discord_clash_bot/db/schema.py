@@ -2,7 +2,7 @@
 Database schema definitions for Discord Clash Bot.
 """
 
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Index, Integer, LargeBinary, String, ForeignKey, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -32,7 +32,7 @@ class Player(Base):
     __tablename__ = "member"
     name = Column(String)
     tag = Column(String, primary_key=True)
-    clan_tag = Column(String, ForeignKey("clan.tag"))
+    clan_tag = Column(String, ForeignKey("clan.tag"), index=True)
     role = Column(String)
     war_preference = Column(String, nullable=True)
 
@@ -50,8 +50,15 @@ class Spell(Base):
     """
 
     __tablename__ = "spell"
+    __table_args__ = (
+        # a unit of a player is stored once, and the player's units are
+        # looked up by the leading member_tag of this key
+        UniqueConstraint("member_tag", "spell", "village", name="uq_spell_member_spell"),
+        # who has a unit, and at which level, without reading the table
+        Index("ix_spell_spell_level", "spell", "level", "member_tag"),
+    )
     id = Column(Integer, primary_key=True)
-    member_tag = Column(Integer, ForeignKey("member.tag"))
+    member_tag = Column(String, ForeignKey("member.tag"), nullable=False)
     spell = Column(String)
     level = Column(Integer)
     village = Column(String)
@@ -69,8 +76,12 @@ class Heroe(Base):
     """
 
     __tablename__ = "hero"
+    __table_args__ = (
+        UniqueConstraint("member_tag", "hero", "village", name="uq_hero_member_hero"),
+        Index("ix_hero_hero_level", "hero", "level", "member_tag"),
+    )
     id = Column(Integer, primary_key=True)
-    member_tag = Column(Integer, ForeignKey("member.tag"))
+    member_tag = Column(String, ForeignKey("member.tag"), nullable=False)
     hero = Column(String)
     level = Column(Integer)
     village = Column(String)
@@ -88,8 +99,12 @@ class Troop(Base):
     """
 
     __tablename__ = "troop"
+    __table_args__ = (
+        UniqueConstraint("member_tag", "troop", "village", name="uq_troop_member_troop"),
+        Index("ix_troop_troop_level", "troop", "level", "member_tag"),
+    )
     id = Column(Integer, primary_key=True)
-    member_tag = Column(Integer, ForeignKey("member.tag"))
+    member_tag = Column(String, ForeignKey("member.tag"), nullable=False)
     troop = Column(String)
     level = Column(Integer)
     village = Column(String)
@@ -119,3 +134,83 @@ class War(Base):
         self.result = result
         self.stars = stars
         self.destruction = destruction
+
+
+class Unit(Base):
+    """
+    Catalogue of the troops, spells and heroes, so the history refers to a
+    unit by a small id instead of its name
+    """
+
+    __tablename__ = "unit"
+    __table_args__ = (UniqueConstraint("kind", "name", "village", name="uq_unit_kind_name"),)
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    village = Column(String, nullable=False)
+
+    def __init__(self, kind, name, village="home"):
+        self.kind = kind
+        self.name = name
+        self.village = village
+
+
+class Snapshot(Base):
+    """
+    Sync of the units of a member, with the number of levels which changed
+    since the previous one
+    """
+
+    __tablename__ = "snapshot"
+    member_tag = Column(String, ForeignKey("member.tag"), primary_key=True)
+    taken_at = Column(Integer, primary_key=True)
+    changes = Column(Integer)
+
+    def __init__(self, member_tag, taken_at, changes=0):
+        self.member_tag = member_tag
+        self.taken_at = taken_at
+        self.changes = changes
+
+
+class UnitChange(Base):
+    """
+    Level of a unit of a member from a snapshot on. Only the levels which differ
+    from the previous snapshot are stored, the first snapshot of a member
+    stores all of them with no previous level.
+    """
+
+    __tablename__ = "unit_change"
+    __table_args__ = (
+        # levels of a unit across players at a time
+        Index("ix_unit_change_unit", "unit_id", "member_tag", "taken_at"),
+        # recent changes of the members of a clan
+        Index("ix_unit_change_member_taken_at", "member_tag", "taken_at"),
+    )
+    member_tag = Column(String, ForeignKey("member.tag"), primary_key=True)
+    unit_id = Column(Integer, ForeignKey("unit.id"), primary_key=True)
+    taken_at = Column(Integer, primary_key=True)
+    level = Column(Integer)
+    previous = Column(Integer, nullable=True)
+
+    def __init__(self, member_tag, unit_id, taken_at, level, previous=None):
+        self.member_tag = member_tag
+        self.unit_id = unit_id
+        self.taken_at = taken_at
+        self.level = level
+        self.previous = previous
+
+
+class PlayerLevels(Base):
+    """
+    Levels of all the units of a member packed in one row: a byte per unit, in
+    the order of the ids of the unit catalogue, 0 for the units it has not
+    unlocked. See levels.py.
+    """
+
+    __tablename__ = "member_levels"
+    member_tag = Column(String, ForeignKey("member.tag"), primary_key=True)
+    levels = Column(LargeBinary, nullable=False)
+
+    def __init__(self, member_tag, levels):
+        self.member_tag = member_tag
+        self.levels = levels
@@ -0,0 +1,79 @@
+"""
+High throughput profile of SQLite databases. The defaults of SQLite, a rollback
+journal and a full sync of every commit, make readers wait for writers; in WAL
+mode readers see the last commit while a write is in progress, and commits only
+sync the log at checkpoints.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class SqlitePragmas:
+    """
+    Pragmas run on every new connection
+
+    Attributes:
+        journal_mode (str): Journal of the transactions, "wal" lets readers
+            and a writer work at once
+        synchronous (str): "normal" syncs the log at checkpoints only, which is
+            safe in WAL mode
+        mmap_size (int): Bytes of the file read through memory mapping
+        cache_size (int): Page cache, in KiB when negative
+        busy_timeout (int): Milliseconds a connection waits for a lock before
+            failing with "database is locked"
+    """
+
+    journal_mode: str = "wal"
+    synchronous: str = "normal"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size: int = -64 * 1024
+    busy_timeout: int = 5000
+
+    def statements(self) -> List[str]:
+        """
+        PRAGMA statements of the settings
+        """
+        return [f"PRAGMA {name} = {value}" for name, value in vars(self).items()]
+
+
+def is_file_database(engine: Engine) -> bool:
+    """
+    Whether an engine connects to an SQLite database file, rather than to
+    another database or to an in memory one
+    """
+    database = engine.url.database
+    return engine.dialect.name == "sqlite" and database not in (None, "", ":memory:")
+
+
+def apply_pragmas(engine: Engine, pragmas: SqlitePragmas = None) -> Engine:
+    """
+    Run the pragmas of the high throughput profile on every connection the
+    engine opens, the synchronous engine of an AsyncEngine included
+
+    Args:
+        engine (Engine): Engine of an SQLite database file
+        pragmas (SqlitePragmas, optional): Settings. Defaults to SqlitePragmas().
+
+    Raises:
+        ValueError: If the engine is not of an SQLite database file
+
+    Returns:
+        Engine: The same engine
+    """
+    if not is_file_database(engine):
+        raise ValueError(f"{engine.url} is not an SQLite database file")
+    statements = (pragmas if pragmas is not None else SqlitePragmas()).statements()
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+    return engine
@@ -0,0 +1,163 @@
+"""
+Single writer of a database. SQLite runs one write transaction at a time, so
+writers of several threads queue for the lock and each pays for its own commit.
+Here the writes are queued to a background thread instead, which runs all the
+writes waiting at once in a single transaction: a group commit.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy.engine import Engine
+
+from discord_clash_bot.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+Write = Tuple[Callable[..., Any], tuple, Future]
+
+
+class WriteQueue():
+    """
+    Background thread running queued writes in group commits. A write is a
+    function taking a connection, like the functions of ingest.py.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, engine: Engine, max_batch: int = 64, max_delay: float = 0.002):
+        """
+        Args:
+            engine (Engine): Engine of the database
+            max_batch (int, optional): Most writes per transaction. Defaults to 64.
+            max_delay (float, optional): Seconds the first write of a transaction
+                waits for others to join it. Defaults to 0.002.
+        """
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.writes = 0
+        self.commits = 0
+        self._queue: "queue.Queue[Write]" = queue.Queue()
+        # closing and queueing are atomic, so no write is queued after the end
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, write: Callable[..., Any], *args) -> Future:
+        """
+        Queue a write
+
+        Args:
+            write (Callable): Function called as write(connection, *args)
+            args: Further arguments of the function
+
+        Raises:
+            RuntimeError: If the queue is closed
+
+        Returns:
+            Future: Result of the write, set once it is committed
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The write queue is closed")
+            self._queue.put((write, args, future))
+        return future
+
+    def close(self):
+        """
+        Run the queued writes and stop the thread
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+        self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counters of the writer
+
+        Returns:
+            dict: writes, commits, writes per commit and pending writes
+        """
+        return {
+            "writes": self.writes,
+            "commits": self.commits,
+            "batch": self.writes / self.commits if self.commits else 0.0,
+            "pending": self._queue.qsize(),
+        }
+
+    def _run(self):
+        try:
+            running = True
+            while running:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.max_delay
+                # a batch ends at the end of the queue, the writes behind it fail
+                while batch[-1] is not None and len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                    except queue.Empty:
+                        break
+                if batch[-1] is None:
+                    running = False
+                    batch.pop()
+                batch = [write for write in batch if write[2].set_running_or_notify_cancel()]
+                if batch:
+                    self._run_batch(batch)
+        finally:
+            with self._lock:
+                self._closed = True
+            self._fail_pending()
+
+    def _run_batch(self, batch: List[Write]):
+        """
+        Commit a batch. A BaseException of a write, i.e. KeyboardInterrupt, fails
+        the writes of the batch left without a result and stops the thread.
+        """
+        try:
+            self._commit(batch)
+        except BaseException as error:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            raise
+
+    def _fail_pending(self):
+        """
+        Fail the writes left in the queue once the thread stops, which are never run
+        """
+        while True:
+            try:
+                write = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if write is not None and write[2].set_running_or_notify_cancel():
+                write[2].set_exception(RuntimeError("The write queue is closed"))
+
+    def _commit(self, batch: List[Write]):
+        """
+        Run writes in a single transaction. If it fails, every write is run again
+        in its own one, so a failing write does not fail the others.
+        """
+        try:
+            with self.engine.begin() as connection:
+                results = [write(connection, *args) for write, args, _ in batch]
+        except Exception as error:  # pylint: disable=broad-except
+            if len(batch) == 1:
+                logger.warning(f"Write failed: {error}")
+                batch[0][2].set_exception(error)
+            else:
+                for write in batch:
+                    self._commit([write])
+            return
+        self.writes += len(batch)
+        self.commits += 1
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
@@ -7,7 +7,14 @@ from discord.ext.commands import Bot
 import discord
 from discord_clash_bot.utils.config import SECRETS
 
+from discord_clash_bot.api.coc import AsyncCocClient
+from discord_clash_bot.api.decoding import loads
+from discord_clash_bot.api.keys import KeyPool
+from discord_clash_bot.api.ratelimit import get_rate_limiter
 from discord_clash_bot.cogs.admin import AdminCog
+from discord_clash_bot.db.async_db import AsyncDBConnection
+from discord_clash_bot.polling.poller import ClanPoller
+from discord_clash_bot.polling.scheduler import PollScheduler
 
 async def run():
     """
@@ -20,6 +27,47 @@ async def run():
             description="Clash of Clans bot", case_insensitive=True,
             intents=intents)
 
+    # a single pooled client is shared by all the cogs through the bot
+    coc_settings = SECRETS.get("coc", {})
+    tokens = coc_settings.get("tokens") or [coc_settings.get("token", "")]
+    for token in tokens:
+        get_rate_limiter(
+            token,
+            rate=coc_settings.get("rate_limit"),
+            burst=coc_settings.get("rate_burst"),
+        )
+    key_pool = KeyPool(
+        tokens,
+        strategy=coc_settings.get("key_strategy", "round_robin"),
+        quarantine_time=coc_settings.get("key_quarantine", 60.0),
+    )
+    bot.coc_client = AsyncCocClient(
+        tokens[0],
+        key_pool=key_pool,
+        validate_tags=True,
+        not_found_ttl=coc_settings.get("not_found_ttl", 60.0),
+        json_loads=loads,
+        limit=coc_settings.get("connection_limit", 100),
+        limit_per_host=coc_settings.get("connection_limit_per_host", 0),
+        timeout=coc_settings.get("timeout", 10.0),
+    )
+
+    # cogs subscribe to the changes of the clan instead of polling the API
+    bot.poller = ClanPoller(
+        bot.coc_client,
+        [coc_settings["clan_tag"]] if "clan_tag" in coc_settings else [],
+    )
+    # polls every clan at an interval adapted to its war
+    bot.poll_scheduler = PollScheduler(bot.poller)
+
+    # cogs query the database without blocking the event loop
+    database_settings = SECRETS.get("database")
+    bot.db = (
+        AsyncDBConnection.from_config(database_settings)
+        if database_settings is not None
+        else None
+    )
+
     cogs = [
         AdminCog
     ]
@@ -27,7 +75,16 @@ async def run():
     for cog in cogs:
         await bot.add_cog(cog(bot))
 
-    await bot.start(SECRETS["discord"]["token"])
+    async with bot.coc_client:
+        if bot.db is not None:
+            await bot.db.create_all()
+        bot.poll_scheduler.start()
+        try:
+            await bot.start(SECRETS["discord"]["token"])
+        finally:
+            await bot.poll_scheduler.stop()
+            if bot.db is not None:
+                await bot.db.close()
 
 if __name__ == "__main__":
     asyncio.run(run())
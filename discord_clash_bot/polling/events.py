@@ -0,0 +1,184 @@
+"""
+Events emitted by the poller, and the diffs of the API payloads producing them
+"""
+
+import hashlib
+import json
+from enum import Enum
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+class EventType(Enum):
+    """
+    Kinds of changes of a clan
+    """
+
+    CLAN_UPDATED = "clan_updated"
+    MEMBER_JOINED = "member_joined"
+    MEMBER_LEFT = "member_left"
+    ROLE_CHANGED = "role_changed"
+    WAR_STATE_CHANGED = "war_state_changed"
+    NEW_ATTACK = "new_attack"
+
+
+class Event(NamedTuple):
+    """
+    Change of a clan
+
+    Attributes:
+        type (EventType): Kind of change
+        clan_tag (str): Tag of the clan polled
+        data (dict): Details of the change, i.e. the member which joined
+    """
+
+    type: EventType
+    clan_tag: str
+    data: Dict[str, Any]
+
+
+def payload_hash(payload: Any) -> bytes:
+    """
+    Structural hash of a decoded payload, equal payloads have equal hashes
+    regardless of the order of their keys
+
+    Args:
+        payload (Any): Decoded json payload
+
+    Returns:
+        bytes: 16 bytes digest
+    """
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+def items(body: Any) -> List[Dict[str, Any]]:
+    """
+    Items of a list body, which may be a page with an "items" list
+    """
+    if isinstance(body, dict):
+        return body.get("items", [])
+    return body or []
+
+
+def diff_clan(
+    clan_tag: str, old: Dict[str, Any], new: Dict[str, Any]
+) -> List[Event]:
+    """
+    Changes of the profile of a clan, the member list is diffed by diff_members()
+
+    Returns:
+        List[Event]: A CLAN_UPDATED event with the changed fields, if any
+    """
+    changed = {
+        key: {"old": old.get(key), "new": value}
+        for key, value in new.items()
+        if key != "memberList" and old.get(key) != value
+    }
+    if not changed:
+        return []
+    return [Event(EventType.CLAN_UPDATED, clan_tag, {"changes": changed})]
+
+
+def diff_members(clan_tag: str, old: Any, new: Any) -> List[Event]:
+    """
+    Members which joined, left or changed role
+
+    Args:
+        clan_tag (str): Tag of the clan
+        old (Any): Previous body of the clan members endpoint
+        new (Any): Current body of the clan members endpoint
+
+    Returns:
+        List[Event]: Events of the changes
+    """
+    old_members = {member["tag"]: member for member in items(old)}
+    new_members = {member["tag"]: member for member in items(new)}
+    events = []
+    for tag, member in new_members.items():
+        previous = old_members.get(tag)
+        if previous is None:
+            events.append(Event(EventType.MEMBER_JOINED, clan_tag, {"member": member}))
+        elif previous.get("role") != member.get("role"):
+            events.append(
+                Event(
+                    EventType.ROLE_CHANGED,
+                    clan_tag,
+                    {"member": member, "old_role": previous.get("role")},
+                )
+            )
+    for tag, member in old_members.items():
+        if tag not in new_members:
+            events.append(Event(EventType.MEMBER_LEFT, clan_tag, {"member": member}))
+    return events
+
+
+def war_id(war: Optional[Dict[str, Any]]) -> Optional[Tuple[Any, Any]]:
+    """
+    Identity of a war, its preparation start and its opponent
+    """
+    if not war:
+        return None
+    return war.get("preparationStartTime"), (war.get("opponent") or {}).get("tag")
+
+
+def war_attacks(
+    war: Optional[Dict[str, Any]]
+) -> Dict[Tuple[str, Any, Any, Any], Dict[str, Any]]:
+    """
+    Attacks of both sides of a war
+
+    Returns:
+        dict: Attacks by (side, attacker, defender, order)
+    """
+    attacks = {}
+    for side in ("clan", "opponent"):
+        for member in ((war or {}).get(side) or {}).get("members", ()):
+            for attack in member.get("attacks", ()):
+                key = (
+                    side,
+                    attack.get("attackerTag"),
+                    attack.get("defenderTag"),
+                    attack.get("order"),
+                )
+                attacks[key] = attack
+    return attacks
+
+
+def diff_war(
+    clan_tag: str, old: Optional[Dict[str, Any]], new: Dict[str, Any]
+) -> List[Event]:
+    """
+    Changes of the state of the current war and attacks made since the previous
+    poll. Attacks of a previous war are not compared with those of a new one.
+
+    Args:
+        clan_tag (str): Tag of the clan
+        old (dict, optional): Previous war, None if it is unknown
+        new (dict): Current war
+
+    Returns:
+        List[Event]: Events of the changes
+    """
+    events = []
+    old_state = (old or {}).get("state")
+    if old_state != new.get("state"):
+        events.append(
+            Event(
+                EventType.WAR_STATE_CHANGED,
+                clan_tag,
+                {"old_state": old_state, "state": new.get("state"), "war": new},
+            )
+        )
+
+    known = war_attacks(old) if war_id(old) == war_id(new) else {}
+    attacks = [
+        (key[0], attack)
+        for key, attack in war_attacks(new).items()
+        if key not in known
+    ]
+    attacks.sort(key=lambda item: item[1].get("order") or 0)
+    events.extend(
+        Event(EventType.NEW_ATTACK, clan_tag, {"side": side, "attack": attack})
+        for side, attack in attacks
+    )
+    return events
@@ -0,0 +1,234 @@
+"""
+Background poller of the clans of the bot. The clan, its members and its current
+war are fetched periodically, compared with the previous snapshot and the
+changes are emitted as events to the subscribers, i.e. cogs announcing new
+members or war attacks.
+"""
+
+import asyncio
+import inspect
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from discord_clash_bot.api.priority import Priority, request_priority
+from discord_clash_bot.utils.logging import get_logger
+
+from .events import Event, EventType, diff_clan, diff_members, diff_war, payload_hash
+
+logger = get_logger(__name__)
+
+CLAN = "clan"
+MEMBERS = "members"
+WAR = "war"
+POLL_KINDS = (CLAN, MEMBERS, WAR)
+
+DIFFS = {CLAN: diff_clan, MEMBERS: diff_members, WAR: diff_war}
+
+Subscriber = Callable[[Event], Any]
+
+
+class Snapshot(NamedTuple):
+    """
+    Last payload polled of a clan, with its structural hash
+    """
+
+    digest: bytes
+    payload: Any
+
+
+class ClanPoller:
+    """
+    Polls clans and emits an event for every change. The first poll of a clan
+    only takes the snapshot it is compared with, so it emits nothing. Payloads
+    whose hash did not change are not diffed.
+    """
+
+    def __init__(
+        self,
+        client,
+        clan_tags: Iterable[str] = (),
+        interval: float = 60.0,
+        kinds: Iterable[str] = POLL_KINDS,
+    ):
+        """
+        Args:
+            client (AsyncCocClient): Client returning dictionaries, not models
+            clan_tags (Iterable[str], optional): Tags of the clans to poll.
+                Defaults to ().
+            interval (float, optional): Seconds between polls. Defaults to 60.0.
+            kinds (Iterable[str], optional): What is polled of every clan, CLAN,
+                MEMBERS and/or WAR. Defaults to POLL_KINDS.
+        """
+        self.client = client
+        self.clan_tags: List[str] = list(dict.fromkeys(clan_tags))
+        self.interval = interval
+        self.kinds = tuple(kinds)
+        self.snapshots: Dict[Tuple[str, str], Snapshot] = {}
+        self._subscribers: List[Tuple[Subscriber, Optional[FrozenSet[EventType]]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, callback: Subscriber, *types: EventType) -> Subscriber:
+        """
+        Call a function, or await a coroutine function, for every event
+
+        Args:
+            callback (Callable): Function receiving the events
+            types (EventType): Types of the events received, all if none is given
+
+        Returns:
+            Callable: The callback, so it can be used as a decorator
+        """
+        self._subscribers.append((callback, frozenset(types) or None))
+        return callback
+
+    def unsubscribe(self, callback: Subscriber):
+        """
+        Stop sending events to a callback
+        """
+        self._subscribers = [
+            subscriber for subscriber in self._subscribers if subscriber[0] != callback
+        ]
+
+    def add_clan(self, clan_tag: str):
+        """
+        Start polling a clan
+        """
+        if clan_tag not in self.clan_tags:
+            self.clan_tags.append(clan_tag)
+
+    def remove_clan(self, clan_tag: str):
+        """
+        Stop polling a clan and forget its snapshots
+        """
+        if clan_tag in self.clan_tags:
+            self.clan_tags.remove(clan_tag)
+        for kind in POLL_KINDS:
+            self.snapshots.pop((clan_tag, kind), None)
+
+    async def fetch(self, clan_tag: str, kind: str) -> Any:
+        """
+        Request the payload of a kind of a clan, with the priority of the polls
+        """
+        with request_priority(Priority.POLLING):
+            if kind == CLAN:
+                return await self.client.get_clan(clan_tag)
+            if kind == MEMBERS:
+                return await self.client.get_clan_members(clan_tag)
+            if kind == WAR:
+                return await self.client.get_war(clan_tag)
+        raise ValueError(f"Unknown poll kind {kind}")
+
+    def update(self, clan_tag: str, kind: str, payload: Any) -> List[Event]:
+        """
+        Store a new payload of a clan and diff it with the previous one
+
+        Returns:
+            List[Event]: Changes since the previous payload
+        """
+        key = (clan_tag, kind)
+        previous = self.snapshots.get(key)
+        # the client returns the same object while its response is cached
+        if previous is not None and previous.payload is payload:
+            return []
+        digest = payload_hash(payload)
+        self.snapshots[key] = Snapshot(digest, payload)
+        if previous is None or previous.digest == digest:
+            return []
+        return DIFFS[kind](clan_tag, previous.payload, payload)
+
+    async def poll_kind(self, clan_tag: str, kind: str) -> List[Event]:
+        """
+        Poll a kind of a clan. Errors, i.e. a private war log, are logged and
+        nothing is emitted for them.
+
+        Returns:
+            List[Event]: Changes since the previous poll
+        """
+        try:
+            payload = await self.fetch(clan_tag, kind)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning(f"Polling {kind} of {clan_tag} failed: {error!r}")
+            return []
+        return self.update(clan_tag, kind, payload)
+
+    async def poll_clan(self, clan_tag: str) -> List[Event]:
+        """
+        Poll every kind of a clan concurrently
+
+        Returns:
+            List[Event]: Changes since the previous poll
+        """
+        results = await asyncio.gather(
+            *(self.poll_kind(clan_tag, kind) for kind in self.kinds)
+        )
+        return [event for events in results for event in events]
+
+    async def poll(self) -> List[Event]:
+        """
+        Poll every clan and emit the changes
+
+        Returns:
+            List[Event]: Changes emitted
+        """
+        results = await asyncio.gather(
+            *(self.poll_clan(clan_tag) for clan_tag in list(self.clan_tags))
+        )
+        events = [event for events in results for event in events]
+        await self.emit(events)
+        return events
+
+    async def emit(self, events: Iterable[Event]):
+        """
+        Send events to their subscribers. An error of a subscriber is logged and
+        does not stop the others.
+        """
+        for event in events:
+            for callback, types in list(self._subscribers):
+                if types is not None and event.type not in types:
+                    continue
+                try:
+                    result = callback(event)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception(f"Subscriber {callback!r} failed on {event.type}")
+
+    async def run(self):
+        """
+        Poll forever, every interval seconds
+        """
+        while True:
+            await self.poll()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> asyncio.Task:
+        """
+        Start polling in a background task of the running loop
+
+        Returns:
+            asyncio.Task: Task of the poller
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        """
+        Stop the background task
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,330 @@
+"""
+Adaptive scheduling of the polls of the clans. Every clan and kind of poll has
+its own next due time in a single heap, consumed by a single task, so hundreds
+of clans cost one timer. The interval of a war adapts to its phase: slow out of
+war, moderate during preparation, fast in the last hour of battle day, and
+never shorter than the time the cached response stays fresh.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from discord_clash_bot.api.coc import GET_CLAN, GET_CLAN_MEMBERS, GET_WAR
+from discord_clash_bot.api.models import parse_time
+from discord_clash_bot.utils.logging import get_logger
+
+from .poller import CLAN, MEMBERS, WAR, ClanPoller
+
+logger = get_logger(__name__)
+
+ENDPOINTS = {CLAN: GET_CLAN, MEMBERS: GET_CLAN_MEMBERS, WAR: GET_WAR}
+
+
+@dataclass
+class PollIntervals:
+    """
+    Seconds between polls
+
+    Attributes:
+        clan (float): Polls of the clan and its members
+        not_in_war (float): Polls of the war while the clan is not in war
+        preparation (float): Polls of the war during preparation day
+        in_war (float): Polls of the war during battle day
+        final (float): Polls of the war close to its end
+        final_window (float): Seconds before the end of the war polled with final
+        war_ended (float): Polls of the war after it ended
+        minimum (float): Shortest interval of any poll
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    clan: float = 300.0
+    not_in_war: float = 900.0
+    preparation: float = 600.0
+    in_war: float = 180.0
+    final: float = 30.0
+    final_window: float = 3600.0
+    war_ended: float = 900.0
+    minimum: float = 10.0
+
+
+def seconds_until(timestamp: Optional[str], now: datetime) -> Optional[float]:
+    """
+    Seconds from now until a timestamp of the API, None if there is none
+    """
+    moment = parse_time(timestamp)
+    if moment is None:
+        return None
+    return (moment - now).total_seconds()
+
+
+def war_interval(
+    war: Optional[Dict[str, Any]], intervals: PollIntervals, now: datetime
+) -> float:
+    """
+    Seconds until the next poll of a war, given its phase. The poll after a
+    phase change (start or end of the war) is never skipped.
+
+    Args:
+        war (dict, optional): Last war polled, None if it is unknown
+        intervals (PollIntervals): Configured intervals
+        now (datetime): Current time
+
+    Returns:
+        float: Seconds until the next poll
+    """
+    state = (war or {}).get("state")
+    until = None
+    if state == "preparation":
+        until = seconds_until(war.get("startTime"), now)
+        if until is not None and until <= 0:
+            # battle day started after the last poll, poll it as a war in progress
+            state = "inWar"
+    if state == "preparation":
+        interval = intervals.preparation
+    elif state == "inWar":
+        until = seconds_until(war.get("endTime"), now)
+        final = until is not None and until <= intervals.final_window
+        interval = intervals.final if final else intervals.in_war
+    elif state == "warEnded":
+        interval = intervals.war_ended
+    else:
+        interval = intervals.not_in_war
+
+    if until is not None and until > 0:
+        interval = min(interval, until + 1)
+    return interval
+
+
+class PollScheduler:
+    """
+    Polls the clans of a ClanPoller each at its own adaptive interval, emitting
+    the changes to the subscribers of the poller
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        poller: ClanPoller,
+        intervals: PollIntervals = None,
+        concurrency: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ):
+        """
+        Args:
+            poller (ClanPoller): Poller of the clans
+            intervals (PollIntervals, optional): Intervals of the polls.
+                Defaults to PollIntervals().
+            concurrency (int, optional): Maximum simultaneous polls. Defaults to 10.
+            clock (Callable, optional): Monotonic clock. Defaults to time.monotonic.
+            wall_clock (Callable, optional): Current utc datetime, to compare with
+                the times of the wars. Defaults to datetime.now(timezone.utc).
+        """
+        self.poller = poller
+        self.intervals = intervals if intervals is not None else PollIntervals()
+        self.concurrency = concurrency
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self._heap: List[Tuple[float, int, str, str]] = []
+        self._scheduled: Dict[Tuple[str, str], Tuple[float, int, str, str]] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # shared by every poll, so polls started by different wakeups are bounded too
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._polls: Set[asyncio.Task] = set()
+        for clan_tag in poller.clan_tags:
+            self.add_clan(clan_tag)
+
+    def __len__(self) -> int:
+        return len(self._scheduled)
+
+    def schedule(self, clan_tag: str, kind: str, delay: float = 0.0):
+        """
+        Schedule the next poll of a kind of a clan, replacing the previous one
+
+        Args:
+            clan_tag (str): Tag of the clan
+            kind (str): Kind of poll, CLAN, MEMBERS or WAR
+            delay (float, optional): Seconds from now. Defaults to 0.0.
+        """
+        entry = (self.clock() + delay, next(self._counter), clan_tag, kind)
+        self._scheduled[(clan_tag, kind)] = entry
+        heapq.heappush(self._heap, entry)
+        self._wakeup.set()
+
+    def due(self, clan_tag: str, kind: str) -> Optional[float]:
+        """
+        Time of the clock of the next poll of a kind of a clan, None if it is not
+        scheduled
+        """
+        entry = self._scheduled.get((clan_tag, kind))
+        return entry[0] if entry is not None else None
+
+    def add_clan(self, clan_tag: str):
+        """
+        Start polling a clan, right away
+        """
+        self.poller.add_clan(clan_tag)
+        for kind in self.poller.kinds:
+            self.schedule(clan_tag, kind)
+
+    def remove_clan(self, clan_tag: str):
+        """
+        Stop polling a clan. Its entries are dropped from the heap when due.
+        """
+        self.poller.remove_clan(clan_tag)
+        for kind in self.poller.kinds:
+            self._scheduled.pop((clan_tag, kind), None)
+
+    def next_interval(self, clan_tag: str, kind: str) -> float:
+        """
+        Seconds until the next poll of a kind of a clan, from its last payload
+        and the freshness of its cached response
+        """
+        if kind == WAR:
+            snapshot = self.poller.snapshots.get((clan_tag, WAR))
+            war = snapshot.payload if snapshot is not None else None
+            interval = war_interval(war, self.intervals, self.wall_clock())
+        else:
+            interval = self.intervals.clan
+
+        # polling before the response expires would return the cached one
+        cached_ttl = self.poller.client.cached_ttl(ENDPOINTS[kind], {"clan_tag": clan_tag})
+        interval = max(interval, cached_ttl)
+        return max(interval, self.intervals.minimum)
+
+    def default_interval(self, kind: str) -> float:
+        """
+        Seconds until the next poll of a kind when its interval can not be known
+        """
+        interval = self.intervals.not_in_war if kind == WAR else self.intervals.clan
+        return max(interval, self.intervals.minimum)
+
+    def safe_interval(self, clan_tag: str, kind: str) -> float:
+        """
+        next_interval(), or the default interval of the kind if it raises, i.e.
+        on a malformed clan tag
+        """
+        try:
+            return self.next_interval(clan_tag, kind)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning(f"Interval of the {kind} polls of {clan_tag} failed: {error!r}")
+            return self.default_interval(kind)
+
+    def pop_due(self) -> List[Tuple[str, str]]:
+        """
+        Remove the polls which are due from the heap
+
+        Returns:
+            List[Tuple[str, str]]: (clan tag, kind) of the due polls
+        """
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            _, _, clan_tag, kind = entry
+            # entries replaced by a later schedule() or removed are stale
+            if self._scheduled.get((clan_tag, kind)) is not entry:
+                continue
+            del self._scheduled[(clan_tag, kind)]
+            due.append((clan_tag, kind))
+        return due
+
+    async def poll(self, clan_tag: str, kind: str):
+        """
+        Run a poll, emit its changes and schedule the next one
+        """
+        events = []
+        try:
+            async with self._semaphore:
+                events = await self.poller.poll_kind(clan_tag, kind)
+        finally:
+            # a failing clan is polled again later and never stops the others
+            if clan_tag in self.poller.clan_tags:
+                self.schedule(clan_tag, kind, self.safe_interval(clan_tag, kind))
+        await self.poller.emit(events)
+
+    def start_due(self) -> List[asyncio.Task]:
+        """
+        Start the polls which are due, each in its own task, so a slow poll does
+        not delay the polls which come due while it runs
+
+        Returns:
+            List[asyncio.Task]: Tasks of the polls
+        """
+        tasks = []
+        for clan_tag, kind in self.pop_due():
+            task = asyncio.ensure_future(self.poll(clan_tag, kind))
+            self._polls.add(task)
+            task.add_done_callback(self._polls.discard)
+            tasks.append(task)
+        return tasks
+
+    async def run_due(self) -> int:
+        """
+        Run the polls which are due and wait for them
+
+        Returns:
+            int: Number of polls run
+        """
+        tasks = self.start_due()
+        await asyncio.gather(*tasks)
+        return len(tasks)
+
+    def seconds_to_next(self) -> Optional[float]:
+        """
+        Seconds until the next poll is due, None if nothing is scheduled
+        """
+        while self._heap:
+            entry = self._heap[0]
+            if self._scheduled.get(entry[2:]) is entry:
+                return max(entry[0] - self.clock(), 0.0)
+            heapq.heappop(self._heap)
+        return None
+
+    async def run(self):
+        """
+        Start the polls forever, sleeping until the next one is due. The polls
+        run in their own tasks, see start_due().
+        """
+        while True:
+            self._wakeup.clear()
+            delay = self.seconds_to_next()
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.start_due()
+
+    def start(self) -> asyncio.Task:
+        """
+        Start the scheduler in a background task of the running loop
+
+        Returns:
+            asyncio.Task: Task of the scheduler
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        """
+        Stop the background task and the polls it started
+        """
+        tasks = list(self._polls)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,43 @@
+"""
+Helpers shared by the tests: a manually advanced clock, mocks of the responses
+of the API and a decorator running asynchronous tests
+"""
+
+import asyncio
+from unittest.mock import Mock
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        """Advance the clock instead of sleeping"""
+        self.now += seconds
+
+
+def make_response(status_code=200, headers=None, body=None):
+    """Mock of a response with a status code, headers and the body of a request"""
+    response = Mock()
+    response.ok = status_code < 400
+    response.status_code = status_code
+    response.reason = "reason"
+    response.text = "text"
+    response.headers = headers if headers is not None else {}
+    response.content = b'{"body": {}}'
+    response.json.return_value = {"body": body if body is not None else {"name": "test-name"}}
+    return response
+
+
+def async_test(func):
+    """Decorator to run async tests."""
+
+    def wrapper(*args, **kwargs):
+        return asyncio.run(func(*args, **kwargs))
+
+    return wrapper
@@ -1,3 +1,117 @@
 """
 This file contains mock responses json for testing
 """
+
+PLAYER = {
+    "tag": "#2PP",
+    "name": "carlitos",
+    "townHallLevel": 14,
+    "expLevel": 220,
+    "trophies": 4820,
+    "warStars": 1200,
+    "role": "admin",
+    "warPreference": "in",
+    "clan": {"tag": "#2Y0YRGG0", "name": "Test Clan", "clanLevel": 20},
+    "achievements": [
+        {"name": "Bigger Coffers", "stars": 3, "value": 10, "target": 10, "village": "home"},
+        {"name": "Get those Goblins!", "stars": 3, "value": 150, "target": 150, "village": "home"},
+    ],
+    "troops": [
+        {"name": "Barbarian", "level": 10, "maxLevel": 11, "village": "home"},
+        {"name": "Dragon", "level": 8, "maxLevel": 10, "village": "home"},
+        {"name": "Raged Barbarian", "level": 18, "maxLevel": 20, "village": "builderBase"},
+    ],
+    "spells": [
+        {"name": "Lightning Spell", "level": 9, "maxLevel": 10, "village": "home"},
+    ],
+    "heroes": [
+        {"name": "Barbarian King", "level": 75, "maxLevel": 85, "village": "home"},
+        {"name": "Archer Queen", "level": 80, "maxLevel": 85, "village": "home"},
+    ],
+}
+
+CLAN_MEMBER = {
+    "tag": "#2PP",
+    "name": "carlitos",
+    "role": "admin",
+    "expLevel": 220,
+    "trophies": 4820,
+    "clanRank": 1,
+    "donations": 300,
+    "donationsReceived": 120,
+}
+
+CLAN = {
+    "tag": "#2Y0YRGG0",
+    "name": "Test Clan",
+    "clanLevel": 20,
+    "clanPoints": 40000,
+    "members": 2,
+    "warWins": 300,
+    "warLeague": {"id": 48000015, "name": "Master League I"},
+    "memberList": [
+        CLAN_MEMBER,
+        {
+            "tag": "#8QU8J9LP",
+            "name": "pepita",
+            "role": "member",
+            "expLevel": 150,
+            "trophies": 3000,
+            "clanRank": 2,
+            "donations": 10,
+            "donationsReceived": 500,
+        },
+    ],
+}
+
+WAR = {
+    "state": "inWar",
+    "teamSize": 15,
+    "preparationStartTime": "20230527T080000.000Z",
+    "startTime": "20230528T080000.000Z",
+    "endTime": "20230529T080000.000Z",
+    "clan": {
+        "tag": "#2Y0YRGG0",
+        "name": "Test Clan",
+        "stars": 20,
+        "destructionPercentage": 65.5,
+        "attacks": 9,
+        "members": [
+            {
+                "tag": "#2PP",
+                "name": "carlitos",
+                "mapPosition": 1,
+                "attacks": [
+                    {
+                        "attackerTag": "#2PP",
+                        "defenderTag": "#9JJ",
+                        "stars": 3,
+                        "destructionPercentage": 100,
+                        "order": 1,
+                    }
+                ],
+            }
+        ],
+    },
+    "opponent": {
+        "tag": "#9UGQ0GL",
+        "name": "Enemy Clan",
+        "stars": 18,
+        "destructionPercentage": 60.1,
+        "attacks": 10,
+        "members": [],
+    },
+}
+
+RAID_SEASON = {
+    "state": "ended",
+    "startTime": "20230526T070000.000Z",
+    "endTime": "20230529T070000.000Z",
+    "capitalTotalLoot": 250000,
+    "raidsCompleted": 5,
+    "totalAttacks": 120,
+    "enemyDistrictsDestroyed": 36,
+    "members": [
+        {"tag": "#2PP", "name": "carlitos", "attacks": 6, "capitalResourcesLooted": 24000},
+    ],
+}
@@ -0,0 +1,127 @@
+"""
+Testing cases for the asynchronous clash of clans client
+"""
+
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from discord_clash_bot.api.base_client import NotOkException
+from discord_clash_bot.api.coc import (
+    AsyncCocClient,
+    ClanNotFound,
+    PlayerNotFound,
+    ServerException,
+)
+from tests.helpers import async_test
+
+TOKEN = "test-token"
+
+
+async def handle_clan(request: web.Request) -> web.Response:
+    """Mock clan endpoint, it also checks the bearer token"""
+    if request.headers.get("Authorization") != f"Bearer {TOKEN}":
+        return web.json_response({"reason": "accessDenied"}, status=403)
+    if request.match_info["tag"] == "missing":
+        return web.json_response({"reason": "notFound"}, status=404)
+    return web.json_response({"body": {"tag": request.match_info["tag"]}})
+
+
+async def handle_player(request: web.Request) -> web.Response:
+    """Mock player endpoint"""
+    status = {"missing": 404, "broken": 500, "weird": 454}.get(
+        request.match_info["tag"], 200
+    )
+    return web.json_response({"body": {"name": "test-name"}}, status=status)
+
+
+async def handle_verify(request: web.Request) -> web.Response:
+    """Mock verify token endpoint"""
+    payload = await request.json()
+    status = "ok" if payload["token"] == TOKEN else "invalid"
+    return web.json_response({"body": {"status": status}})
+
+
+class TestAsyncCocClient(unittest.TestCase):
+    """
+    Unit tests for AsyncCocClient against a local aiohttp server
+    """
+
+    async def make_client(self):
+        """Start the mock server and return a client pointing to it"""
+        app = web.Application()
+        app.router.add_get("/v1/clans/{tag}", handle_clan)
+        app.router.add_get("/v1/players/{tag}", handle_player)
+        app.router.add_post("/v1/players/{tag}/verifytoken", handle_verify)
+        self.server = TestServer(app)
+        await self.server.start_server()
+
+        client = AsyncCocClient(token=TOKEN, limit=4, timeout=5)
+        client.base_url = str(self.server.make_url("/v1/"))
+        return client
+
+    @async_test
+    async def test_get_clan_success(self):
+        """
+        Test whether get_clan returns the body of the response
+        """
+        async with await self.make_client() as client:
+            result = await client.get_clan("ABC")
+        await self.server.close()
+        self.assertEqual(result, {"tag": "ABC"})
+
+    @async_test
+    async def test_get_clan_not_found(self):
+        """
+        Test whether get_clan raises ClanNotFound on 404
+        """
+        async with await self.make_client() as client:
+            with self.assertRaises(ClanNotFound):
+                await client.get_clan("missing")
+        await self.server.close()
+
+    @async_test
+    async def test_get_player_errors(self):
+        """
+        Test whether errors are mapped as in the synchronous client
+        """
+        async with await self.make_client() as client:
+            with self.assertRaises(PlayerNotFound):
+                await client.get_player("missing")
+            with self.assertRaises(ServerException):
+                await client.get_player("broken")
+            with self.assertRaises(NotOkException):
+                await client.get_player("weird")
+        await self.server.close()
+
+    @async_test
+    async def test_post_verify_player(self):
+        """
+        Test whether the token is sent in the body of the request
+        """
+        async with await self.make_client() as client:
+            self.assertTrue(await client.post_verify_player("ABC", TOKEN))
+            self.assertFalse(await client.post_verify_player("ABC", "wrong"))
+        await self.server.close()
+
+    @async_test
+    async def test_session_is_shared(self):
+        """
+        Test whether every request reuses the same pooled session, and the
+        session is closed with the client
+        """
+        client = await self.make_client()
+        session = client.session
+        await client.get_clan("ABC")
+        await client.get_player("ABC")
+        self.assertIs(client.session, session)
+        self.assertEqual(session.connector.limit, 4)
+
+        await client.close()
+        await self.server.close()
+        self.assertTrue(session.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -55,3 +55,48 @@ class TestBaseClient(unittest.TestCase):
 
         with self.assertRaises(NotImplementedError):
             self.client.process_request("https://nothig.com", method=Method.GET)
+
+    @patch("requests.Session.send")
+    def test_session_is_reused(self, mock_send):
+        """
+        Test whether every request goes through the same kept alive session
+        """
+
+        mock_response = Mock()
+        mock_response.ok = True
+        mock_response.json.return_value = {"status": "ok"}
+        mock_send.return_value = mock_response
+
+        session = self.client.session
+        self.client.process_request("https://nothig.com", method=Method.GET)
+        self.client.process_request("https://nothig.com", method=Method.GET)
+
+        self.assertIs(self.client.session, session)
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertIsNotNone(self.client.last_elapsed)
+
+        prepared = mock_send.call_args[0][0]
+        self.assertIn("gzip", prepared.headers["Accept-Encoding"])
+        self.assertEqual(prepared.headers["Authorization"], "Bearer test-token")
+
+    def test_pool_configuration(self):
+        """
+        Test whether the pool size and timeout are applied to the adapters
+        """
+
+        client = MockClient(pool_maxsize=20, timeout=3.0)
+        adapter = client.session.get_adapter("https://nothig.com")
+        self.assertEqual(adapter.timeout, 3.0)
+        self.assertEqual(
+            adapter._pool_maxsize, 20  # pylint: disable=protected-access
+        )
+
+    def test_context_manager_closes_session(self):
+        """
+        Test whether leaving the with statement closes the session
+        """
+
+        with patch.object(requests.Session, "close") as mock_close:
+            with MockClient() as client:
+                self.assertIsInstance(client, MockClient)
+            mock_close.assert_called_once()
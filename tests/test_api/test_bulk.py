@@ -0,0 +1,94 @@
+"""
+Testing cases for bulk.py
+"""
+
+import asyncio
+import unittest
+from unittest.mock import Mock, patch
+
+from discord_clash_bot.api.bulk import BulkResult, gather_bounded
+from discord_clash_bot.api.coc import AsyncCocClient, CocClient, PlayerNotFound
+from discord_clash_bot.api.ratelimit import TokenBucket
+from tests.helpers import async_test
+
+
+def mock_player(request):
+    """Mock player endpoint, tags starting with "missing" do not exist"""
+    tag = request.url.rsplit("/", 1)[-1]
+    response = Mock()
+    response.ok = not tag.startswith("missing")
+    response.status_code = 200 if response.ok else 404
+    response.json.return_value = {"body": {"tag": tag}}
+    return response
+
+
+class TestBulk(unittest.TestCase):
+    """
+    Unit tests for the bulk fetch of the clients
+    """
+
+    @patch("requests.Session.send")
+    def test_get_players(self, mock_send):
+        """
+        Test whether results keep the input order and errors stay per item
+        """
+        mock_send.side_effect = mock_player
+        client = CocClient(token="test-token", rate_limiter=TokenBucket(burst=100))
+        tags = ["A", "missing", "B", "C"]
+
+        results = client.get_players(tags, concurrency=3)
+
+        self.assertEqual([result.tag for result in results], tags)
+        self.assertEqual([result.ok for result in results], [True, False, True, True])
+        self.assertIsInstance(results[1].error, PlayerNotFound)
+        self.assertEqual(results[2].value, {"tag": "B"})
+
+    def test_empty_batch(self):
+        """
+        Test whether an empty batch returns no results
+        """
+        client = CocClient(token="test-token")
+        self.assertEqual(client.get_clans([]), [])
+
+    @async_test
+    async def test_concurrency_is_bounded(self):
+        """
+        Test whether no more than concurrency lookups are in flight
+        """
+        in_flight = 0
+        peak = 0
+
+        async def lookup(tag):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if tag == "missing":
+                raise PlayerNotFound()
+            return tag
+
+        results = await gather_bounded(lookup, ["missing"] + list("abcdefgh"), 3)
+
+        self.assertEqual(peak, 3)
+        self.assertEqual(results[1], BulkResult("a", "a"))
+        self.assertFalse(results[0].ok)
+
+    @async_test
+    async def test_async_get_wars(self):
+        """
+        Test whether the async client fans out the lookups
+        """
+        client = AsyncCocClient(token="test-token")
+
+        async def get_war(clan_tag):
+            return {"clan": clan_tag}
+
+        client.get_war = get_war
+        results = await client.get_wars(["A", "B"])
+
+        self.assertEqual([result.value for result in results], [{"clan": "A"}, {"clan": "B"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
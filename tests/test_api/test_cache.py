@@ -0,0 +1,141 @@
+"""
+Testing cases for cache.py
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from discord_clash_bot.api.cache import ResponseCache, parse_max_age
+from discord_clash_bot.api.coc import GET_WAR, CocClient
+from tests.helpers import FakeClock
+
+
+def cacheable_response(body, max_age=60):
+    """Mock of an ok response with a Cache-Control header"""
+    response = Mock()
+    response.ok = True
+    response.headers = {"Cache-Control": f"public max-age={max_age}"}
+    response.content = b"x" * 10
+    response.json.return_value = {"body": body}
+    return response
+
+
+class TestResponseCache(unittest.TestCase):
+    """
+    Unit tests for ResponseCache
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResponseCache(max_entries=3, max_bytes=100, clock=self.clock)
+
+    def test_parse_max_age(self):
+        """
+        Test the parsing of Cache-Control headers
+        """
+        self.assertEqual(parse_max_age("public max-age=120"), 120.0)
+        self.assertEqual(parse_max_age("no-cache"), 0.0)
+        self.assertIsNone(parse_max_age("public"))
+        self.assertIsNone(parse_max_age(None))
+
+    def test_expiration(self):
+        """
+        Test whether values expire after their ttl, but can be read as stale
+        """
+        self.cache.set("key", "value", ttl=10)
+        self.assertEqual(self.cache.get("key"), "value")
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(self.cache.get("key", allow_stale=True), "value")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_lru_eviction_by_entries(self):
+        """
+        Test whether the least recently used entry is evicted first
+        """
+        for key in "abc":
+            self.cache.set(key, key, ttl=10)
+        self.cache.get("a")
+        self.cache.set("d", "d", ttl=10)
+
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), "a")
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_eviction_by_size(self):
+        """
+        Test whether entries are evicted when the size limit is reached
+        """
+        self.cache.set("a", "a", ttl=10, size=60)
+        self.cache.set("b", "b", ttl=10, size=60)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["bytes"], 60)
+
+        self.cache.set("c", "c", ttl=10, size=1000)
+        self.assertIsNone(self.cache.get("c"))
+
+
+class TestCocClientCache(unittest.TestCase):
+    """
+    Unit tests for the cache of CocClient
+    """
+
+    @patch("requests.Session.send")
+    def test_get_war_is_cached(self, mock_send):
+        """
+        Test whether repeated lookups are served from the cache
+        """
+        mock_send.return_value = cacheable_response({"state": "inWar"})
+        client = CocClient(token="test-token")
+
+        for _ in range(10):
+            self.assertEqual(client.get_war("test-clan"), {"state": "inWar"})
+
+        self.assertEqual(mock_send.call_count, 1)
+        self.assertEqual(client.cache.stats()["hits"], 9)
+
+        client.get_war("other-clan")
+        self.assertEqual(mock_send.call_count, 2)
+
+    @patch("requests.Session.send")
+    def test_cache_ttl_override(self, mock_send):
+        """
+        Test whether a ttl of 0 for an endpoint disables its cache
+        """
+        mock_send.return_value = cacheable_response({"name": "test-name"})
+        client = CocClient(token="test-token", cache_ttl={"get_player": 0})
+
+        client.get_player("test-player")
+        client.get_player("test-player")
+        self.assertEqual(mock_send.call_count, 2)
+
+    @patch("requests.Session.send")
+    def test_post_is_not_cached(self, mock_send):
+        """
+        Test whether POST requests never go through the cache
+        """
+        mock_send.return_value = cacheable_response({"status": "ok"})
+        client = CocClient(token="test-token")
+
+        client.post_verify_player("test-player", "test-token")
+        client.post_verify_player("test-player", "test-token")
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertEqual(len(client.cache), 0)
+
+    @patch("requests.Session.send")
+    def test_cached_ttl(self, mock_send):
+        """
+        Test whether the remaining freshness of a cached response is reported
+        """
+        mock_send.return_value = cacheable_response({"state": "inWar"}, max_age=120)
+        client = CocClient(token="test-token", cache=ResponseCache(clock=FakeClock()))
+
+        self.assertEqual(client.cached_ttl(GET_WAR, {"clan_tag": "test-clan"}), 0.0)
+        client.get_war("test-clan")
+        self.assertEqual(client.cached_ttl(GET_WAR, {"clan_tag": "test-clan"}), 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
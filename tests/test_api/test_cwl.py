@@ -0,0 +1,171 @@
+"""
+Testing cases for cwl.py
+"""
+
+import unittest
+
+from discord_clash_bot.api.bulk import BulkResult
+from discord_clash_bot.api.coc import (
+    AsyncCocClient,
+    ClanNotFound,
+    CocClient,
+    WarNotFound,
+)
+from discord_clash_bot.api.cwl import (
+    LeagueRound,
+    clan_war,
+    league_rounds,
+    round_war_tags,
+    war_tags,
+)
+from discord_clash_bot.api.models import LeagueGroup, War
+from discord_clash_bot.api.ratelimit import TokenBucket
+from discord_clash_bot.api.resilience import RetryPolicy
+from discord_clash_bot.bench.mock_server import MockConfig, MockServer
+from tests.helpers import async_test
+
+GROUP = {
+    "state": "inWar",
+    "season": "2023-05",
+    "clans": [{"tag": "#2PP"}, {"tag": "#9JJ"}, {"tag": "#8QQ"}, {"tag": "#LUV"}],
+    "rounds": [
+        {"warTags": ["#2Y0", "#2Y2"]},
+        {"warTags": ["#2Y8", "#2Y9"]},
+        {"warTags": ["#0", "#0"]},
+    ],
+}
+
+
+def make_war(clan_tag, opponent_tag):
+    """League war between two clans"""
+    return {
+        "state": "inWar",
+        "clan": {"tag": clan_tag, "stars": 10},
+        "opponent": {"tag": opponent_tag, "stars": 5},
+    }
+
+
+class TestLeagueRounds(unittest.TestCase):
+    """
+    Unit tests for picking the wars of a clan out of a league group
+    """
+
+    def test_war_tags(self):
+        """
+        Test whether placeholders of the rounds not drawn yet are skipped
+        """
+        self.assertEqual(
+            round_war_tags(GROUP), [["#2Y0", "#2Y2"], ["#2Y8", "#2Y9"], []]
+        )
+        self.assertEqual(war_tags(GROUP), ["#2Y0", "#2Y2", "#2Y8", "#2Y9"])
+        self.assertEqual(war_tags(LeagueGroup.from_dict(GROUP)), war_tags(GROUP))
+
+    def test_clan_war(self):
+        """
+        Test whether the clan is always the "clan" side of its war
+        """
+        war = make_war("#9JJ", "#2PP")
+        swapped = clan_war(war, "#2pp")
+        self.assertEqual(swapped["clan"]["tag"], "#2PP")
+        self.assertEqual(swapped["opponent"]["tag"], "#9JJ")
+        self.assertIs(clan_war(war, "#9JJ"), war)
+        self.assertIsNone(clan_war(war, "#8QQ"))
+
+        model = clan_war(War.from_dict(war), "#2PP")
+        self.assertEqual((model.clan.tag, model.opponent.tag), ("#2PP", "#9JJ"))
+
+    def test_league_rounds(self):
+        """
+        Test whether every round has the war of the clan or the error hiding it
+        """
+        error = WarNotFound()
+        wars = [
+            BulkResult("#2Y0", make_war("#8QQ", "#LUV")),
+            BulkResult("#2Y2", make_war("#9JJ", "#2PP")),
+            BulkResult("#2Y8", make_war("#2PP", "#8QQ")),
+            BulkResult("#2Y9", error=error),
+        ]
+        rounds = league_rounds(GROUP, wars, "#2PP")
+        self.assertEqual([league_round.number for league_round in rounds], [1, 2, 3])
+        self.assertEqual(rounds[0].war_tag, "#2Y2")
+        self.assertEqual(rounds[0].war["opponent"]["tag"], "#9JJ")
+        self.assertEqual(rounds[1].war_tag, "#2Y8")
+        self.assertIsNone(rounds[1].error)
+        self.assertEqual(rounds[2], LeagueRound(3))
+
+        rounds = league_rounds(GROUP, wars, "#LUV")
+        self.assertTrue(rounds[0].ok)
+        self.assertFalse(rounds[1].ok)
+        self.assertIs(rounds[1].error, error)
+
+
+class TestClientLeagueWars(unittest.TestCase):
+    """
+    Unit tests for the clan war league lookups of the clients against the mock API
+    """
+
+    def setUp(self):
+        self.server = MockServer(MockConfig(players=100, clans=8))
+        self.server.start()
+        self.clan_tag = self.server.api.clan_tags[3]
+        self.options = {
+            "token": "test-token",
+            "rate_limiter": TokenBucket(burst=1000),
+            "retry_policy": RetryPolicy(max_retries=0),
+        }
+
+    def tearDown(self):
+        self.server.stop()
+
+    def check_rounds(self, rounds):
+        """Check the wars of the clan in the 7 rounds of its group"""
+        self.assertEqual(len(rounds), 7)
+        opponents = set()
+        for league_round in rounds:
+            self.assertTrue(league_round.ok)
+            self.assertEqual(league_round.war["clan"]["tag"], self.clan_tag)
+            opponents.add(league_round.war["opponent"]["tag"])
+        self.assertEqual(len(opponents), 7)
+
+    def test_get_league_wars(self):
+        """
+        Test whether the 28 wars of the group are requested once, then cached
+        """
+        client = CocClient(**self.options)
+        client.base_url = self.server.url
+        self.check_rounds(client.get_league_wars(self.clan_tag, concurrency=4))
+        self.assertEqual(self.server.stats, {200: 29})
+
+        client.get_league_wars(self.clan_tag)
+        self.assertEqual(self.server.stats, {200: 29})
+
+        with self.assertRaises(WarNotFound):
+            client.get_league_war("#2PP")
+        with self.assertRaises(ClanNotFound):
+            client.get_league_wars("#2PP")
+        client.close()
+
+    @async_test
+    async def test_async_get_league_wars(self):
+        """
+        Test whether the asynchronous client finds the same wars
+        """
+        async with AsyncCocClient(**self.options) as client:
+            client.base_url = self.server.url
+            self.check_rounds(await client.get_league_wars(self.clan_tag))
+        self.assertEqual(self.server.stats, {200: 29})
+
+    def test_models(self):
+        """
+        Test whether the rounds are found when the client returns models
+        """
+        client = CocClient(as_models=True, **self.options)
+        client.base_url = self.server.url
+        self.assertIsInstance(client.get_league_group(self.clan_tag), LeagueGroup)
+        rounds = client.get_league_wars(self.clan_tag)
+        self.assertTrue(all(league_round.war.clan.tag == self.clan_tag for league_round in rounds))
+        client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Testing cases for endpoints.py
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from discord_clash_bot.api.base_client import Method, NotOkException
+from discord_clash_bot.api.coc import (
+    ENDPOINTS,
+    GET_CAPITAL_RAIDSEASONS,
+    ClanNotFound,
+    CocClient,
+)
+from discord_clash_bot.api.endpoints import Endpoint
+
+
+class TestEndpoint(unittest.TestCase):
+    """
+    Unit tests for the Endpoint descriptor
+    """
+
+    def setUp(self):
+        self.endpoint = Endpoint(
+            "get_member", "clans/{clan_tag}/members/{player_tag}", not_found=ClanNotFound
+        )
+
+    def test_params(self):
+        """
+        Test whether the path parameters are parsed in order
+        """
+        self.assertEqual(self.endpoint.params, ("clan_tag", "player_tag"))
+        self.assertEqual(self.endpoint.method, Method.GET)
+
+    def test_bind(self):
+        """
+        Test whether positional and keyword arguments are bound to the path
+        """
+        self.assertEqual(
+            self.endpoint.bind("A", player_tag="B"),
+            {"clan_tag": "A", "player_tag": "B"},
+        )
+        self.assertEqual(
+            self.endpoint.format(**self.endpoint.bind("A", "B")),
+            "clans/A/members/B",
+        )
+
+    def test_bind_wrong_arguments(self):
+        """
+        Test whether wrong arguments raise a TypeError as a regular method would
+        """
+        with self.assertRaises(TypeError):
+            self.endpoint.bind("A")
+        with self.assertRaises(TypeError):
+            self.endpoint.bind("A", "B", "C")
+        with self.assertRaises(TypeError):
+            self.endpoint.bind("A", clan_tag="B")
+
+    def test_generated_methods(self):
+        """
+        Test whether the client methods are generated from the registry
+        """
+        for name in ENDPOINTS:
+            self.assertTrue(callable(getattr(CocClient, name)))
+        self.assertEqual(CocClient.get_clan.__name__, "get_clan")
+        self.assertIn("clan_tag (str): Tag of the clan", CocClient.get_clan.__doc__)
+
+
+class TestErrorMapping(unittest.TestCase):
+    """
+    Unit tests for the error mapping of the registry
+    """
+
+    def setUp(self):
+        self.client = CocClient(token="test-token")
+
+    @patch("requests.Session.send")
+    def test_not_found_without_exception(self, mock_send):
+        """
+        Test whether a 404 on an endpoint without not_found raises NotOkException
+        """
+
+        mock_response = Mock()
+        mock_response.ok = False
+        mock_response.status_code = 404
+        mock_send.return_value = mock_response
+
+        self.assertIsNone(GET_CAPITAL_RAIDSEASONS.not_found)
+        with self.assertRaises(NotOkException):
+            self.client.get_capital_raidseasons("test-clan")
+
+    @patch("requests.Session.send")
+    def test_keyword_arguments(self, mock_send):
+        """
+        Test whether the generated methods accept keyword arguments
+        """
+
+        mock_response = Mock()
+        mock_response.ok = False
+        mock_response.status_code = 404
+        mock_send.return_value = mock_response
+
+        with self.assertRaises(ClanNotFound):
+            self.client.get_clan_members(clan_tag="test-clan")
+
+
+if __name__ == "__main__":
+    unittest.main()
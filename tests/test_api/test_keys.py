@@ -0,0 +1,177 @@
+"""
+Testing cases for keys.py
+"""
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from discord_clash_bot.api.coc import AsyncCocClient, CocClient
+from discord_clash_bot.api.keys import LEAST_LOADED, KeyPool
+from discord_clash_bot.api.ratelimit import get_rate_limiter
+from tests.helpers import FakeClock, make_response
+
+
+class TestKeyPool(unittest.TestCase):
+    """
+    Unit tests for KeyPool
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.pool = KeyPool(
+            ["key-aaaa", "key-bbbb", "key-cccc"], quarantine_time=60, clock=self.clock
+        )
+
+    def test_round_robin(self):
+        """
+        Test whether keys are used in turns
+        """
+        tokens = [self.pool.acquire() for _ in range(4)]
+        self.assertEqual(tokens, ["key-aaaa", "key-bbbb", "key-cccc", "key-aaaa"])
+
+    def test_least_loaded(self):
+        """
+        Test whether the key with fewer requests in flight is chosen
+        """
+        pool = KeyPool(["key-aaaa", "key-bbbb"], strategy=LEAST_LOADED)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertNotEqual(first, second)
+        pool.release(second, 200)
+        self.assertEqual(pool.acquire(), second)
+
+    def test_quarantine(self):
+        """
+        Test whether a throttled key is skipped until its quarantine ends
+        """
+        token = self.pool.acquire()
+        self.pool.release(token, 429)
+        tokens = {self.pool.acquire() for _ in range(4)}
+        self.assertNotIn(token, tokens)
+        self.assertFalse(self.pool.usage()["...aaaa"]["available"])
+
+        self.clock.now = 60
+        self.assertIn(token, {self.pool.acquire() for _ in range(3)})
+
+    def test_every_key_quarantined(self):
+        """
+        Test whether the key released first is used when every key is quarantined
+        """
+        for token in ["key-aaaa", "key-bbbb", "key-cccc"]:
+            self.pool.acquire()
+            self.pool.release(token, 403)
+            self.clock.now += 1
+        self.assertEqual(self.pool.acquire(), "key-aaaa")
+
+    def test_usage(self):
+        """
+        Test whether the usage of every key is reported with masked keys
+        """
+        token = self.pool.acquire()
+        self.pool.release(token, 500)
+        self.pool.acquire()
+
+        usage = self.pool.usage()
+        self.assertEqual(set(usage), {"...aaaa", "...bbbb", "...cccc"})
+        self.assertEqual(usage["...aaaa"]["errors"], 1)
+        self.assertEqual(usage["...bbbb"]["in_flight"], 1)
+        self.assertEqual(usage["...cccc"]["requests"], 0)
+
+    def test_invalid_pool(self):
+        """
+        Test whether a pool without keys or with an unknown strategy is refused
+        """
+        with self.assertRaises(ValueError):
+            KeyPool([])
+        with self.assertRaises(ValueError):
+            KeyPool(["key-aaaa"], strategy="random")
+
+
+@patch("time.sleep")
+@patch("requests.Session.send")
+class TestCocClientKeyPool(unittest.TestCase):
+    """
+    Unit tests for the key pool of CocClient
+    """
+
+    def setUp(self):
+        self.pool = KeyPool(["pool-key-1", "pool-key-2"])
+        self.client = CocClient(key_pool=self.pool)
+
+    def test_requests_spread_over_keys(self, mock_send, _):
+        """
+        Test whether consecutive requests use different keys
+        """
+        mock_send.return_value = make_response(200)
+        self.client.get_player("first-player")
+        self.client.get_player("second-player")
+
+        headers = [call[0][0].headers["Authorization"] for call in mock_send.call_args_list]
+        self.assertEqual(headers, ["Bearer pool-key-1", "Bearer pool-key-2"])
+        self.assertEqual(self.client.key_usage()["...ey-1"]["in_flight"], 0)
+
+    def test_throttled_key_is_replaced(self, mock_send, _):
+        """
+        Test whether a request throttled on a key is retried with another key
+        """
+        mock_send.side_effect = [make_response(429, {"Retry-After": "0"}), make_response(200)]
+        self.assertEqual(self.client.get_player("test-player"), {"name": "test-name"})
+
+        headers = [call[0][0].headers["Authorization"] for call in mock_send.call_args_list]
+        self.assertEqual(headers, ["Bearer pool-key-1", "Bearer pool-key-2"])
+        self.assertEqual(self.client.key_usage()["...ey-1"]["quarantines"], 1)
+        self.assertEqual(get_rate_limiter("pool-key-1").stats()["throttled"], 1)
+
+    def test_failed_request_releases_key(self, mock_send, _):
+        """
+        Test whether a key is given back when the request raises
+        """
+        mock_send.side_effect = ConnectionError()
+        self.client.retry_policy.max_retries = 0
+        with self.assertRaises(ConnectionError):
+            self.client.get_player("test-player")
+        self.assertEqual(self.client.key_usage()["...ey-1"]["in_flight"], 0)
+        self.assertEqual(self.client.key_usage()["...ey-1"]["errors"], 1)
+
+    def test_limiter_wait_releases_key(self, mock_send, mock_sleep):
+        """
+        Test whether a key is given back when the wait for its limiter raises
+        """
+        pool = KeyPool(["wait-key-1"])
+        pool.limiters["wait-key-1"].backoff(60)
+        mock_sleep.side_effect = KeyboardInterrupt()
+        with self.assertRaises(KeyboardInterrupt):
+            CocClient(key_pool=pool).get_player("test-player")
+        mock_send.assert_not_called()
+        self.assertEqual(pool.usage()["...ey-1"]["in_flight"], 0)
+
+
+class TestAsyncCocClientKeyPool(unittest.TestCase):
+    """
+    Unit tests for the key pool of AsyncCocClient
+    """
+
+    def test_cancelled_wait_releases_key(self):
+        """
+        Test whether a key is given back when a request is cancelled while it
+        waits for its limiter
+        """
+        pool = KeyPool(["cancel-key-1"])
+        pool.limiters["cancel-key-1"].backoff(60)
+
+        async def cancel():
+            async with AsyncCocClient(key_pool=pool) as client:
+                task = asyncio.ensure_future(client.get_player("test-player"))
+                await asyncio.sleep(0.05)
+                self.assertEqual(pool.usage()["...ey-1"]["in_flight"], 1)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+
+        asyncio.run(cancel())
+        self.assertEqual(pool.usage()["...ey-1"]["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Testing cases for metrics.py
+"""
+
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from discord_clash_bot.api.coc import CocClient, PlayerNotFound, ServerException
+from discord_clash_bot.api.metrics import Metrics, status_class
+from discord_clash_bot.api.ratelimit import TokenBucket
+from discord_clash_bot.api.resilience import RetryPolicy
+from tests.helpers import make_response
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    Unit tests for Metrics
+    """
+
+    def setUp(self):
+        self.metrics = Metrics(buckets=(0.01, 0.1, float("inf")))
+
+    def test_status_class(self):
+        """
+        Test whether status codes are grouped by class
+        """
+        self.assertEqual(status_class(200), "2xx")
+        self.assertEqual(status_class(429), "4xx")
+        self.assertEqual(status_class(None), "error")
+
+    def test_record_response(self):
+        """
+        Test whether requests, bytes, statuses and latencies are recorded
+        """
+        self.metrics.record_response("get_player", 200, 100, 0.005)
+        self.metrics.record_response("get_player", 200, 50, 0.05)
+        self.metrics.record_response("get_player", 503, 10, 1.0)
+        self.metrics.record_response("get_clan", None, 0, 0.2)
+
+        snapshot = self.metrics.snapshot()
+        player = snapshot["get_player"]
+        self.assertEqual(player["requests"], 3)
+        self.assertEqual(player["bytes"], 160)
+        self.assertEqual(player["statuses"], {"2xx": 2, "5xx": 1})
+        self.assertEqual(player["latency"]["histogram"], {"0.01": 1, "0.1": 1, "+Inf": 1})
+        self.assertEqual(player["latency"]["p50"], 0.1)
+        self.assertAlmostEqual(player["latency"]["mean"], 0.351666, places=4)
+        self.assertEqual(snapshot["get_clan"]["statuses"], {"error": 1})
+
+    def test_record_outcome(self):
+        """
+        Test whether outcomes are counted by name
+        """
+        self.metrics.record_outcome("get_player", "ok")
+        self.metrics.record_outcome("get_player", "PlayerNotFound")
+        self.metrics.record_outcome("get_player", "ok")
+        self.assertEqual(
+            self.metrics.snapshot()["get_player"]["outcomes"], {"ok": 2, "PlayerNotFound": 1}
+        )
+
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot(), {})
+
+
+@patch("time.sleep")
+@patch("requests.Session.send")
+class TestClientMetrics(unittest.TestCase):
+    """
+    Unit tests for the metrics recorded by the clients
+    """
+
+    def setUp(self):
+        self.client = CocClient(
+            token="test-token",
+            rate_limiter=TokenBucket(burst=100),
+            retry_policy=RetryPolicy(max_retries=1),
+        )
+
+    def test_outcomes(self, mock_send, _):
+        """
+        Test whether errors of the API are distinct outcomes
+        """
+        mock_send.side_effect = [
+            make_response(200),
+            make_response(404),
+            make_response(503),
+            make_response(503),
+        ]
+        self.client.get_player("first-player")
+        with self.assertRaises(PlayerNotFound):
+            self.client.get_player("second-player")
+        with self.assertRaises(ServerException):
+            self.client.get_player("third-player")
+
+        metrics = self.client.metrics.snapshot()["get_player"]
+        self.assertEqual(metrics["requests"], 4)
+        self.assertEqual(metrics["bytes"], 4 * len(b'{"body": {}}'))
+        self.assertEqual(metrics["statuses"], {"2xx": 1, "4xx": 1, "5xx": 2})
+        self.assertEqual(
+            metrics["outcomes"], {"ok": 1, "PlayerNotFound": 1, "ServerException": 2}
+        )
+        self.assertEqual(sum(metrics["latency"]["histogram"].values()), 4)
+
+    def test_throttled_attempts(self, mock_send, _):
+        """
+        Test whether every attempt is a request but the call has one outcome
+        """
+        mock_send.side_effect = [make_response(429, {"Retry-After": "0"}), make_response(200)]
+        self.client.get_player("test-player")
+
+        metrics = self.client.metrics.snapshot()["get_player"]
+        self.assertEqual(metrics["statuses"], {"4xx": 1, "2xx": 1})
+        self.assertEqual(metrics["outcomes"], {"ok": 1})
+
+    def test_connection_error(self, mock_send, _):
+        """
+        Test whether a request without response is recorded
+        """
+        mock_send.side_effect = requests.ConnectionError()
+        with self.assertRaises(requests.ConnectionError):
+            self.client.get_player("test-player")
+
+        metrics = self.client.metrics.snapshot()["get_player"]
+        self.assertEqual(metrics["statuses"], {"error": 2})
+        self.assertEqual(metrics["outcomes"], {"ConnectionError": 2})
+
+    def test_shared_metrics(self, mock_send, _):
+        """
+        Test whether clients sharing a Metrics object aggregate their requests
+        """
+        mock_send.return_value = make_response(200)
+        metrics = Metrics()
+        for tag in ("first-player", "second-player"):
+            CocClient(token="test-token", metrics=metrics).get_player(tag)
+        self.assertEqual(metrics.snapshot()["get_player"]["requests"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Testing cases for models.py and decoding.py
+"""
+
+import json
+import sys
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+
+from discord_clash_bot.api.coc import CocClient
+from discord_clash_bot.api.decoding import decode, loads
+from discord_clash_bot.api.models import (
+    Clan,
+    ClanMember,
+    Player,
+    RaidSeason,
+    Unit,
+    War,
+    parse,
+)
+
+from .mock_responses import CLAN, CLAN_MEMBER, PLAYER, RAID_SEASON, WAR
+
+
+class TestModels(unittest.TestCase):
+    """
+    Unit tests for the API models
+    """
+
+    def test_player(self):
+        """
+        Test whether a player payload is decoded into typed attributes
+        """
+        player = Player.from_dict(PLAYER)
+        self.assertEqual(player.tag, "#2PP")
+        self.assertEqual(player.town_hall_level, 14)
+        self.assertEqual(player.clan_tag, "#2Y0YRGG0")
+        self.assertEqual(player.troops[1], Unit("Dragon", 8, 10, "home"))
+        self.assertEqual(len(player.units), 6)
+        self.assertFalse(player.heroes[0].is_max)
+
+    def test_lazy_achievements(self):
+        """
+        Test whether achievements are decoded on first access only
+        """
+        player = Player.from_dict(PLAYER)
+        self.assertIsInstance(player._achievements, list)  # pylint: disable=protected-access
+        self.assertEqual(player.achievements[0].name, "Bigger Coffers")
+        self.assertIs(player.achievements, player.achievements)
+
+    def test_slots(self):
+        """
+        Test whether models have no instance dictionary
+        """
+        player = Player.from_dict(PLAYER)
+        self.assertFalse(hasattr(player, "__dict__"))
+        with self.assertRaises(AttributeError):
+            player.unknown = 1
+        self.assertLess(sys.getsizeof(player), sys.getsizeof(PLAYER))
+
+    def test_clan(self):
+        """
+        Test whether a clan payload and its member list are decoded
+        """
+        clan = Clan.from_dict(CLAN)
+        self.assertEqual(clan.war_league, "Master League I")
+        self.assertEqual(clan.member_list[0], ClanMember.from_dict(CLAN_MEMBER))
+        self.assertEqual(clan.member_list[1].donations_received, 500)
+
+    def test_war(self):
+        """
+        Test whether a war payload is decoded with both sides
+        """
+        war = War.from_dict(WAR)
+        self.assertEqual(war.state, "inWar")
+        self.assertEqual(war.clan.stars, 20)
+        self.assertEqual(war.opponent.name, "Enemy Clan")
+        self.assertEqual(war.ends_at, datetime(2023, 5, 29, 8, tzinfo=timezone.utc))
+        self.assertEqual(war.clan.members[0]["attacks"][0]["stars"], 3)
+
+        self.assertIsNone(War.from_dict({"state": "notInWar"}).clan)
+
+    def test_raid_season(self):
+        """
+        Test whether a raid season payload is decoded
+        """
+        season = RaidSeason.from_dict(RAID_SEASON)
+        self.assertEqual(season.capital_total_loot, 250000)
+        self.assertEqual(season.members[0]["capitalResourcesLooted"], 24000)
+
+    def test_parse(self):
+        """
+        Test whether lists and pages are parsed into lists of models
+        """
+        self.assertEqual(len(parse(ClanMember, [CLAN_MEMBER, CLAN_MEMBER])), 2)
+        self.assertEqual(len(parse(ClanMember, {"items": [CLAN_MEMBER]})), 1)
+        self.assertIsInstance(parse(Player, PLAYER), Player)
+
+
+class TestDecoding(unittest.TestCase):
+    """
+    Unit tests for the decoding of responses
+    """
+
+    def test_decode(self):
+        """
+        Test whether the fast decoder decodes the raw body
+        """
+        response = Mock()
+        response.content = json.dumps({"body": PLAYER}).encode()
+        self.assertEqual(decode(response, loads), {"body": PLAYER})
+
+        response.json.return_value = {"body": {}}
+        self.assertEqual(decode(response), {"body": {}})
+
+    @patch("requests.Session.send")
+    def test_client_returns_models(self, mock_send):
+        """
+        Test whether the client returns models when asked to
+        """
+        response = Mock()
+        response.ok = True
+        response.headers = {}
+        response.content = json.dumps({"body": PLAYER}).encode()
+        mock_send.return_value = response
+
+        client = CocClient(token="test-token", json_loads=loads, as_models=True)
+        player = client.get_player("#2PP")
+
+        self.assertIsInstance(player, Player)
+        self.assertEqual(player.name, "carlitos")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+"""
+Testing cases for pagination.py
+"""
+
+import asyncio
+import unittest
+from unittest.mock import Mock, patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from discord_clash_bot.api.coc import AsyncCocClient, CocClient
+from discord_clash_bot.api.models import WarLogEntry
+from discord_clash_bot.api.pagination import (
+    aiter_items,
+    iter_items,
+    next_cursor,
+    page_items,
+    page_query,
+)
+from discord_clash_bot.api.ratelimit import TokenBucket
+from tests.helpers import async_test
+
+MEMBERS = [{"tag": f"#{index}", "name": f"member-{index}"} for index in range(7)]
+
+
+def make_page(items, after=None):
+    """Page of the API with an optional cursor to the next page"""
+    cursors = {"after": after} if after is not None else {}
+    return {"body": {"items": items, "paging": {"cursors": cursors}}}
+
+
+def page_of(limit, after):
+    """Page of MEMBERS starting at the given cursor"""
+    start = int(after or 0)
+    end = start + int(limit)
+    return make_page(MEMBERS[start:end], str(end) if end < len(MEMBERS) else None)
+
+
+async def handle_members(request: web.Request) -> web.Response:
+    """Mock clan members endpoint with cursors"""
+    page = page_of(request.query["limit"], request.query.get("after"))
+    return web.json_response(page)
+
+
+class TestPages(unittest.TestCase):
+    """
+    Unit tests for the page helpers
+    """
+
+    def test_page_query(self):
+        """
+        Test whether the cursor is only sent past the first page
+        """
+        self.assertEqual(page_query(10), {"limit": 10})
+        self.assertEqual(page_query(10, "abc"), {"limit": 10, "after": "abc"})
+
+    def test_page_items_and_cursor(self):
+        """
+        Test whether items and cursors are read from pages and plain lists
+        """
+        page = make_page([1, 2], "abc")
+        self.assertEqual(page_items(page), [1, 2])
+        self.assertEqual(next_cursor(page), "abc")
+        self.assertIsNone(next_cursor(make_page([1])))
+        self.assertEqual(page_items({"body": [1]}), [1])
+        self.assertIsNone(next_cursor({"body": [1]}))
+        self.assertEqual(next_cursor({"body": [1], "paging": {"cursors": {"after": "x"}}}), "x")
+
+    def test_iter_items(self):
+        """
+        Test whether every page is requested until there is no cursor
+        """
+        fetch_page = Mock(side_effect=lambda after: page_of(3, after))
+        self.assertEqual(list(iter_items(fetch_page)), MEMBERS)
+        self.assertEqual(fetch_page.call_count, 3)
+
+    def test_iter_items_limit(self):
+        """
+        Test whether no page is requested past the limit
+        """
+        fetch_page = Mock(side_effect=lambda after: page_of(3, after))
+        self.assertEqual(list(iter_items(fetch_page, limit=3)), MEMBERS[:3])
+        self.assertEqual(fetch_page.call_count, 1)
+
+    @async_test
+    async def test_aiter_items_prefetch(self):
+        """
+        Test whether the next page is requested before the current one is consumed
+        """
+        requested = []
+
+        async def fetch_page(after):
+            requested.append(after)
+            return page_of(3, after)
+
+        items = aiter_items(fetch_page)
+        self.assertEqual(await items.__anext__(), MEMBERS[0])
+        await asyncio.sleep(0)
+        self.assertEqual(requested, [None, "3"])
+
+        self.assertEqual([item async for item in items], MEMBERS[1:])
+        self.assertEqual(requested, [None, "3", "6"])
+
+    @async_test
+    async def test_aiter_items_without_prefetch(self):
+        """
+        Test whether pages are requested on demand without prefetch
+        """
+        requested = []
+
+        async def fetch_page(after):
+            requested.append(after)
+            return page_of(3, after)
+
+        items = aiter_items(fetch_page, prefetch=False)
+        await items.__anext__()
+        await asyncio.sleep(0)
+        self.assertEqual(requested, [None])
+        await items.aclose()
+
+    @async_test
+    async def test_aiter_items_limit(self):
+        """
+        Test whether iteration stops at the limit without requesting more pages
+        """
+        fetch_page = Mock(side_effect=lambda after: asyncio.sleep(0, page_of(3, after)))
+        self.assertEqual([item async for item in aiter_items(fetch_page, limit=2)], MEMBERS[:2])
+        self.assertEqual(fetch_page.call_count, 1)
+
+
+class TestClientPagination(unittest.TestCase):
+    """
+    Unit tests for the iterators of the clients
+    """
+
+    @patch("requests.Session.send")
+    def test_sync_iterator(self, mock_send):
+        """
+        Test whether the synchronous client sends the cursors of every page
+        """
+
+        def send(request):
+            query = dict(pair.split("=") for pair in request.url.split("?")[1].split("&"))
+            response = Mock()
+            response.ok = True
+            response.headers = {}
+            response.json.return_value = page_of(query["limit"], query.get("after"))
+            return response
+
+        mock_send.side_effect = send
+        client = CocClient(token="test-token", rate_limiter=TokenBucket(burst=100))
+        members = list(client.iter_clan_members("test-clan", page_size=4))
+
+        self.assertEqual(members, MEMBERS)
+        self.assertIn("limit=4&after=4", mock_send.call_args_list[1][0][0].url)
+
+    @patch("requests.Session.send")
+    def test_war_log_models(self, mock_send):
+        """
+        Test whether pages keep their cursors when models are returned
+        """
+        response = Mock()
+        response.ok = True
+        response.headers = {}
+        response.json.return_value = make_page([{"result": "win", "teamSize": 15}])
+        mock_send.return_value = response
+
+        client = CocClient(token="test-token", as_models=True)
+        entries = list(client.iter_war_log("test-clan"))
+        self.assertEqual(entries, [WarLogEntry("win", team_size=15)])
+
+    @async_test
+    async def test_async_iterator(self):
+        """
+        Test whether the asynchronous client streams every page of a server
+        """
+        app = web.Application()
+        app.router.add_get("/v1/clans/{tag}/members", handle_members)
+        server = TestServer(app)
+        await server.start_server()
+
+        async with AsyncCocClient(token="test-token") as client:
+            client.base_url = str(server.make_url("/v1/"))
+            members = [
+                member async for member in client.iter_clan_members("ABC", page_size=2)
+            ]
+            first = [member async for member in client.iter_clan_members("ABC", limit=1)]
+        await server.close()
+
+        self.assertEqual(members, MEMBERS)
+        self.assertEqual(first, MEMBERS[:1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Testing cases for priority.py and the priority classes of the rate limiter
+"""
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from discord_clash_bot.api.coc import AsyncCocClient, CocClient
+from discord_clash_bot.api.keys import KeyPool
+from discord_clash_bot.api.priority import Priority, current_priority, request_priority
+from discord_clash_bot.api.ratelimit import TokenBucket
+from tests.helpers import FakeClock, async_test, make_response
+
+
+class TestRequestPriority(unittest.TestCase):
+    """
+    Unit tests for the priority class of the running code
+    """
+
+    def test_scopes(self):
+        """
+        Test whether priority classes nest and are restored
+        """
+        self.assertIs(current_priority(), Priority.INTERACTIVE)
+        with request_priority(Priority.BULK):
+            self.assertIs(current_priority(), Priority.BULK)
+            with request_priority(Priority.POLLING):
+                self.assertIs(current_priority(), Priority.POLLING)
+            self.assertIs(current_priority(), Priority.BULK)
+        self.assertIs(current_priority(), Priority.INTERACTIVE)
+
+    @async_test
+    async def test_tasks_inherit(self):
+        """
+        Test whether tasks created in a scope keep its priority class
+        """
+
+        async def priority():
+            await asyncio.sleep(0)
+            return current_priority()
+
+        with request_priority(Priority.POLLING):
+            task = asyncio.ensure_future(priority())
+        self.assertIs(await task, Priority.POLLING)
+
+
+class TestPriorityClasses(unittest.TestCase):
+    """
+    Unit tests for the priority classes of TokenBucket
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(rate=1, burst=4, clock=self.clock, reserved=0.5)
+
+    def test_reserved_share(self):
+        """
+        Test whether background requests leave the reserved share to interactive ones
+        """
+        self.assertEqual(self.bucket.floor, 2)
+        self.assertEqual(self.bucket.try_reserve(Priority.BULK), 0)
+        self.assertEqual(self.bucket.try_reserve(Priority.BULK), 0)
+        self.assertEqual(self.bucket.try_reserve(Priority.BULK), 1.0)
+
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertEqual(self.bucket.try_reserve(Priority.POLLING), 3.0)
+
+    def test_backoff(self):
+        """
+        Test whether background requests wait for a backoff without a token
+        """
+        self.bucket.backoff(5)
+        self.assertEqual(self.bucket.try_reserve(Priority.BULK), 5)
+        self.assertEqual(self.bucket.tokens, 0)
+
+    @patch("time.sleep")
+    def test_stats(self, mock_sleep):
+        """
+        Test whether acquisitions and waits are counted by priority class
+        """
+        mock_sleep.side_effect = self.clock.sleep
+        for _ in range(3):
+            self.bucket.acquire(Priority.BULK)
+        self.bucket.acquire()
+
+        stats = self.bucket.stats()
+        self.assertEqual(stats["acquired"], 4)
+        bulk = stats["priorities"]["bulk"]
+        self.assertEqual(bulk["acquired"], 3)
+        self.assertEqual(bulk["delayed"], 1)
+        self.assertEqual(bulk["wait_time"], 1.0)
+        self.assertEqual(bulk["max_waiting"], 1)
+        self.assertEqual(bulk["waiting"], 0)
+        self.assertEqual(stats["priorities"]["interactive"]["acquired"], 1)
+
+    @async_test
+    async def test_priority_order(self):
+        """
+        Test whether waiting requests are served by priority class
+        """
+        bucket = TokenBucket(rate=50, burst=1)
+        served = []
+
+        async def request(priority, name):
+            await bucket.acquire_async(priority)
+            served.append(name)
+
+        await asyncio.gather(
+            *(request(Priority.BULK, f"bulk{index}") for index in range(3)),
+            *(request(Priority.POLLING, f"poll{index}") for index in range(2)),
+            request(Priority.INTERACTIVE, "interactive"),
+        )
+        self.assertEqual(served[:2], ["bulk0", "interactive"])
+        self.assertEqual(sorted(served[2:4]), ["poll0", "poll1"])
+        self.assertEqual(sorted(served[4:]), ["bulk1", "bulk2"])
+        self.assertEqual(bucket.stats()["priorities"]["polling"]["max_waiting"], 2)
+
+
+@patch("requests.Session.send")
+class TestClientPriority(unittest.TestCase):
+    """
+    Unit tests for the priority classes of the requests of the clients
+    """
+
+    def test_request_priority(self, mock_send):
+        """
+        Test whether requests and bulk lookups draw tokens with the current priority
+        """
+        mock_send.return_value = make_response()
+        client = CocClient(token="test-token", rate_limiter=TokenBucket(burst=100))
+        client.get_player("first-player")
+        with request_priority(Priority.BULK):
+            client.get_players(["second-player", "third-player"])
+
+        stats = client.queue_stats()
+        self.assertEqual(stats["interactive"]["acquired"], 1)
+        self.assertEqual(stats["bulk"]["acquired"], 2)
+        self.assertEqual(stats["polling"]["acquired"], 0)
+
+    def test_key_pool(self, _):
+        """
+        Test whether the queues of the keys of a pool are summed
+        """
+        pool = KeyPool(["priority-key-a", "priority-key-b"])
+        for limiter in pool.limiters.values():
+            limiter.acquire(Priority.POLLING)
+        client = AsyncCocClient(key_pool=pool)
+        self.assertEqual(client.queue_stats()["polling"]["acquired"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Testing cases for ratelimit.py
+"""
+
+import unittest
+from unittest.mock import patch
+
+from discord_clash_bot.api.base_client import NotOkException
+from discord_clash_bot.api.coc import AsyncCocClient, CocClient
+from discord_clash_bot.api.ratelimit import (
+    DEFAULT_RETRY_AFTER,
+    TokenBucket,
+    get_rate_limiter,
+    parse_retry_after,
+)
+from tests.helpers import FakeClock, make_response
+
+
+class TestTokenBucket(unittest.TestCase):
+    """
+    Unit tests for TokenBucket
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(rate=2, burst=2, clock=self.clock)
+
+    def test_burst_then_wait(self):
+        """
+        Test whether the burst is served without waiting and the rest is paced
+        """
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertEqual(self.bucket.reserve(), 0.5)
+        self.assertEqual(self.bucket.reserve(), 1.0)
+
+        stats = self.bucket.stats()
+        self.assertEqual(stats["acquired"], 4)
+        self.assertEqual(stats["delayed"], 2)
+        self.assertEqual(stats["wait_time"], 1.5)
+        self.assertEqual(stats["max_wait"], 1.0)
+
+    def test_refill(self):
+        """
+        Test whether tokens are refilled with time, up to the burst
+        """
+        self.bucket.reserve()
+        self.bucket.reserve()
+        self.clock.now = 100
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertEqual(self.bucket.reserve(), 0.5)
+
+    def test_backoff(self):
+        """
+        Test whether a backoff delays every caller
+        """
+        self.bucket.backoff(5)
+        self.assertEqual(self.bucket.reserve(), 5)
+        self.assertEqual(self.bucket.stats()["throttled"], 1)
+
+    def test_parse_retry_after(self):
+        """
+        Test the parsing of Retry-After headers
+        """
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertEqual(parse_retry_after(None), DEFAULT_RETRY_AFTER)
+        self.assertEqual(parse_retry_after("soon"), DEFAULT_RETRY_AFTER)
+
+
+class TestSharedRateLimiter(unittest.TestCase):
+    """
+    Unit tests for the limiter shared by the clients
+    """
+
+    def test_clients_share_limiter(self):
+        """
+        Test whether every client of a token draws from the same limiter
+        """
+        sync_client = CocClient(token="shared-token")
+        async_client = AsyncCocClient(token="shared-token")
+        other_client = CocClient(token="other-token")
+
+        self.assertIs(sync_client.rate_limiter, get_rate_limiter("shared-token"))
+        self.assertIs(async_client.rate_limiter, sync_client.rate_limiter)
+        self.assertIsNot(other_client.rate_limiter, sync_client.rate_limiter)
+
+    def test_configure_limiter(self):
+        """
+        Test whether the limiter of a token can be reconfigured
+        """
+        limiter = get_rate_limiter("configured-token", rate=5, burst=7)
+        self.assertEqual((limiter.rate, limiter.burst), (5, 7))
+        self.assertIs(get_rate_limiter("configured-token", rate=1), limiter)
+        self.assertEqual((limiter.rate, limiter.burst), (1, 7))
+
+    @patch("time.sleep")
+    @patch("requests.Session.send")
+    def test_too_many_requests_backs_off(self, mock_send, mock_sleep):
+        """
+        Test whether a 429 backs off the limiter and retries the request
+        """
+        mock_send.side_effect = [make_response(429, {"Retry-After": "2"}), make_response(200)]
+        client = CocClient(token="test-token", rate_limiter=TokenBucket())
+
+        self.assertEqual(client.get_player("test-player"), {"name": "test-name"})
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertEqual(client.rate_limiter.stats()["throttled"], 1)
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 2, places=1)
+
+    @patch("time.sleep")
+    @patch("requests.Session.send")
+    def test_too_many_requests_retries_exhausted(self, mock_send, _):
+        """
+        Test whether a persistent 429 raises after the configured retries
+        """
+        mock_send.return_value = make_response(429)
+        client = CocClient(
+            token="test-token", rate_limiter=TokenBucket(), max_throttle_retries=2
+        )
+
+        with self.assertRaises(NotOkException):
+            client.get_player("test-player")
+        self.assertEqual(mock_send.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
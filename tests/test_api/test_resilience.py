@@ -0,0 +1,161 @@
+"""
+Testing cases for resilience.py
+"""
+
+import unittest
+from unittest.mock import patch
+
+from discord_clash_bot.api.cache import ResponseCache
+from discord_clash_bot.api.coc import CocClient, PlayerNotFound, ServerException
+from discord_clash_bot.api.ratelimit import TokenBucket
+from discord_clash_bot.api.resilience import (
+    BreakerState,
+    CircuitBreaker,
+    CircuitOpen,
+    RetryPolicy,
+)
+from tests.helpers import FakeClock, make_response
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """
+    Unit tests for RetryPolicy
+    """
+
+    def test_delay(self):
+        """
+        Test whether the delay grows exponentially up to the maximum
+        """
+        policy = RetryPolicy(base_delay=1, max_delay=5, rand=lambda: 1.0)
+        self.assertEqual([policy.delay(n) for n in range(4)], [1, 2, 4, 5])
+
+        policy = RetryPolicy(base_delay=1, rand=lambda: 0.5)
+        self.assertEqual(policy.delay(2), 2)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """
+    Unit tests for CircuitBreaker
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        """
+        Test whether consecutive failures open the circuit
+        """
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, BreakerState.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.snapshot()["short_circuited"], 1)
+
+    def test_success_resets_failures(self):
+        """
+        Test whether a success resets the count of failures
+        """
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, BreakerState.CLOSED)
+
+    def test_half_open_probe(self):
+        """
+        Test whether a single probe is allowed after the reset timeout
+        """
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.assertEqual(self.breaker.state, BreakerState.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, BreakerState.OPEN)
+        self.assertEqual(self.breaker.retry_in, 10)
+
+        self.clock.now = 20
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, BreakerState.CLOSED)
+
+
+@patch("time.sleep")
+@patch("requests.Session.send")
+class TestCocClientResilience(unittest.TestCase):
+    """
+    Unit tests for the retries and circuit breakers of CocClient
+    """
+
+    def setUp(self):
+        self.client = CocClient(
+            token="test-token",
+            rate_limiter=TokenBucket(burst=100),
+            retry_policy=RetryPolicy(max_retries=2),
+            failure_threshold=3,
+        )
+
+    def test_retry_server_error(self, mock_send, mock_sleep):
+        """
+        Test whether a 503 is retried with backoff
+        """
+        mock_send.side_effect = [make_response(503), make_response(200)]
+        self.assertEqual(self.client.get_war("test-clan"), {"name": "test-name"})
+        self.assertEqual(mock_send.call_count, 2)
+        mock_sleep.assert_called_once()
+
+    def test_post_is_not_retried(self, mock_send, _):
+        """
+        Test whether non idempotent requests are not retried
+        """
+        mock_send.return_value = make_response(503)
+        with self.assertRaises(ServerException):
+            self.client.post_verify_player("test-player", "test-token")
+        self.assertEqual(mock_send.call_count, 1)
+
+    def test_not_found_is_not_a_failure(self, mock_send, _):
+        """
+        Test whether a 404 is not retried nor counted by the breaker
+        """
+        mock_send.return_value = make_response(404)
+        for _ in range(5):
+            with self.assertRaises(PlayerNotFound):
+                self.client.get_player("test-player")
+        self.assertEqual(mock_send.call_count, 5)
+        self.assertEqual(self.client.breaker_states()["get_player"]["state"], "closed")
+
+    def test_maintenance_opens_circuit(self, mock_send, _):
+        """
+        Test whether a maintenance break opens the circuit and short-circuits calls
+        """
+        mock_send.return_value = make_response(503)
+        with self.assertRaises(ServerException):
+            self.client.get_war("test-clan")
+        self.assertEqual(mock_send.call_count, 3)
+
+        with self.assertRaises(CircuitOpen):
+            self.client.get_war("test-clan")
+        self.assertEqual(mock_send.call_count, 3)
+        self.assertEqual(self.client.breaker_states()["get_war"]["state"], "open")
+
+    def test_serve_stale_while_open(self, mock_send, _):
+        """
+        Test whether a stale cached result is served while the API is down
+        """
+        clock = FakeClock()
+        self.client.cache = ResponseCache(clock=clock)
+        mock_send.return_value = make_response(200, {"Cache-Control": "max-age=1"})
+        self.client.get_war("test-clan")
+
+        clock.now = 1000
+        mock_send.return_value = make_response(503)
+        self.assertEqual(self.client.get_war("test-clan"), {"name": "test-name"})
+        self.assertEqual(self.client.get_war("test-clan"), {"name": "test-name"})
+        self.assertEqual(mock_send.call_count, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
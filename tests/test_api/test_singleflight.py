@@ -0,0 +1,132 @@
+"""
+Testing cases for singleflight.py
+"""
+
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, Mock
+
+from discord_clash_bot.api.coc import AsyncCocClient, ClanNotFound
+from discord_clash_bot.api.singleflight import AsyncSingleFlight, SingleFlight
+from tests.helpers import async_test
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Unit tests for the thread single flight
+    """
+
+    def test_concurrent_calls_are_collapsed(self):
+        """
+        Test whether threads asking for the same key share one call
+        """
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow_call():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(flights.do, "key", slow_call) for _ in range(5)]
+            while flights.stats()["collapsed"] < 4:
+                threading.Event().wait(0.01)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(results, ["result"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.stats(), {"calls": 1, "collapsed": 4, "in_flight": 0})
+
+    def test_exception_is_raised(self):
+        """
+        Test whether the exception of a call is raised and the key released
+        """
+        flights = SingleFlight()
+        with self.assertRaises(ValueError):
+            flights.do("key", Mock(side_effect=ValueError))
+        self.assertEqual(flights.do("key", lambda: 1), 1)
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+    """
+    Unit tests for the asyncio single flight
+    """
+
+    @async_test
+    async def test_concurrent_calls_are_collapsed(self):
+        """
+        Test whether coroutines asking for the same key share one call
+        """
+        flights = AsyncSingleFlight()
+        call = AsyncMock(return_value="result")
+
+        results = await asyncio.gather(*(flights.do("key", call) for _ in range(10)))
+
+        self.assertEqual(results, ["result"] * 10)
+        call.assert_awaited_once()
+        self.assertEqual(flights.stats()["collapsed"], 9)
+        self.assertEqual(flights.stats()["in_flight"], 0)
+
+    @async_test
+    async def test_exception_is_shared(self):
+        """
+        Test whether every caller receives the exception of the call
+        """
+        flights = AsyncSingleFlight()
+        call = AsyncMock(side_effect=ClanNotFound)
+
+        results = await asyncio.gather(
+            *(flights.do("key", call) for _ in range(3)), return_exceptions=True
+        )
+
+        self.assertTrue(all(isinstance(result, ClanNotFound) for result in results))
+        call.assert_awaited_once()
+
+    @async_test
+    async def test_cancelled_caller(self):
+        """
+        Test whether cancelling the first caller does not cancel the others
+        """
+        flights = AsyncSingleFlight()
+
+        async def slow_call():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        first = asyncio.ensure_future(flights.do("key", slow_call))
+        second = asyncio.ensure_future(flights.do("key", slow_call))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, "result")
+        self.assertTrue(first.cancelled())
+
+    @async_test
+    async def test_client_coalesces_requests(self):
+        """
+        Test whether concurrent identical lookups of the client send one request
+        """
+        client = AsyncCocClient(token="test-token")
+        response = Mock()
+        response.headers = {}
+        response.json.return_value = {"body": {"state": "inWar"}}
+
+        async def send_request(*_, **__):
+            await asyncio.sleep(0.01)
+            return response
+
+        client.send_request = AsyncMock(side_effect=send_request)
+        wars = await asyncio.gather(*(client.get_war("test-clan") for _ in range(20)))
+
+        self.assertEqual(wars, [{"state": "inWar"}] * 20)
+        client.send_request.assert_awaited_once()
+        self.assertEqual(client.flights.stats()["collapsed"], 19)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Testing cases for tags.py
+"""
+
+import unittest
+from unittest.mock import patch
+
+from discord_clash_bot.api.coc import CocClient, PlayerNotFound
+from discord_clash_bot.api.endpoints import Endpoint
+from discord_clash_bot.api.ratelimit import TokenBucket
+from discord_clash_bot.api.tags import (
+    InvalidTag,
+    encode_tag,
+    is_valid_tag,
+    normalize_tag,
+)
+from tests.helpers import make_response
+
+
+class TestTags(unittest.TestCase):
+    """
+    Unit tests for the tag helpers
+    """
+
+    def test_normalize_tag(self):
+        """
+        Test whether tags are upper cased, fixed and prefixed with #
+        """
+        self.assertEqual(normalize_tag("#2pp"), "#2PP")
+        self.assertEqual(normalize_tag(" 2ppo "), "#2PP0")
+        self.assertEqual(normalize_tag("%232PP"), "#2PP")
+        self.assertEqual(normalize_tag("##2YLQ"), "#2YLQ")
+
+    def test_invalid_tags(self):
+        """
+        Test whether tags out of the alphabet or with a wrong length are rejected
+        """
+        for tag in ("#1DSAsqwr", "#2P", "", "#2PP2PP2PP2PP2", "test-player"):
+            with self.assertRaises(InvalidTag):
+                normalize_tag(tag)
+            self.assertFalse(is_valid_tag(tag))
+        self.assertTrue(is_valid_tag("#2pp"))
+
+    def test_encode_tag(self):
+        """
+        Test whether the # is encoded instead of starting a fragment
+        """
+        self.assertEqual(encode_tag("#2PP"), "%232PP")
+
+
+@patch("requests.Session.send")
+class TestCocClientTags(unittest.TestCase):
+    """
+    Unit tests for the tag validation and negative cache of CocClient
+    """
+
+    def setUp(self):
+        self.client = CocClient(
+            token="test-token",
+            rate_limiter=TokenBucket(burst=100),
+            validate_tags=True,
+            not_found_ttl=60,
+        )
+
+    def test_tag_is_encoded(self, mock_send):
+        """
+        Test whether the normalized tag is sent encoded in the path
+        """
+        mock_send.return_value = make_response(200)
+        self.client.get_player("#2pp")
+        self.assertTrue(mock_send.call_args[0][0].url.endswith("/players/%232PP"))
+
+    def test_malformed_tag_is_not_requested(self, mock_send):
+        """
+        Test whether a malformed tag raises without a request
+        """
+        with self.assertRaises(PlayerNotFound):
+            self.client.get_player("#1DSAsqwr")
+        mock_send.assert_not_called()
+
+        endpoint = Endpoint("get_label", "labels/{label_tag}")
+        with self.assertRaises(InvalidTag):
+            self.client.call(endpoint, {"label_tag": "bad"})
+
+    def test_not_found_is_remembered(self, mock_send):
+        """
+        Test whether a tag answered with a 404 is not requested again
+        """
+        mock_send.return_value = make_response(404)
+        for tag in ("#2PP", "#2pp", "2PP"):
+            with self.assertRaises(PlayerNotFound):
+                self.client.get_player(tag)
+        self.assertEqual(mock_send.call_count, 1)
+
+        mock_send.return_value = make_response(200)
+        self.client.not_found.clear()
+        self.assertEqual(self.client.get_player("#2PP"), {"name": "test-name"})
+
+    def test_validation_is_optional(self, mock_send):
+        """
+        Test whether tags are only encoded when they are not validated
+        """
+        mock_send.return_value = make_response(200)
+        client = CocClient(token="test-token", rate_limiter=TokenBucket(burst=100))
+        client.get_player("test-player")
+        self.assertTrue(mock_send.call_args[0][0].url.endswith("/players/test-player"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+"""
+Testing cases for database.py
+"""
+
+import unittest
+
+from discord_clash_bot.bench.database import run_db_benchmark
+from discord_clash_bot.bench.runner import format_report
+
+
+class TestDatabaseBenchmark(unittest.TestCase):
+    """
+    Unit tests for the database benchmark
+    """
+
+    def test_run_db_benchmark(self):
+        """
+        Test whether reads and writes of both connections are measured
+        """
+        results = run_db_benchmark(players=60, readers=2, writers=1, reads=10, batch=20)
+
+        self.assertEqual(
+            [result.name for result in results],
+            ["reads default", "writes default", "reads wal", "writes wal"],
+        )
+        for result in results[::2]:
+            self.assertEqual(result.requests, 20)
+            self.assertEqual(result.errors, 0)
+        self.assertEqual(len(format_report(results).splitlines()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
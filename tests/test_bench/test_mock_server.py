@@ -0,0 +1,133 @@
+"""
+Testing cases for mock_server.py
+"""
+
+import unittest
+
+from discord_clash_bot.api.base_client import NotOkException
+from discord_clash_bot.api.coc import ClanNotFound, CocClient, PlayerNotFound, ServerException
+from discord_clash_bot.api.models import Clan, Player
+from discord_clash_bot.api.ratelimit import TokenBucket
+from discord_clash_bot.api.resilience import RetryPolicy
+from discord_clash_bot.api.tags import is_valid_tag
+from discord_clash_bot.bench.mock_server import MockApi, MockConfig, MockServer, synthetic_tag
+
+
+class TestMockApi(unittest.TestCase):
+    """
+    Unit tests for the synthetic payloads
+    """
+
+    def setUp(self):
+        self.api = MockApi(MockConfig(players=200, clans=4))
+
+    def test_synthetic_tags(self):
+        """
+        Test whether synthetic tags are valid and unique
+        """
+        tags = [synthetic_tag(index) for index in range(1000)]
+        self.assertEqual(len(set(tags)), 1000)
+        self.assertTrue(all(is_valid_tag(tag) for tag in tags))
+
+    def test_payloads(self):
+        """
+        Test whether payloads are deterministic and decode into models
+        """
+        tag = self.api.player_tags[5]
+        self.assertEqual(self.api.player(tag), self.api.player(tag))
+        player = Player.from_dict(self.api.player(tag))
+        self.assertEqual(player.clan_tag, self.api.clan_of(tag))
+        self.assertEqual(len(player.heroes), 4)
+
+        clan = Clan.from_dict(self.api.clan(player.clan_tag))
+        self.assertIn(tag, [member.tag for member in clan.member_list])
+        self.assertEqual(len(clan.member_list), 50)
+
+        self.assertIsNone(self.api.player("#2PP"))
+        self.assertIsNone(self.api.war(tag))
+
+    def test_without_clans(self):
+        """
+        Test whether players of an API without clans have no clan
+        """
+        api = MockApi(MockConfig(players=10, clans=0))
+        payload = api.player(api.player_tags[0])
+        self.assertNotIn("clan", payload)
+        self.assertIsNone(Player.from_dict(payload).clan_tag)
+        self.assertEqual(api.member(api.player_tags[0], 1)["tag"], api.player_tags[0])
+
+
+class TestMockServer(unittest.TestCase):
+    """
+    Unit tests for the mock API served to the clients
+    """
+
+    def make_client(self, server):
+        """Client of the mock API without rate limit nor retries"""
+        client = CocClient(
+            token="test-token",
+            rate_limiter=TokenBucket(burst=1000),
+            retry_policy=RetryPolicy(max_retries=0),
+        )
+        client.base_url = server.url
+        return client
+
+    def test_endpoints(self):
+        """
+        Test whether every endpoint of the client is served
+        """
+        with MockServer(MockConfig(players=100, clans=2)) as server:
+            client = self.make_client(server)
+            tag = server.api.player_tags[0]
+            clan_tag = server.api.clan_tags[0]
+
+            self.assertEqual(client.get_player(tag)["tag"], tag)
+            self.assertEqual(client.get_clan(clan_tag)["tag"], clan_tag)
+            self.assertIn(client.get_war(clan_tag)["state"], ("preparation", "inWar", "warEnded"))
+            self.assertEqual(len(list(client.iter_clan_members(clan_tag, page_size=20))), 50)
+            self.assertEqual(len(list(client.iter_war_log(clan_tag, page_size=10))), 48)
+            self.assertEqual(len(list(client.iter_capital_raidseasons(clan_tag, limit=5))), 5)
+            self.assertTrue(client.post_verify_player(tag, "valid-token"))
+
+            with self.assertRaises(PlayerNotFound):
+                client.get_player("#2PP")
+            with self.assertRaises(ClanNotFound):
+                client.get_clan("#2PP")
+            client.close()
+
+    def test_cache_control(self):
+        """
+        Test whether responses carry the configured max-age
+        """
+        with MockServer(MockConfig(players=10, clans=1, max_age=30)) as server:
+            client = self.make_client(server)
+            tag = server.api.player_tags[0]
+            client.get_player(tag)
+            client.get_player(tag)
+            self.assertAlmostEqual(client.cache.ttl(("get_player", tag)), 30, delta=1)
+            self.assertEqual(server.stats, {200: 1})
+            client.close()
+
+    def test_errors(self):
+        """
+        Test whether the configured error and throttle rates are served
+        """
+        config = MockConfig(players=10, clans=1, error_rate=1.0)
+        with MockServer(config) as server:
+            client = self.make_client(server)
+            with self.assertRaises(ServerException):
+                client.get_player(server.api.player_tags[0])
+            client.close()
+
+        config = MockConfig(players=10, clans=1, throttle_rate=1.0, retry_after=0)
+        with MockServer(config) as server:
+            client = self.make_client(server)
+            client.max_throttle_retries = 1
+            with self.assertRaises(NotOkException):
+                client.get_player(server.api.player_tags[0])
+            self.assertEqual(server.stats, {429: 2})
+            client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
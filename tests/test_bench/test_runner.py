@@ -0,0 +1,71 @@
+"""
+Testing cases for runner.py
+"""
+
+import unittest
+
+from discord_clash_bot.bench.mock_server import MockConfig
+from discord_clash_bot.bench.runner import (
+    BenchResult,
+    format_report,
+    lookup_tags,
+    percentile,
+    run_benchmark,
+)
+
+
+class TestRunner(unittest.TestCase):
+    """
+    Unit tests for the benchmark runner
+    """
+
+    def test_percentile(self):
+        """
+        Test whether percentiles use the nearest rank
+        """
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summary(self):
+        """
+        Test whether the summary reports the throughput and latencies in ms
+        """
+        result = BenchResult("client", elapsed=2.0, latencies=[0.01, 0.02, 0.03, 0.04])
+        summary = result.summary()
+        self.assertEqual(summary["rps"], 2.0)
+        self.assertEqual(summary["p50"], 20.0)
+        self.assertEqual(summary["p99"], 40.0)
+
+    def test_lookup_tags(self):
+        """
+        Test whether lookups cycle over the hot players, so cached runs hit
+        """
+        players = [f"#P{index}" for index in range(5000)]
+        tags = lookup_tags(players, requests=1000, hot=100)
+        self.assertEqual(len(tags), 1000)
+        self.assertEqual(set(tags), set(players[:100]))
+        self.assertEqual(lookup_tags(players[:3], requests=6, hot=100), players[:3] * 2)
+
+    def test_run_benchmark(self):
+        """
+        Test whether both clients are benchmarked against the mock API
+        """
+        config = MockConfig(players=50, clans=2, error_rate=0.1, seed=1)
+        results = run_benchmark(requests=40, concurrency=4, config=config)
+
+        self.assertEqual([result.name for result in results], ["CocClient", "AsyncCocClient"])
+        for result in results:
+            self.assertEqual(result.requests, 40)
+            self.assertGreater(result.errors, 0)
+            self.assertGreater(result.rps, 0)
+
+        report = format_report(results)
+        self.assertIn("p95", report)
+        self.assertEqual(len(report.splitlines()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Test the asynchronous database connection.
+"""
+
+import asyncio
+import inspect
+import os
+import tempfile
+import unittest
+
+from discord_clash_bot.db.async_db import AsyncDBConnection, async_url, sync_url
+from discord_clash_bot.db.db import DBConnection
+from discord_clash_bot.db.schema import Clan, Player
+from tests.helpers import async_test
+from tests.test_db.test_db import make_player
+
+
+class TestAsyncDBConnection(unittest.TestCase):
+    """Test asynchronous database connection functionality."""
+
+    def setUp(self):
+        """Set up a temporary database file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_url = f"sqlite:///{os.path.join(self.temp_dir.name, 'clash.db')}"
+
+    def tearDown(self):
+        """Clean up the temporary database file."""
+        self.temp_dir.cleanup()
+
+    def test_async_url(self):
+        """Test the asynchronous driver is picked for a database url."""
+        self.assertEqual(async_url("sqlite:///clash.db"), "sqlite+aiosqlite:///clash.db")
+        self.assertEqual(async_url("sqlite+aiosqlite://"), "sqlite+aiosqlite://")
+        self.assertEqual(sync_url("sqlite+aiosqlite:///clash.db"), "sqlite:///clash.db")
+
+    def test_same_operations(self):
+        """Test both connections have the same operations and arguments."""
+
+        def operations(cls):
+            return {
+                name: list(inspect.signature(method).parameters)
+                for name, method in inspect.getmembers(cls, inspect.isfunction)
+                if not name.startswith("_")
+            }
+
+        self.assertEqual(operations(AsyncDBConnection), operations(DBConnection))
+
+    @async_test
+    async def test_add_and_query(self):
+        """Test adding objects and querying them in separate sessions."""
+        async with AsyncDBConnection(self.db_url) as db:
+            await db.create_all()
+            await db.add(Clan(tag="#CLAN1", name="Clan 1"))
+            await db.add(
+                [
+                    Player(name="B", tag="#P2", clan_tag="#CLAN1", role="member"),
+                    Player(name="A", tag="#P1", clan_tag="#CLAN1", role="admin"),
+                ]
+            )
+
+            clan = await db.get_clan("#CLAN1")
+            self.assertEqual(clan.name, "Clan 1")
+            self.assertIsNone(await db.get_clan("#MISSING"))
+            player = await db.get_player("#P1")
+            self.assertEqual(player.role, "elder")
+            members = await db.get_clan_members("#CLAN1")
+            self.assertEqual([member.name for member in members], ["A", "B"])
+
+    @async_test
+    async def test_upserts_and_units(self):
+        """Test the bulk upserts and the unit queries."""
+        async with AsyncDBConnection(self.db_url) as db:
+            await db.create_all()
+            players = [make_player(index, level=index + 1) for index in range(3)]
+            self.assertEqual(await db.upsert_players(players), 3)
+            self.assertEqual(await db.upsert_clans({"tag": "#CLAN1", "name": "New"}), 1)
+            self.assertEqual(await db.upsert_spells(make_player(0, level=9)), 1)
+
+            units = await db.get_units("#P1")
+            self.assertEqual(len(units["troops"]), 90)
+            self.assertEqual(units["heroes"][0].level, 2)
+            self.assertEqual(
+                await db.get_unit_levels("spells", "Lightning Spell", "#CLAN1"),
+                [("#P0", 9), ("#P2", 3), ("#P1", 2)],
+            )
+            self.assertEqual(await db.get_unit_levels("spells", "Lightning Spell", "#NONE"), [])
+            self.assertEqual((await db.get_clan("#CLAN1")).name, "New")
+
+    @async_test
+    async def test_session_scope(self):
+        """Test a unit of work is rolled back when it fails."""
+        async with AsyncDBConnection.from_config({"url": self.db_url, "pool_size": 2}) as db:
+            self.assertEqual(db.engine.pool.size(), 2)
+            await db.create_all()
+            with self.assertRaises(RuntimeError):
+                async with db.session_scope() as session:
+                    session.add(Clan(tag="#CLAN1", name="Clan 1"))
+                    await session.flush()
+                    raise RuntimeError("failed unit of work")
+            self.assertIsNone(await db.get_clan("#CLAN1"))
+
+    @async_test
+    async def test_high_throughput(self):
+        """Test the upserts are awaited from the writer in WAL mode."""
+        async with AsyncDBConnection(self.db_url, high_throughput=True) as db:
+            await db.create_all()
+            await asyncio.gather(*(db.upsert_players(make_player(index)) for index in range(5)))
+            self.assertEqual(db.writer.stats()["writes"], 5)
+            self.assertEqual(len(await db.get_clan_members("#CLAN1")), 5)
+            async with db.engine.connect() as connection:
+                mode = await connection.exec_driver_sql("PRAGMA journal_mode")
+                self.assertEqual(mode.scalar(), "wal")
+
+    @async_test
+    async def test_concurrent_operations(self):
+        """Test concurrent operations each use their own session."""
+        async with AsyncDBConnection(self.db_url) as db:
+            await db.create_all()
+            await asyncio.gather(
+                *(db.upsert_players(make_player(index)) for index in range(10))
+            )
+            results = await asyncio.gather(
+                *(db.get_player(f"#P{index}") for index in range(10))
+            )
+            self.assertTrue(all(player is not None for player in results))
+            await db.drop_all()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,10 +4,14 @@ Test database connection and management.
 
 import unittest
 import tempfile
+import threading
 import os
 
-from discord_clash_bot.db.db import DBConnection
-from discord_clash_bot.db.schema import Clan, Player
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from discord_clash_bot.db.db import DBConnection, database_options
+from discord_clash_bot.db.schema import Clan, Heroe, Player, Spell, Troop
 
 
 class TestDBConnection(unittest.TestCase):
@@ -99,5 +103,220 @@ class TestDBConnection(unittest.TestCase):
         self.assertIn("#CLAN2", clan_tags)
 
 
+def make_player(index, clan_tag="#CLAN1", level=1):
+    """Player payload of the API with its units."""
+    tag = f"#P{index}"
+    return {
+        "tag": tag,
+        "name": f"Player {index}",
+        "role": "admin",
+        "warPreference": "in",
+        "clan": {"tag": clan_tag, "name": "Clan 1"},
+        "troops": [
+            {"name": f"Troop {unit}", "level": level, "village": "home"}
+            for unit in range(90)
+        ],
+        "spells": [{"name": "Lightning Spell", "level": level, "village": "home"}],
+        "heroes": [{"name": "Barbarian King", "level": level, "village": "home"}],
+    }
+
+
+class TestBulkUpsert(unittest.TestCase):
+    """Test the bulk upserts of API payloads."""
+
+    def setUp(self):
+        """Set up an in memory database counting its statements."""
+        self.db = DBConnection("sqlite://")
+        self.db.create_all()
+        self.statements = []
+        event.listen(
+            self.db.engine,
+            "before_cursor_execute",
+            lambda *args: self.statements.append(args[2]),
+        )
+
+    def test_upsert_clans(self):
+        """Test inserting and then updating clans."""
+        self.assertEqual(self.db.upsert_clans({"tag": "#CLAN1", "name": "Old"}), 1)
+        self.db.upsert_clans([{"tag": "#CLAN1", "name": "New"}, {"tag": "#CLAN2"}])
+
+        clans = {clan.tag: clan.name for clan in self.db.session.query(Clan).all()}
+        self.assertEqual(clans, {"#CLAN1": "New", "#CLAN2": None})
+
+    def test_sync_members_in_few_statements(self):
+        """Test syncing 50 members with their units in a handful of statements."""
+        players = [make_player(index) for index in range(50)]
+        self.assertEqual(self.db.upsert_players(players), 50)
+        self.assertLessEqual(len(self.statements), 8)
+
+        self.assertEqual(self.db.session.query(Player).count(), 50)
+        self.assertEqual(self.db.session.query(Troop).count(), 50 * 90)
+        self.assertEqual(self.db.session.query(Clan).count(), 1)
+        player = self.db.session.query(Player).filter_by(tag="#P0").one()
+        self.assertEqual((player.role, player.war_preference), ("elder", "in"))
+
+    def test_upsert_replaces_units(self):
+        """Test re-ingesting players updates their rows without duplicates."""
+        self.db.upsert_players([make_player(index) for index in range(3)])
+        self.db.upsert_players(make_player(0, clan_tag="#CLAN2", level=5))
+
+        player = self.db.session.query(Player).filter_by(tag="#P0").one()
+        self.assertEqual(player.clan_tag, "#CLAN2")
+        self.assertEqual(self.db.session.query(Troop).count(), 3 * 90)
+        levels = {hero.member_tag: hero.level for hero in self.db.session.query(Heroe)}
+        self.assertEqual(levels, {"#P0": 5, "#P1": 1, "#P2": 1})
+
+    def test_partial_payloads(self):
+        """Test clan member payloads set the clan and keep the units and war preference."""
+        self.db.upsert_players(make_player(0))
+        members = [{"tag": "#P0", "name": "Renamed", "role": "member"}, {"tag": "#P1"}]
+        self.db.upsert_players(members, clan_tag="#CLAN1")
+
+        players = {player.tag: player for player in self.db.session.query(Player)}
+        self.assertEqual((players["#P0"].name, players["#P0"].war_preference), ("Renamed", "in"))
+        self.assertEqual({player.clan_tag for player in players.values()}, {"#CLAN1"})
+        self.assertEqual(self.db.session.query(Clan).one().name, "Clan 1")
+        self.assertEqual(self.db.session.query(Troop).count(), 90)
+
+    def test_player_leaves_clan(self):
+        """Test a player payload without a clan clears the clan and the role."""
+        self.db.upsert_players(make_player(0))
+        payload = make_player(0)
+        del payload["clan"], payload["role"]
+        self.db.upsert_players(payload)
+
+        player = self.db.session.query(Player).filter_by(tag="#P0").one()
+        self.assertEqual((player.clan_tag, player.role), (None, None))
+        self.assertEqual(self.db.get_levels("#CLAN1").member_tags, [])
+
+    def test_upsert_units(self):
+        """Test replacing a single kind of unit."""
+        self.db.upsert_players(make_player(0), units=False)
+        self.assertEqual(self.db.session.query(Troop).count(), 0)
+
+        self.assertEqual(self.db.upsert_spells(make_player(0, level=3)), 1)
+        self.assertEqual(self.db.upsert_troops([make_player(0)]), 90)
+        self.assertEqual(self.db.upsert_heroes(make_player(0)), 1)
+        self.assertEqual(self.db.session.query(Spell).one().level, 3)
+
+    def test_queries(self):
+        """Test querying the upserted clans, players and units."""
+        self.db.upsert_players([make_player(index, level=index + 1) for index in range(3)])
+
+        self.assertEqual(self.db.get_clan("#CLAN1").name, "Clan 1")
+        self.assertIsNone(self.db.get_clan("#MISSING"))
+        self.assertEqual(self.db.get_player("#P1").role, "elder")
+        members = self.db.get_clan_members("#CLAN1")
+        self.assertEqual([member.tag for member in members], ["#P0", "#P1", "#P2"])
+        units = self.db.get_units("#P1")
+        self.assertEqual((len(units["troops"]), units["heroes"][0].level), (90, 2))
+        self.assertEqual(
+            self.db.get_unit_levels("spells", "Lightning Spell", "#CLAN1"),
+            [("#P2", 3), ("#P1", 2), ("#P0", 1)],
+        )
+
+    def test_units_updated_in_place(self):
+        """Test re-syncing a player updates its unit rows by their unique key."""
+        self.db.upsert_players(make_player(0))
+        ids = sorted(troop.id for troop in self.db.session.query(Troop))
+        self.db.upsert_troops(make_player(0, level=2))
+
+        troops = self.db.session.query(Troop).all()
+        self.assertEqual(sorted(troop.id for troop in troops), ids)
+        self.assertEqual({troop.level for troop in troops}, {2})
+        with self.assertRaises(IntegrityError):
+            self.db.add(Troop(member_tag="#P0", troop="Troop 0", level=1, village="home"))
+
+    def test_units_without_village(self):
+        """Test units of payloads without a village are home units, synced in place."""
+        payload = make_player(0)
+        payload["spells"] = [{"name": "Lightning Spell", "level": 1}]
+        self.db.upsert_spells(payload)
+        payload["spells"] = [{"name": "Lightning Spell", "level": 2}]
+        self.db.upsert_spells(payload)
+
+        spell = self.db.session.query(Spell).one()
+        self.assertEqual((spell.level, spell.village), (2, "home"))
+
+
+class TestUnitOfWork(unittest.TestCase):
+    """Test the sessions of the units of work."""
+
+    def setUp(self):
+        """Set up a temporary database file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_url = f"sqlite:///{os.path.join(self.temp_dir.name, 'clash.db')}"
+        self.db = DBConnection(self.db_url)
+        self.db.create_all()
+
+    def tearDown(self):
+        """Clean up the temporary database file."""
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_commit_and_rollback(self):
+        """Test a unit of work is committed, or rolled back when it fails."""
+        with self.db.session_scope() as session:
+            session.add(Clan(tag="#CLAN1", name="Clan 1"))
+        with self.assertRaises(RuntimeError):
+            with self.db.session_scope() as session:
+                session.add(Clan(tag="#CLAN2", name="Clan 2"))
+                raise RuntimeError("failed unit of work")
+
+        with self.db.session_scope() as session:
+            self.assertEqual([clan.tag for clan in session.query(Clan)], ["#CLAN1"])
+
+    def test_expire_on_commit(self):
+        """Test objects of a unit of work can be kept usable after it ends."""
+        with self.db.session_scope(expire_on_commit=False) as session:
+            clan = session.query(Clan).first() or Clan(tag="#CLAN1", name="Clan 1")
+            session.add(clan)
+        self.assertEqual(clan.name, "Clan 1")
+
+        clan = Clan(tag="#CLAN2", name="Clan 2")
+        self.db.add(clan)
+        self.assertEqual(clan.name, "Clan 2")
+
+    def test_identity_map_stays_empty(self):
+        """Test ingestion does not grow the long lived session."""
+        for index in range(100):
+            self.db.add(Clan(tag=f"#C{index}", name="Clan"))
+            self.db.upsert_players(make_player(index))
+        self.assertEqual(len(self.db.session.identity_map), 0)
+
+    def test_writes_create_no_session(self):
+        """Test upserting from a thread does not create a session for it."""
+        scoped = []
+
+        def upsert():
+            self.db.upsert_players(make_player(0))
+            scoped.append(self.db.session.registry.has())
+
+        thread = threading.Thread(target=upsert)
+        thread.start()
+        thread.join()
+        self.assertEqual(scoped, [False])
+
+    def test_session_per_thread(self):
+        """Test the session attribute is a different session in every thread."""
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(self.db.session()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(sessions[0], self.db.session())
+
+    def test_pool_config(self):
+        """Test the pool is configured from the database section of the secrets."""
+        config = {"url": self.db_url, "pool_size": 3, "max_overflow": 1, "expire_on_commit": False}
+        self.assertEqual(
+            database_options(config),
+            {"db_url": self.db_url, "pool_size": 3, "max_overflow": 1, "expire_on_commit": False},
+        )
+        db = DBConnection.from_config(config)
+        self.assertEqual(db.engine.pool.size(), 3)
+        self.assertFalse(db.sessionmaker.kw["expire_on_commit"])
+        db.close()
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Test the progress history of the members.
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from discord_clash_bot.db.async_db import AsyncDBConnection
+from discord_clash_bot.db.db import DBConnection
+from discord_clash_bot.db.history import SECONDS_PER_DAY, timestamp
+from discord_clash_bot.db.schema import Snapshot, Unit, UnitChange
+from tests.test_db.test_db import make_player
+
+START = 1_700_000_000
+
+
+def upgrade(payload, kind, level, index=0):
+    """Player payload with a unit of a kind at another level."""
+    units = [dict(unit) for unit in payload[kind]]
+    units[index]["level"] = level
+    return {**payload, kind: units}
+
+
+class TestHistory(unittest.TestCase):
+    """Test the snapshots and the deltas of the history."""
+
+    def setUp(self):
+        """Set up an in memory database with two clans."""
+        self.db = DBConnection("sqlite://")
+        self.db.create_all()
+        self.players = [make_player(index) for index in range(3)]
+        self.players.append(make_player(3, clan_tag="#CLAN2"))
+        self.db.upsert_players(self.players, units=False)
+
+    def tearDown(self):
+        """Close the database."""
+        self.db.close()
+
+    def count(self, table):
+        """Rows of a table."""
+        with self.db.session_scope() as session:
+            return session.query(table).count()
+
+    def test_deltas(self):
+        """Test only the levels which changed are stored."""
+        self.assertEqual(self.db.record_history(self.players, START), 4 * 92)
+        self.assertEqual(self.db.record_history(self.players, START + 60), 0)
+        self.assertEqual(self.count(Snapshot), 8)
+        self.assertEqual(self.count(Unit), 92)
+
+        upgraded = upgrade(self.players[0], "spells", 2)
+        self.assertEqual(self.db.record_history(upgraded, START + 120), 1)
+        self.assertEqual(self.db.record_history(upgraded, START + 120), 1)
+        with self.db.session_scope() as session:
+            change = session.query(UnitChange).filter_by(taken_at=START + 120).one()
+            self.assertEqual((change.previous, change.level), (1, 2))
+            snapshot = session.query(Snapshot).filter_by(taken_at=START + 120).one()
+            self.assertEqual(snapshot.changes, 1)
+        self.assertEqual(self.count(UnitChange), 4 * 92 + 1)
+
+    def test_levels_at(self):
+        """Test the level of a unit at a moment is the last one before it."""
+        self.db.record_history(self.players, START)
+        self.db.record_history(upgrade(self.players[1], "spells", 3), START + 100)
+        self.db.record_history(upgrade(self.players[1], "spells", 4), START + 200)
+
+        def levels(when, clan_tag=None):
+            return self.db.get_levels_at("spells", "Lightning Spell", when, clan_tag)
+
+        self.assertEqual(levels(START - 1), [])
+        self.assertEqual(levels(START + 99, "#CLAN1"), [("#P0", 1), ("#P1", 1), ("#P2", 1)])
+        self.assertEqual(levels(START + 150, "#CLAN1")[0], ("#P1", 3))
+        self.assertEqual(levels(START + 200)[0], ("#P1", 4))
+        self.assertEqual(len(levels(START + 200)), 4)
+        self.assertEqual(levels(datetime.fromtimestamp(START + 150, timezone.utc))[0], ("#P1", 3))
+
+    def test_upgrades(self):
+        """Test the upgrades of the last days of a clan."""
+        self.db.record_history(self.players, START)
+        self.db.record_history(upgrade(self.players[0], "heroes", 2), START + SECONDS_PER_DAY)
+        self.db.record_history(upgrade(self.players[3], "heroes", 2), START + SECONDS_PER_DAY)
+        self.db.record_history(
+            upgrade(self.players[2], "troops", 5, index=7), START + 9 * SECONDS_PER_DAY
+        )
+
+        now = START + 10 * SECONDS_PER_DAY
+        self.assertEqual(
+            self.db.get_upgrades("#CLAN1", days=7, now=now),
+            [("#P2", "troops", "Troop 7", 1, 5, START + 9 * SECONDS_PER_DAY)],
+        )
+        upgrades = self.db.get_upgrades("#CLAN1", days=30, now=now)
+        self.assertEqual([row[0] for row in upgrades], ["#P2", "#P0"])
+        self.assertEqual(len(self.db.get_upgrades("#CLAN2", days=30, now=now)), 1)
+
+    def test_compact(self):
+        """Test months of syncs cost a row per upgrade."""
+        players = self.players[:3]
+        upgrades = 0
+        for sync in range(4 * 90):
+            if sync % 40 == 39:
+                players = [upgrade(player, "troops", sync // 40 + 2) for player in players]
+                upgrades += len(players)
+            self.db.record_history(players, START + sync * SECONDS_PER_DAY // 4)
+
+        self.assertEqual(self.count(UnitChange), 3 * 92 + upgrades)
+        self.assertEqual(self.count(Snapshot), 3 * 4 * 90)
+
+    def test_timestamp(self):
+        """Test moments are converted to seconds since the epoch."""
+        self.assertEqual(timestamp(START + 0.5), START)
+        self.assertEqual(timestamp(datetime.fromtimestamp(START, timezone.utc)), START)
+        self.assertGreater(timestamp(), START)
+
+
+class TestAsyncHistory(unittest.TestCase):
+    """Test the history through the asynchronous connection."""
+
+    def setUp(self):
+        """Set up a temporary database file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_url = f"sqlite:///{os.path.join(self.temp_dir.name, 'clash.db')}"
+
+    def tearDown(self):
+        """Clean up the temporary database file."""
+        self.temp_dir.cleanup()
+
+    def test_record_and_query(self):
+        """Test recording snapshots and querying them."""
+
+        async def run():
+            async with AsyncDBConnection(self.db_url) as db:
+                await db.create_all()
+                await db.upsert_players(make_player(0), units=False)
+                await db.record_history(make_player(0), START)
+                await db.record_history(make_player(0, level=2), START + 10)
+                return (
+                    await db.get_levels_at("heroes", "Barbarian King", START + 5),
+                    await db.get_upgrades("#CLAN1", days=1, now=START + 10),
+                )
+
+        levels, upgrades = asyncio.run(run())
+        self.assertEqual(levels, [("#P0", 1)])
+        self.assertEqual(len(upgrades), 92)
+
+
+if __name__ == "__main__":
+    unittest.main()
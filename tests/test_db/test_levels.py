@@ -0,0 +1,127 @@
+"""
+Test the packed unit levels of the members.
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from sqlalchemy import event
+
+from discord_clash_bot.db.async_db import AsyncDBConnection
+from discord_clash_bot.db.db import DBConnection
+from discord_clash_bot.db.levels import LevelMatrix, decode, pack, positions, stack
+from discord_clash_bot.db.schema import PlayerLevels
+from tests.test_db.test_db import make_player
+
+
+class TestPacking(unittest.TestCase):
+    """Test packing and decoding levels."""
+
+    def test_pack_and_decode(self):
+        """Test levels are packed in the order of the catalogue."""
+        order = positions({("spells", "Rage Spell", "home"): 7, ("heroes", "Barbarian King", "home"): 3})
+        payload = {"tag": "#P0", "spells": [{"name": "Rage Spell", "level": 5, "village": "home"}]}
+        self.assertEqual(pack(payload, order), bytes([0, 5]))
+        self.assertEqual(decode(bytes([0, 5]), size=4).tolist(), [0, 5, 0, 0])
+        with self.assertRaises(OverflowError):
+            pack({"spells": [{"name": "Rage Spell", "level": 256, "village": "home"}]}, order)
+
+    def test_stack(self):
+        """Test shorter rows, packed before units were added, are padded."""
+        matrix = stack([bytes([1, 2, 3]), bytes([4])], 3)
+        np.testing.assert_array_equal(matrix, [[1, 2, 3], [4, 0, 0]])
+        self.assertEqual(stack([], 3).shape, (0, 3))
+
+    def test_level_matrix(self):
+        """Test the columns and the comparisons of a matrix."""
+        units = [("troops", "Barbarian", "home"), ("spells", "Rage Spell", "home")]
+        matrix = LevelMatrix.from_rows(units, [("#P0", bytes([3, 1])), ("#P1", bytes([5]))])
+        self.assertEqual(matrix.column("troops", "Barbarian").tolist(), [3, 5])
+        self.assertEqual(matrix.behind().tolist(), [[2, 0], [0, 1]])
+        with self.assertRaises(KeyError):
+            matrix.column("heroes", "Archer Queen")
+
+
+class TestPackedLevels(unittest.TestCase):
+    """Test storing and loading the packed levels."""
+
+    def setUp(self):
+        """Set up an in memory database counting its statements."""
+        self.db = DBConnection("sqlite://")
+        self.db.create_all()
+        players = [make_player(index, level=index + 1) for index in range(50)]
+        players.append(make_player(50, clan_tag="#CLAN2"))
+        self.db.upsert_players(players, units=False)
+        self.db.upsert_levels(players)
+        self.statements = []
+        event.listen(
+            self.db.engine,
+            "before_cursor_execute",
+            lambda *args: self.statements.append(args[2]),
+        )
+
+    def tearDown(self):
+        """Close the database."""
+        self.db.close()
+
+    def test_row_per_player(self):
+        """Test a player is stored as a single row of a byte per unit."""
+        with self.db.session_scope() as session:
+            self.assertEqual(session.query(PlayerLevels).count(), 51)
+            self.assertEqual(len(session.get(PlayerLevels, "#P0").levels), 92)
+
+    def test_clan_matrix(self):
+        """Test the levels of a clan are loaded in two statements."""
+        matrix = self.db.get_levels("#CLAN1")
+        self.assertEqual(len(self.statements), 2)
+        self.assertEqual(matrix.levels.shape, (50, 92))
+        self.assertEqual(matrix.member_tags[:2], ["#P0", "#P1"])
+        spell = matrix.column("spells", "Lightning Spell")
+        self.assertEqual(matrix.member_tags[int(spell.argmax())], "#P49")
+        self.assertEqual(int(matrix.behind().max()), 49)
+        self.assertEqual(self.db.get_levels().levels.shape, (51, 92))
+
+    def test_new_units(self):
+        """Test new units are appended and older rows padded."""
+        payload = make_player(0, level=7)
+        payload["heroes"].append({"name": "Archer Queen", "level": 9, "village": "home"})
+        self.db.upsert_levels(payload)
+
+        matrix = self.db.get_levels("#CLAN1")
+        self.assertEqual(matrix.units[-1], ("heroes", "Archer Queen", "home"))
+        self.assertEqual(matrix.column("heroes", "Archer Queen").tolist()[:2], [9, 0])
+        self.assertEqual(matrix.column("spells", "Lightning Spell").tolist()[:2], [7, 2])
+
+
+class TestAsyncPackedLevels(unittest.TestCase):
+    """Test the packed levels through the asynchronous connection."""
+
+    def setUp(self):
+        """Set up a temporary database file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_url = f"sqlite:///{os.path.join(self.temp_dir.name, 'clash.db')}"
+
+    def tearDown(self):
+        """Clean up the temporary database file."""
+        self.temp_dir.cleanup()
+
+    def test_upsert_and_get(self):
+        """Test storing and loading the levels of a clan."""
+
+        async def run():
+            async with AsyncDBConnection(self.db_url) as db:
+                await db.create_all()
+                players = [make_player(index, level=index + 1) for index in range(3)]
+                await db.upsert_players(players, units=False)
+                self.assertEqual(await db.upsert_levels(players), 3)
+                return await db.get_levels("#CLAN1")
+
+        matrix = asyncio.run(run())
+        self.assertEqual(matrix.column("heroes", "Barbarian King").tolist(), [1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Test the migrations of databases created by older schemas.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from sqlalchemy import inspect
+
+from discord_clash_bot.db.db import DBConnection
+from discord_clash_bot.db.schema import Spell, Troop
+from tests.test_db.test_db import make_player
+
+# tables of the unit tables before member_tag was a text key
+OLD_SCHEMA = """
+CREATE TABLE clan (tag VARCHAR PRIMARY KEY, name VARCHAR);
+CREATE TABLE member (
+    name VARCHAR, tag VARCHAR PRIMARY KEY, clan_tag VARCHAR REFERENCES clan (tag),
+    role VARCHAR, war_preference VARCHAR
+);
+CREATE TABLE spell (
+    id INTEGER PRIMARY KEY, member_tag INTEGER REFERENCES member (tag),
+    spell VARCHAR, level INTEGER, village VARCHAR
+);
+CREATE TABLE hero (
+    id INTEGER PRIMARY KEY, member_tag INTEGER REFERENCES member (tag),
+    hero VARCHAR, level INTEGER, village VARCHAR
+);
+CREATE TABLE troop (
+    id INTEGER PRIMARY KEY, member_tag INTEGER REFERENCES member (tag),
+    troop VARCHAR, level INTEGER, village VARCHAR
+);
+INSERT INTO member (name, tag, role) VALUES ('Player 0', '#P0', 'member');
+INSERT INTO spell (member_tag, spell, level, village) VALUES
+    ('#P0', 'Lightning Spell', 1, 'home'),
+    ('#P0', 'Lightning Spell', 4, 'home'),
+    ('#P0', 'Rage Spell', 2, 'home'),
+    ('#P0', 'Rage Spell', 3, NULL);
+INSERT INTO troop (member_tag, troop, level, village) VALUES ('#P0', 'Barbarian', 3, 'home');
+"""
+
+
+class TestMigrate(unittest.TestCase):
+    """Test migrating a clash.db of the old schema."""
+
+    def setUp(self):
+        """Set up a temporary database file with the old schema."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.temp_dir.name, "clash.db")
+        with sqlite3.connect(path) as connection:
+            connection.executescript(OLD_SCHEMA)
+        connection.close()
+        self.db = DBConnection(f"sqlite:///{path}")
+
+    def tearDown(self):
+        """Clean up the temporary database file."""
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_rebuilds_unit_tables(self):
+        """Test the unit tables get their keys and keep one row per unit."""
+        self.assertEqual(self.db.migrate(), ["troop", "spell", "hero"])
+        self.assertEqual(self.db.migrate(), [])
+
+        inspector = inspect(self.db.engine)
+        self.assertIn("member_tag", inspector.get_unique_constraints("spell")[0]["column_names"])
+        indexes = {index["name"] for index in inspector.get_indexes("troop")}
+        self.assertIn("ix_troop_troop_level", indexes)
+        member_indexes = {index["name"] for index in inspector.get_indexes("member")}
+        self.assertIn("ix_member_clan_tag", member_indexes)
+        self.assertFalse(inspector.has_table("spell_old"))
+
+        spells = {spell.spell: spell.level for spell in self.db.session.query(Spell)}
+        self.assertEqual(spells, {"Lightning Spell": 4, "Rage Spell": 3})
+        self.assertEqual({spell.village for spell in self.db.session.query(Spell)}, {"home"})
+        self.assertEqual(self.db.session.query(Troop).one().member_tag, "#P0")
+
+    def test_upserts_after_migration(self):
+        """Test re-syncing a migrated player updates its units in place."""
+        self.db.create_all()
+        self.db.upsert_players(make_player(0, level=5))
+
+        spells = self.db.session.query(Spell).filter_by(member_tag="#P0").all()
+        self.assertEqual(
+            sorted((spell.spell, spell.level) for spell in spells),
+            [("Lightning Spell", 5), ("Rage Spell", 3)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Test the high throughput profile of SQLite.
+"""
+
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+
+from discord_clash_bot.db.sqlite import SqlitePragmas, apply_pragmas, is_file_database
+
+
+class TestSqlitePragmas(unittest.TestCase):
+    """Test the pragmas run on connect."""
+
+    def setUp(self):
+        """Set up a temporary directory for the database file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_url = f"sqlite:///{os.path.join(self.temp_dir.name, 'clash.db')}"
+
+    def tearDown(self):
+        """Clean up the temporary database file."""
+        self.temp_dir.cleanup()
+
+    def test_pragmas_on_connect(self):
+        """Test every new connection runs the pragmas."""
+        engine = apply_pragmas(create_engine(self.db_url), SqlitePragmas(busy_timeout=1234))
+        with engine.connect() as connection:
+            pragmas = {
+                name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size")
+            }
+        self.assertEqual(
+            pragmas,
+            {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 1234, "cache_size": -65536},
+        )
+        engine.dispose()
+
+    def test_file_databases_only(self):
+        """Test the profile is refused for in memory and other databases."""
+        self.assertTrue(is_file_database(create_engine(self.db_url)))
+        with self.assertRaises(ValueError):
+            apply_pragmas(create_engine("sqlite://"))
+        with self.assertRaises(ValueError):
+            apply_pragmas(create_engine("sqlite:///:memory:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+"""
+Test the single writer and its group commits.
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+
+from discord_clash_bot.db.db import DBConnection, database_options
+from discord_clash_bot.db.schema import Clan, Troop
+from discord_clash_bot.db.writer import WriteQueue
+from tests.test_db.test_db import make_player
+
+
+def add_clan(connection, tag):
+    """Write inserting a clan."""
+    connection.execute(text("INSERT INTO clan (tag) VALUES (:tag)"), {"tag": tag})
+    return tag
+
+
+class TestWriteQueue(unittest.TestCase):
+    """Test the writes queued to the background thread."""
+
+    def setUp(self):
+        """Set up a temporary database file with a clan table."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.temp_dir.name, "clash.db")
+        self.engine = create_engine(f"sqlite:///{path}")
+        with self.engine.begin() as connection:
+            connection.execute(text("CREATE TABLE clan (tag VARCHAR PRIMARY KEY)"))
+        self.writer = WriteQueue(self.engine)
+
+    def tearDown(self):
+        """Clean up the writer and the temporary database file."""
+        self.writer.close()
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def clans(self):
+        """Tags of the stored clans."""
+        with self.engine.connect() as connection:
+            return sorted(connection.execute(text("SELECT tag FROM clan")).scalars())
+
+    def test_group_commit(self):
+        """Test the writes queued during a commit share the next one."""
+        started, release = threading.Event(), threading.Event()
+
+        def blocking(connection):
+            started.set()
+            release.wait()
+            return add_clan(connection, "#C0")
+
+        first = self.writer.submit(blocking)
+        started.wait()
+        futures = [self.writer.submit(add_clan, f"#C{index}") for index in range(1, 6)]
+        release.set()
+
+        self.assertEqual(first.result(), "#C0")
+        self.assertEqual([future.result() for future in futures], [f"#C{i}" for i in range(1, 6)])
+        self.assertEqual(self.writer.stats()["commits"], 2)
+        self.assertEqual(self.writer.stats()["writes"], 6)
+        self.assertEqual(len(self.clans()), 6)
+
+    def test_failing_write(self):
+        """Test a failing write of a group does not fail the others."""
+        started, release = threading.Event(), threading.Event()
+        self.writer.submit(lambda connection: started.set() or release.wait())
+        started.wait()
+        ok = self.writer.submit(add_clan, "#C1")
+        failed = self.writer.submit(add_clan, "#C1")
+        release.set()
+
+        self.assertEqual(ok.result(), "#C1")
+        with self.assertRaises(Exception):
+            failed.result()
+        self.assertEqual(self.clans(), ["#C1"])
+
+    def test_close(self):
+        """Test closing commits the queued writes and refuses new ones."""
+        futures = [self.writer.submit(add_clan, f"#C{index}") for index in range(3)]
+        self.writer.close()
+        self.assertTrue(all(future.done() for future in futures))
+        self.assertEqual(len(self.clans()), 3)
+        with self.assertRaises(RuntimeError):
+            self.writer.submit(add_clan, "#C4")
+
+    def test_close_while_submitting(self):
+        """Test every write queued while closing is committed or refused."""
+        futures, refused = [], []
+
+        def submit(thread):
+            for index in range(200):
+                try:
+                    futures.append(self.writer.submit(add_clan, f"#C{thread}-{index}"))
+                except RuntimeError:
+                    refused.append(index)
+
+        threads = [threading.Thread(target=submit, args=(thread,)) for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        self.writer.close()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(future.done() for future in futures))
+        self.assertEqual(len(futures) + len(refused), 4 * 200)
+        self.assertEqual(len(self.clans()), len(futures))
+
+    def test_close_fails_leftovers(self):
+        """Test writes left behind the end of the queue fail instead of hanging."""
+        started, release = threading.Event(), threading.Event()
+        self.writer.submit(lambda connection: started.set() or release.wait())
+        started.wait()
+        closing = threading.Thread(target=self.writer.close)
+        closing.start()
+        while self.writer.stats()["pending"] == 0:
+            closing.join(0.001)
+        leftover = Future()
+        self.writer._queue.put((add_clan, ("#C1",), leftover))  # pylint: disable=protected-access
+        release.set()
+        closing.join()
+
+        with self.assertRaises(RuntimeError):
+            leftover.result(timeout=1)
+        self.assertEqual(self.clans(), [])
+
+    @patch("threading.excepthook")
+    def test_interrupted_write(self, _):
+        """Test a write raising a BaseException fails every write instead of hanging."""
+        started, release = threading.Event(), threading.Event()
+
+        def interrupted(connection):
+            started.set()
+            release.wait()
+            raise KeyboardInterrupt
+
+        failed = self.writer.submit(interrupted)
+        started.wait()
+        queued = self.writer.submit(add_clan, "#C1")
+        release.set()
+
+        with self.assertRaises(KeyboardInterrupt):
+            failed.result(timeout=1)
+        with self.assertRaises(RuntimeError):
+            queued.result(timeout=1)
+        with self.assertRaises(RuntimeError):
+            self.writer.submit(add_clan, "#C2")
+
+
+class TestHighThroughput(unittest.TestCase):
+    """Test the high throughput mode of DBConnection."""
+
+    def setUp(self):
+        """Set up a temporary database file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_url = f"sqlite:///{os.path.join(self.temp_dir.name, 'clash.db')}"
+
+    def tearDown(self):
+        """Clean up the temporary database file."""
+        self.temp_dir.cleanup()
+
+    def test_upserts_from_threads(self):
+        """Test upserts of several threads go through the writer."""
+        config = {"url": self.db_url, "high_throughput": True}
+        self.assertTrue(database_options(config)["high_throughput"])
+        db = DBConnection.from_config(config)
+        db.create_all()
+        threads = [
+            threading.Thread(target=db.upsert_players, args=(make_player(index),))
+            for index in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(db.writer.stats()["writes"], 8)
+        with db.session_scope() as session:
+            self.assertEqual(session.query(Troop).count(), 8 * 90)
+            self.assertEqual(session.query(Clan).count(), 1)
+        db.close()
+
+    def test_default_mode(self):
+        """Test the default connection writes without a writer."""
+        db = DBConnection(self.db_url)
+        db.create_all()
+        self.assertIsNone(db.writer)
+        self.assertEqual(db.upsert_players(make_player(0)), 1)
+        db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Testing cases for events.py
+"""
+
+import copy
+import unittest
+
+from discord_clash_bot.polling.events import (
+    EventType,
+    diff_clan,
+    diff_members,
+    diff_war,
+    payload_hash,
+)
+from tests.test_api.mock_responses import CLAN, CLAN_MEMBER, WAR
+
+
+class TestEvents(unittest.TestCase):
+    """
+    Unit tests for the diffs of the payloads
+    """
+
+    def test_payload_hash(self):
+        """
+        Test whether the hash ignores the order of the keys but not the values
+        """
+        self.assertEqual(payload_hash({"a": 1, "b": [1, 2]}), payload_hash({"b": [1, 2], "a": 1}))
+        self.assertNotEqual(payload_hash({"a": 1}), payload_hash({"a": 2}))
+        self.assertNotEqual(payload_hash([1, 2]), payload_hash([2, 1]))
+
+    def test_diff_clan(self):
+        """
+        Test whether changed fields of the clan are reported, but not its members
+        """
+        new = dict(CLAN, clanLevel=21, memberList=[])
+        (event,) = diff_clan("#CLAN", CLAN, new)
+        self.assertEqual(event.type, EventType.CLAN_UPDATED)
+        self.assertEqual(event.data["changes"], {"clanLevel": {"old": 20, "new": 21}})
+        self.assertEqual(diff_clan("#CLAN", CLAN, dict(CLAN)), [])
+
+    def test_diff_members(self):
+        """
+        Test whether joined, left and promoted members are reported
+        """
+        old = [CLAN_MEMBER, {"tag": "#LEFT", "name": "left", "role": "member"}]
+        new = {
+            "items": [
+                dict(CLAN_MEMBER, role="coLeader"),
+                {"tag": "#NEW", "name": "new", "role": "member"},
+            ]
+        }
+        events = {event.type: event for event in diff_members("#CLAN", old, new)}
+
+        self.assertEqual(set(events), {
+            EventType.MEMBER_JOINED, EventType.MEMBER_LEFT, EventType.ROLE_CHANGED
+        })
+        self.assertEqual(events[EventType.MEMBER_JOINED].data["member"]["tag"], "#NEW")
+        self.assertEqual(events[EventType.MEMBER_LEFT].data["member"]["tag"], "#LEFT")
+        self.assertEqual(events[EventType.ROLE_CHANGED].data["old_role"], "admin")
+
+    def test_diff_war(self):
+        """
+        Test whether new attacks and state changes are reported
+        """
+        new = copy.deepcopy(WAR)
+        new["state"] = "warEnded"
+        attack = {"attackerTag": "#9JJ", "defenderTag": "#2PP", "stars": 2, "order": 2}
+        new["opponent"]["members"] = [{"tag": "#9JJ", "attacks": [attack]}]
+
+        events = diff_war("#CLAN", WAR, new)
+        self.assertEqual([event.type for event in events], [
+            EventType.WAR_STATE_CHANGED, EventType.NEW_ATTACK
+        ])
+        self.assertEqual(events[0].data["old_state"], "inWar")
+        self.assertEqual(events[1].data, {"side": "opponent", "attack": attack})
+
+    def test_diff_new_war(self):
+        """
+        Test whether every attack of a new war is new
+        """
+        new = copy.deepcopy(WAR)
+        new["preparationStartTime"] = "20230601T080000.000Z"
+        events = diff_war("#CLAN", WAR, new)
+        self.assertEqual([event.type for event in events], [EventType.NEW_ATTACK])
+        self.assertEqual(diff_war("#CLAN", WAR, copy.deepcopy(WAR)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Testing cases for poller.py
+"""
+
+import asyncio
+import copy
+import unittest
+from unittest.mock import AsyncMock
+
+from discord_clash_bot.api.coc import ClanNotFound
+from discord_clash_bot.api.priority import Priority, current_priority
+from discord_clash_bot.polling.events import EventType
+from discord_clash_bot.polling.poller import MEMBERS, WAR, ClanPoller
+from tests.helpers import async_test
+from tests.test_api.mock_responses import CLAN, CLAN_MEMBER, WAR as WAR_PAYLOAD
+
+
+def make_client():
+    """Mock of an asynchronous client serving the mock responses"""
+    client = AsyncMock()
+    client.get_clan.return_value = CLAN
+    client.get_clan_members.return_value = [CLAN_MEMBER]
+    client.get_war.return_value = WAR_PAYLOAD
+    return client
+
+
+class TestClanPoller(unittest.TestCase):
+    """
+    Unit tests for ClanPoller
+    """
+
+    def setUp(self):
+        self.client = make_client()
+        self.poller = ClanPoller(self.client, ["#CLAN"], interval=0)
+        self.received = []
+
+    @async_test
+    async def test_first_poll_is_silent(self):
+        """
+        Test whether the first poll only takes the snapshots
+        """
+        self.poller.subscribe(self.received.append)
+        self.assertEqual(await self.poller.poll(), [])
+        self.assertEqual(len(self.poller.snapshots), 3)
+        self.assertEqual(self.received, [])
+
+    @async_test
+    async def test_unchanged_payloads(self):
+        """
+        Test whether unchanged payloads emit nothing
+        """
+        await self.poller.poll()
+        self.client.get_clan_members.return_value = [dict(CLAN_MEMBER)]
+        self.assertEqual(await self.poller.poll(), [])
+
+    @async_test
+    async def test_changes_are_emitted(self):
+        """
+        Test whether changes are sent to the subscribers of their type
+        """
+        joined = []
+
+        async def on_join(event):
+            joined.append(event)
+
+        self.poller.subscribe(on_join, EventType.MEMBER_JOINED)
+        self.poller.subscribe(self.received.append)
+        await self.poller.poll()
+
+        war = copy.deepcopy(WAR_PAYLOAD)
+        war["state"] = "warEnded"
+        self.client.get_war.return_value = war
+        self.client.get_clan_members.return_value = [
+            CLAN_MEMBER, {"tag": "#NEW", "name": "new", "role": "member"}
+        ]
+        events = await self.poller.poll()
+
+        self.assertEqual(
+            {event.type for event in events},
+            {EventType.MEMBER_JOINED, EventType.WAR_STATE_CHANGED},
+        )
+        self.assertEqual(self.received, events)
+        self.assertEqual([event.data["member"]["tag"] for event in joined], ["#NEW"])
+
+    @async_test
+    async def test_errors_are_skipped(self):
+        """
+        Test whether a failing request or subscriber does not stop the poll
+        """
+        self.client.get_war.side_effect = ClanNotFound()
+
+        def broken(_):
+            raise RuntimeError("broken subscriber")
+
+        self.poller.subscribe(broken)
+        self.poller.subscribe(self.received.append)
+        await self.poller.poll()
+        self.assertNotIn(("#CLAN", WAR), self.poller.snapshots)
+
+        self.client.get_clan_members.return_value = []
+        await self.poller.poll()
+        self.assertEqual([event.type for event in self.received], [EventType.MEMBER_LEFT])
+
+    @async_test
+    async def test_polling_priority(self):
+        """
+        Test whether the polls request with the polling priority class
+        """
+        priorities = []
+
+        async def get_clan(_):
+            priorities.append(current_priority())
+            return CLAN
+
+        self.client.get_clan.side_effect = get_clan
+        await self.poller.poll()
+        self.assertEqual(priorities, [Priority.POLLING])
+        self.assertIs(current_priority(), Priority.INTERACTIVE)
+
+    @async_test
+    async def test_run_in_background(self):
+        """
+        Test whether the background task polls until it is stopped
+        """
+        self.poller.kinds = (MEMBERS,)
+        self.poller.start()
+        await asyncio.sleep(0.01)
+        await self.poller.stop()
+        self.assertGreater(self.client.get_clan_members.await_count, 1)
+        self.client.get_war.assert_not_awaited()
+
+    def test_clans(self):
+        """
+        Test whether clans can be added and removed
+        """
+        self.poller.add_clan("#OTHER")
+        self.poller.add_clan("#OTHER")
+        self.assertEqual(self.poller.clan_tags, ["#CLAN", "#OTHER"])
+        self.poller.snapshots[("#OTHER", MEMBERS)] = None
+        self.poller.remove_clan("#OTHER")
+        self.assertEqual(self.poller.clan_tags, ["#CLAN"])
+        self.assertEqual(self.poller.snapshots, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+"""
+Testing cases for scheduler.py
+"""
+
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock
+
+from discord_clash_bot.polling.events import EventType
+from discord_clash_bot.polling.poller import CLAN, MEMBERS, WAR, ClanPoller
+from discord_clash_bot.polling.scheduler import PollIntervals, PollScheduler, war_interval
+from tests.helpers import FakeClock, async_test
+from tests.test_api.mock_responses import CLAN as CLAN_PAYLOAD
+from tests.test_api.mock_responses import CLAN_MEMBER, WAR as WAR_PAYLOAD
+
+# end of the war of the mock war payload
+WAR_END = datetime(2023, 5, 29, 8, tzinfo=timezone.utc)
+
+
+def make_client():
+    """Mock of an asynchronous client serving the mock responses"""
+    client = AsyncMock()
+    client.get_clan.return_value = CLAN_PAYLOAD
+    client.get_clan_members.return_value = [CLAN_MEMBER]
+    client.get_war.return_value = WAR_PAYLOAD
+    client.cached_ttl = Mock(return_value=0.0)
+    return client
+
+
+class TestWarInterval(unittest.TestCase):
+    """
+    Unit tests for the intervals of the war polls
+    """
+
+    def setUp(self):
+        self.intervals = PollIntervals()
+
+    def test_phases(self):
+        """
+        Test whether the interval follows the phase of the war
+        """
+        now = WAR_END - timedelta(hours=10)
+        self.assertEqual(war_interval(None, self.intervals, now), 900)
+        self.assertEqual(war_interval({"state": "notInWar"}, self.intervals, now), 900)
+        self.assertEqual(war_interval(WAR_PAYLOAD, self.intervals, now), 180)
+        self.assertEqual(war_interval({"state": "warEnded"}, self.intervals, now), 900)
+
+    def test_end_of_war(self):
+        """
+        Test whether the war is polled fast in its last hour and right after its end
+        """
+        now = WAR_END - timedelta(minutes=30)
+        self.assertEqual(war_interval(WAR_PAYLOAD, self.intervals, now), 30)
+        now = WAR_END - timedelta(seconds=10)
+        self.assertEqual(war_interval(WAR_PAYLOAD, self.intervals, now), 11)
+
+    def test_preparation(self):
+        """
+        Test whether preparation is polled right after the battle day starts
+        """
+        war = dict(WAR_PAYLOAD, state="preparation")
+        start = datetime(2023, 5, 28, 8, tzinfo=timezone.utc)
+        self.assertEqual(war_interval(war, self.intervals, start - timedelta(hours=5)), 600)
+        self.assertEqual(war_interval(war, self.intervals, start - timedelta(seconds=99)), 100)
+
+    def test_battle_day_started(self):
+        """
+        Test whether a war still in preparation after its start is polled as in war
+        """
+        war = dict(WAR_PAYLOAD, state="preparation")
+        start = datetime(2023, 5, 28, 8, tzinfo=timezone.utc)
+        self.assertEqual(war_interval(war, self.intervals, start), 180)
+        self.assertEqual(war_interval(war, self.intervals, start + timedelta(minutes=5)), 180)
+        self.assertEqual(war_interval(war, self.intervals, WAR_END - timedelta(minutes=30)), 30)
+
+
+class TestPollScheduler(unittest.TestCase):
+    """
+    Unit tests for PollScheduler
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.client = make_client()
+        self.poller = ClanPoller(self.client, ["#CLAN"])
+        self.scheduler = PollScheduler(
+            self.poller,
+            clock=self.clock,
+            wall_clock=lambda: WAR_END - timedelta(hours=10),
+        )
+
+    @async_test
+    async def test_adaptive_intervals(self):
+        """
+        Test whether every poll is scheduled at the interval of its kind
+        """
+        self.assertEqual(await self.scheduler.run_due(), 3)
+        self.assertEqual(self.scheduler.due("#CLAN", CLAN), 300)
+        self.assertEqual(self.scheduler.due("#CLAN", MEMBERS), 300)
+        self.assertEqual(self.scheduler.due("#CLAN", WAR), 180)
+        self.assertEqual(await self.scheduler.run_due(), 0)
+
+        self.clock.now = 180
+        self.assertEqual(await self.scheduler.run_due(), 1)
+        self.assertEqual(self.client.get_war.await_count, 2)
+
+    @async_test
+    async def test_cache_max_age(self):
+        """
+        Test whether a poll is not due before its cached response expires
+        """
+        self.client.cached_ttl.return_value = 500.0
+        await self.scheduler.run_due()
+        self.assertEqual(self.scheduler.due("#CLAN", WAR), 500)
+
+    @async_test
+    async def test_events_are_emitted(self):
+        """
+        Test whether changes found by the scheduled polls reach the subscribers
+        """
+        received = []
+        self.poller.subscribe(received.append)
+        await self.scheduler.run_due()
+
+        self.client.get_clan_members.return_value = []
+        self.clock.now = 300
+        await self.scheduler.run_due()
+        self.assertEqual([event.type for event in received], [EventType.MEMBER_LEFT])
+
+    @async_test
+    async def test_many_clans_single_heap(self):
+        """
+        Test whether hundreds of clans are kept in a single heap
+        """
+        for index in range(300):
+            self.scheduler.add_clan(f"#C{index}")
+        self.assertEqual(len(self.scheduler), 301 * 3)
+        self.assertEqual(await self.scheduler.run_due(), 301 * 3)
+
+        self.scheduler.remove_clan("#C0")
+        self.clock.now = 1000
+        self.assertEqual(await self.scheduler.run_due(), 300 * 3)
+
+    @async_test
+    async def test_failing_interval(self):
+        """
+        Test whether a clan whose interval raises is polled again later and does
+        not stop the polls of the other clans
+        """
+
+        def cached_ttl(_, params):
+            if params["clan_tag"] == "#BAD":
+                raise ValueError("malformed tag")
+            return 0.0
+
+        self.client.cached_ttl.side_effect = cached_ttl
+        self.scheduler.add_clan("#BAD")
+        self.assertEqual(await self.scheduler.run_due(), 6)
+        self.assertEqual(self.scheduler.due("#BAD", CLAN), 300)
+        self.assertEqual(self.scheduler.due("#BAD", WAR), 900)
+        self.assertEqual(self.scheduler.due("#CLAN", WAR), 180)
+        self.assertEqual(len(self.scheduler), 6)
+
+    @async_test
+    async def test_reschedule_replaces(self):
+        """
+        Test whether scheduling again replaces the previous entry
+        """
+        self.scheduler.schedule("#CLAN", WAR, 50)
+        self.assertEqual(await self.scheduler.run_due(), 2)
+        self.clock.now = 50
+        self.assertEqual(await self.scheduler.run_due(), 1)
+        self.assertAlmostEqual(self.scheduler.seconds_to_next(), 180)
+
+    @async_test
+    async def test_run_in_background(self):
+        """
+        Test whether the background task runs the due polls until stopped
+        """
+        scheduler = PollScheduler(ClanPoller(self.client, ["#CLAN"]))
+        scheduler.start()
+        await asyncio.sleep(0.01)
+        await scheduler.stop()
+        self.assertEqual(self.client.get_clan.await_count, 1)
+        self.assertEqual(len(scheduler), 3)
+
+    @async_test
+    async def test_slow_poll_does_not_block(self):
+        """
+        Test whether polls coming due while a slow poll runs are started anyway
+        """
+        release = asyncio.Event()
+
+        async def get_war(*_):
+            await release.wait()
+            return WAR_PAYLOAD
+
+        self.client.get_war.side_effect = get_war
+        self.scheduler.start()
+        await asyncio.sleep(0.01)
+        self.scheduler.add_clan("#OTHER")
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.client.get_clan.await_count, 2)
+        self.assertIsNone(self.scheduler.due("#CLAN", WAR))
+
+        release.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.scheduler.due("#CLAN", WAR), 180)
+        await self.scheduler.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()